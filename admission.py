@@ -0,0 +1,128 @@
+"""
+Admission Control
+
+Bounds the scoring work the API takes on at once. A request that finds
+no free slot is refused immediately (the caller answers 503 with
+Retry-After). It does not queue behind work it would only slow down, so
+latency for admitted requests stays bounded under overload and health
+checks keep answering.
+
+Single predictions have priority over bulk work:
+- batches may hold at most `max_batch_in_flight` of the slots, which
+  keeps the rest free for single predictions
+- batches never wait for a slot; single predictions may wait up to
+  `single_wait` seconds for one to free up
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed"""
+
+    def __init__(self, kind, retry_after):
+        super().__init__(f"Too many {kind} requests in flight; retry in {retry_after}s")
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Parameters:
+    -----------
+    max_in_flight : int
+        Requests scored at once, singles and batches together
+    max_batch_in_flight : int, optional
+        Slots batches may hold (default: half of max_in_flight, at least 1)
+    max_batch_rows : int
+        Largest batch accepted; 0 allows any size
+    single_wait : float
+        Seconds a single prediction may wait for a slot before being shed
+    retry_after : int
+        Seconds suggested to shed callers
+    """
+
+    KINDS = ('single', 'batch')
+
+    def __init__(self, max_in_flight=8, max_batch_in_flight=None, max_batch_rows=10000,
+                 single_wait=0.01, retry_after=1):
+        self.max_in_flight = max_in_flight
+        self.max_batch_in_flight = (max(1, max_in_flight // 2) if max_batch_in_flight is None
+                                    else min(max_batch_in_flight, max_in_flight))
+        self.max_batch_rows = max_batch_rows
+        self.single_wait = single_wait
+        self.retry_after = retry_after
+
+        self._condition = threading.Condition()
+        self._in_flight = {kind: 0 for kind in self.KINDS}
+        self._waiting = 0
+        self.admitted = {kind: 0 for kind in self.KINDS}
+        self.shed = {kind: 0 for kind in self.KINDS}
+        self.oversized = 0
+
+    def _has_slot(self, kind):
+        total = self._in_flight['single'] + self._in_flight['batch']
+        if kind == 'batch':
+            # Leave waiting single predictions the next free slot
+            return (total < self.max_in_flight and not self._waiting
+                    and self._in_flight['batch'] < self.max_batch_in_flight)
+        return total < self.max_in_flight
+
+    def acquire(self, kind):
+        """Take a slot or raise Overloaded; pair with release(kind)"""
+        with self._condition:
+            if not self._has_slot(kind) and kind == 'single' and self.single_wait > 0:
+                self._waiting += 1
+                try:
+                    deadline = time.monotonic() + self.single_wait
+                    while not self._has_slot(kind):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or not self._condition.wait(remaining):
+                            break
+                finally:
+                    self._waiting -= 1
+            if not self._has_slot(kind):
+                self.shed[kind] += 1
+                raise Overloaded(kind, self.retry_after)
+            self._in_flight[kind] += 1
+            self.admitted[kind] += 1
+
+    def release(self, kind):
+        with self._condition:
+            self._in_flight[kind] -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def admit(self, kind):
+        self.acquire(kind)
+        try:
+            yield
+        finally:
+            self.release(kind)
+
+    def allow_rows(self, rows):
+        """False (and counted) when a batch is over max_batch_rows"""
+        if self.max_batch_rows and rows > self.max_batch_rows:
+            with self._condition:
+                self.oversized += 1
+            return False
+        return True
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._condition:
+            return {
+                'limits': {
+                    'max_in_flight': self.max_in_flight,
+                    'max_batch_in_flight': self.max_batch_in_flight,
+                    'max_batch_rows': self.max_batch_rows,
+                    'single_wait_ms': self.single_wait * 1000,
+                },
+                'in_flight': dict(self._in_flight),
+                'queue_depth': self._waiting,
+                'admitted': dict(self.admitted),
+                'shed': dict(self.shed),
+                'oversized_batches': self.oversized,
+            }
@@ -1,22 +1,354 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
-import joblib
+import json
 import numpy as np
+import atexit
+import functools
+import os
+import threading
+import time
+import types
 from datetime import datetime
 
+from admission import AdmissionController, Overloaded
+from batch_jobs import JobManager, JobQueueFull
+from compression import GzipMiddleware
+from drift import DriftMonitor, load_reference
+from memory_report import memory_report
+from model_runtime import load_model
+from model_store import ModelStore, file_version
+from prediction_log import PredictionLog
+from score_index import ScoreIndexStore
+from shadow import ShadowScorer
+from validation import validate_customers
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Load model and scaler at startup
+# Seconds between checks for new model versions (0 disables the watcher)
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', '5'))
+# Warm-up before a model is served: passes of synthetic predictions until
+# the slowest single-row prediction takes at most the budget (0 disables
+# the check); failed loads are retried every MODEL_LOAD_RETRY_SECONDS
+MODEL_WARMUP_BUDGET_MS = float(os.environ.get('MODEL_WARMUP_BUDGET_MS', '25'))
+MODEL_WARMUP_MAX_ROUNDS = int(os.environ.get('MODEL_WARMUP_MAX_ROUNDS', '20'))
+MODEL_LOAD_RETRY_SECONDS = float(os.environ.get('MODEL_LOAD_RETRY_SECONDS', '5'))
+# If set, admin endpoints require a matching X-Admin-Token header
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1400'))
+COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', '6'))
+# Asynchronous batch jobs: stored under JOBS_DIR, scored JOB_WORKERS at a
+# time so interactive requests keep most of the CPU
+JOBS_DIR = os.environ.get('JOBS_DIR', 'jobs')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '1'))
+JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING', '20'))
+JOB_CHUNK_SIZE = int(os.environ.get('JOB_CHUNK_SIZE', '10000'))
+JOB_RETENTION_HOURS = float(os.environ.get('JOB_RETENTION_HOURS', '24'))
+JOB_CLEANUP_SECONDS = float(os.environ.get('JOB_CLEANUP_SECONDS', '600'))
+# Candidate model scored in the background on copies of live traffic
+SHADOW_MODEL_PATH = os.environ.get('SHADOW_MODEL_PATH')
+SHADOW_QUEUE_SIZE = int(os.environ.get('SHADOW_QUEUE_SIZE', '1000'))
+SHADOW_WORKERS = int(os.environ.get('SHADOW_WORKERS', '2'))
+# Audit log of predictions, written in batches by a background thread
+# (a sample rate of 0 disables it)
+PREDICTION_LOG_DIR = os.environ.get('PREDICTION_LOG_DIR', 'logs')
+PREDICTION_LOG_SAMPLE_RATE = float(os.environ.get('PREDICTION_LOG_SAMPLE_RATE', '1.0'))
+PREDICTION_LOG_BUFFER = int(os.environ.get('PREDICTION_LOG_BUFFER', '10000'))
+PREDICTION_LOG_FLUSH_SECONDS = float(os.environ.get('PREDICTION_LOG_FLUSH_SECONDS', '1.0'))
+PREDICTION_LOG_MAX_BYTES = int(os.environ.get('PREDICTION_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+PREDICTION_LOG_BACKUPS = int(os.environ.get('PREDICTION_LOG_BACKUPS', '5'))
+# Admission control: scoring requests beyond these limits get a fast 503
+# instead of queueing (ADMISSION_MAX_IN_FLIGHT=0 disables it)
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '8'))
+ADMISSION_MAX_BATCH_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_BATCH_IN_FLIGHT',
+                                                   str(max(1, ADMISSION_MAX_IN_FLIGHT // 2))))
+ADMISSION_MAX_BATCH_ROWS = int(os.environ.get('ADMISSION_MAX_BATCH_ROWS', '10000'))
+ADMISSION_SINGLE_WAIT_MS = float(os.environ.get('ADMISSION_SINGLE_WAIT_MS', '10'))
+ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', '1'))
+# Training-data histograms that live traffic is compared against
+DRIFT_REFERENCE_PATH = os.environ.get('DRIFT_REFERENCE_PATH', 'drift_reference.json')
+DRIFT_MIN_ROWS = int(os.environ.get('DRIFT_MIN_ROWS', '100'))
+# Precomputed scores of known customers, served by GET /score/<customer_id>;
+# POST /admin/score-index/rebuild rescores SCORE_INDEX_CUSTOMERS into it
+SCORE_INDEX_DIR = os.environ.get('SCORE_INDEX_DIR', 'score_index')
+SCORE_INDEX_CUSTOMERS = os.environ.get('SCORE_INDEX_CUSTOMERS')
+SCORE_INDEX_ID_COLUMN = os.environ.get('SCORE_INDEX_ID_COLUMN', 'customer_id')
+
+# gzip request bodies and gzip responses for clients that accept it
+app.wsgi_app = GzipMiddleware(app.wsgi_app, min_size=COMPRESSION_MIN_BYTES,
+                              level=COMPRESSION_LEVEL)
+
+# Load the serving model in the background, so the server accepts
+# connections (and answers liveness probes) immediately. The model is
+# warmed up with synthetic predictions and /health/ready only succeeds
+# once warm-up latency is within budget. The scaler is folded into the
+# exported artifact, so it scores raw age/salary directly. New versions
+# published to models/ are picked up in the background and swapped in
+# atomically.
+model_store = ModelStore(warmup_budget_ms=MODEL_WARMUP_BUDGET_MS,
+                         warmup_max_rounds=MODEL_WARMUP_MAX_ROUNDS)
+model_store.start_loading(MODEL_LOAD_RETRY_SECONDS)
+model_store.start_watcher(MODEL_WATCH_INTERVAL)
+
+# Shadow mode is off unless a candidate model is configured
+shadow = None
+if SHADOW_MODEL_PATH:
+    try:
+        shadow = ShadowScorer(load_model(SHADOW_MODEL_PATH),
+                              version=file_version(SHADOW_MODEL_PATH),
+                              queue_size=SHADOW_QUEUE_SIZE,
+                              workers=SHADOW_WORKERS)
+        print(f"✓ Shadow scoring enabled with {SHADOW_MODEL_PATH}")
+    except Exception as e:
+        print(f"✗ Error loading shadow model: {e}")
+
+prediction_log = None
+if PREDICTION_LOG_SAMPLE_RATE > 0:
+    prediction_log = PredictionLog(PREDICTION_LOG_DIR,
+                                   buffer_size=PREDICTION_LOG_BUFFER,
+                                   sample_rate=PREDICTION_LOG_SAMPLE_RATE,
+                                   flush_interval=PREDICTION_LOG_FLUSH_SECONDS,
+                                   max_bytes=PREDICTION_LOG_MAX_BYTES,
+                                   backup_count=PREDICTION_LOG_BACKUPS)
+    atexit.register(prediction_log.close)
+
+admission = None
+if ADMISSION_MAX_IN_FLIGHT > 0:
+    admission = AdmissionController(max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+                                    max_batch_in_flight=ADMISSION_MAX_BATCH_IN_FLIGHT,
+                                    max_batch_rows=ADMISSION_MAX_BATCH_ROWS,
+                                    single_wait=ADMISSION_SINGLE_WAIT_MS / 1000,
+                                    retry_after=ADMISSION_RETRY_AFTER)
+
+# Constant-memory sketches of the scored age/salary distributions
+drift = None
 try:
-    model = joblib.load('purchase_model.pkl')
-    scaler = joblib.load('scaler.pkl')
-    print("✓ Model and scaler loaded successfully!")
+    drift = DriftMonitor(load_reference(DRIFT_REFERENCE_PATH))
 except Exception as e:
-    print(f"✗ Error loading model: {e}")
-    model = None
-    scaler = None
+    print(f"✗ Drift monitoring disabled: {e}")
+
+score_indexes = ScoreIndexStore(SCORE_INDEX_DIR)
+
+
+def score_customers(model, customers, labels_only=False):
+    """
+    Validate customers and score the valid ones with one model call.
+
+    With labels_only the forest stops evaluating trees for each customer
+    once the vote is decided, and no probabilities are computed.
+
+    Returns:
+    --------
+    validated : ValidationResult
+    predictions : np.ndarray, shape (n_valid,)
+    probabilities : np.ndarray, shape (n_valid, 2), or None with labels_only
+    """
+    validated = validate_customers(customers)
+    if labels_only:
+        predictions = (model.predict_labels(validated.features) if len(validated.indices)
+                       else np.empty(0))
+        return validated, predictions, None
+    if len(validated.indices):
+        probabilities = model.predict_proba(validated.features)
+        predictions = model.classes_[np.argmax(probabilities, axis=1)]
+    else:
+        probabilities = np.empty((0, 2))
+        predictions = np.empty(0)
+    return validated, predictions, probabilities
+
+
+def batch_results(indices, features, predictions, probabilities, offset=0):
+    """Yield one result object per scored customer (labels only if probabilities is None)"""
+    if probabilities is None:
+        for idx, (age, salary), prediction in zip(
+                indices.tolist(), features.tolist(), predictions.tolist()):
+            yield {
+                'index': idx + offset,
+                'input': {
+                    'age': age,
+                    'salary': salary
+                },
+                'prediction': {
+                    'will_purchase': prediction == 1,
+                    'label': 'Will Purchase' if prediction == 1 else 'Will Not Purchase'
+                }
+            }
+        return
+    for idx, (age, salary), prediction, (p_not, p_buy) in zip(
+            indices.tolist(), features.tolist(),
+            predictions.tolist(), probabilities.tolist()):
+        yield {
+            'index': idx + offset,
+            'input': {
+                'age': age,
+                'salary': salary
+            },
+            'prediction': {
+                'will_purchase': prediction == 1,
+                'label': 'Will Purchase' if prediction == 1 else 'Will Not Purchase',
+                'confidence': p_buy if prediction == 1 else p_not,
+                'probabilities': {
+                    'not_purchase': p_not,
+                    'purchase': p_buy
+                }
+            }
+        }
+
+
+def explained_results(indices, features, probabilities, bias, contributions):
+    """Yield one result object per explained customer, with contributions to P(purchase)"""
+    for idx, (age, salary), (p_not, p_buy), (age_part, salary_part) in zip(
+            indices.tolist(), features.tolist(), probabilities.tolist(),
+            contributions[:, :, 1].tolist()):
+        prediction = 1 if p_buy > p_not else 0
+        yield {
+            'index': idx,
+            'input': {
+                'age': age,
+                'salary': salary
+            },
+            'prediction': {
+                'will_purchase': prediction == 1,
+                'label': 'Will Purchase' if prediction == 1 else 'Will Not Purchase',
+                'confidence': p_buy if prediction == 1 else p_not,
+                'probabilities': {
+                    'not_purchase': p_not,
+                    'purchase': p_buy
+                }
+            },
+            'explanation': {
+                'base_value': bias,
+                'contributions': {
+                    'age': age_part,
+                    'salary': salary_part
+                }
+            }
+        }
+
+
+def score_job_chunk(current, customers, offset):
+    """Score one chunk of a batch job; results and errors in index order"""
+    validated, predictions, probabilities = score_customers(current.model, customers)
+    if drift is not None:
+        drift.update(validated.features)
+    rows = list(batch_results(validated.indices, validated.features,
+                              predictions, probabilities, offset))
+    for error in validated.errors:
+        rows.append(dict(error, index=error['index'] + offset))
+    rows.sort(key=lambda row: row['index'])
+    return rows
+
+
+def pin_job_model():
+    """Model version used for the whole of a batch job"""
+    current = model_store.active
+    if current is None:
+        raise RuntimeError('Model not loaded')
+    return current, current.version
+
+
+# Background scoring of large batch jobs
+jobs = JobManager(score_job_chunk, pin_job_model, jobs_dir=JOBS_DIR,
+                  workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING,
+                  chunk_size=JOB_CHUNK_SIZE,
+                  retention_seconds=JOB_RETENTION_HOURS * 3600,
+                  cleanup_interval=JOB_CLEANUP_SECONDS)
+
+
+def stream_json(document, chunk_rows=1000):
+    """
+    Serialize a JSON object piece by piece.
+
+    Values that are generators are written as arrays, `chunk_rows`
+    elements at a time; everything else is encoded normally.
+    """
+    yield '{'
+    for position, (key, value) in enumerate(document.items()):
+        yield (', ' if position else '') + json.dumps(key) + ': '
+        if not isinstance(value, types.GeneratorType):
+            yield json.dumps(value)
+            continue
+        
+        yield '['
+        separator = ''
+        chunk = []
+        for item in value:
+            chunk.append(item)
+            if len(chunk) == chunk_rows:
+                yield separator + json.dumps(chunk)[1:-1]
+                separator = ', '
+                chunk = []
+        if chunk:
+            yield separator + json.dumps(chunk)[1:-1]
+        yield ']'
+    yield '}'
+
+
+def admitted(kind):
+    """
+    Run a scoring view only if the admission controller has a slot for it.
+    
+    Shed requests get 503 with Retry-After before their body is parsed.
+    The slot of a streamed response is held until streaming finishes.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if admission is None:
+                return view(*args, **kwargs)
+            try:
+                admission.acquire(kind)
+            except Overloaded as e:
+                response = jsonify({'error': 'Server overloaded', 'message': str(e)})
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response, 503
+            once = threading.Lock()
+            
+            def release():
+                if once.acquire(blocking=False):
+                    admission.release(kind)
+            
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except BaseException:
+                release()
+                raise
+            if not response.is_streamed:
+                release()
+                return response
+            
+            body = response.response
+            
+            def stream():
+                try:
+                    yield from body
+                finally:
+                    release()
+            
+            response.response = stream()
+            response.call_on_close(release)
+            return response
+        return wrapper
+    return decorator
+
+
+def model_not_ready():
+    """503 for requests that arrive before a model has been loaded and warmed up"""
+    response = jsonify({
+        'error': 'Model not ready',
+        'message': ('The model is still loading and warming up' if model_store.loading
+                    else 'No model could be loaded; please ensure model files exist'),
+        'last_error': model_store.last_error
+    })
+    response.headers['Retry-After'] = str(max(1, int(MODEL_LOAD_RETRY_SECONDS)))
+    return response, 503
+
+
+def admin_authorized():
+    """Check the admin token, if one is configured"""
+    return ADMIN_TOKEN is None or request.headers.get('X-Admin-Token') == ADMIN_TOKEN
 
 
 @app.route('/')
@@ -30,8 +362,24 @@ def home():
         'endpoints': {
             'GET /': 'API information',
             'GET /health': 'Health check',
+            'GET /health/live': 'Liveness probe',
+            'GET /health/ready': 'Readiness probe (503 until the model is warmed up)',
             'POST /predict': 'Make a prediction',
-            'POST /predict/batch': 'Make batch predictions'
+            'POST /predict/batch': 'Make batch predictions',
+            'POST /explain': 'Explain a prediction by feature',
+            'POST /explain/batch': 'Explain batch predictions by feature',
+            'POST /jobs': 'Submit a background batch job',
+            'GET /jobs/<job_id>': 'Batch job status',
+            'GET /jobs/<job_id>/result': 'Download batch job results',
+            'POST /admin/reload': 'Load a new model version',
+            'GET /admin/shadow': 'Shadow model comparison',
+            'GET /admin/memory': 'Model memory and request allocation report',
+            'GET /admin/prediction-log': 'Prediction log counters',
+            'GET /admin/drift': 'Feature drift against the training data',
+            'GET /admin/admission': 'Admission control limits, queue depth and shed counts',
+            'GET /score/<customer_id>': 'Precomputed score of a known customer',
+            'GET /admin/score-index': 'Score index version and rebuild status',
+            'POST /admin/score-index/rebuild': 'Rescore the customer table with the current model'
         }
     })
 
@@ -39,15 +387,264 @@ def home():
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    model_loaded = model is not None and scaler is not None
+    current = model_store.active
+    model_loaded = current is not None
     return jsonify({
         'status': 'healthy' if model_loaded else 'unhealthy',
         'model_loaded': model_loaded,
+        'ready': model_store.ready,
+        'loading': model_store.loading,
+        'warmup': model_store.warmup,
+        'model_version': current.version if current else None,
+        'model_loaded_at': current.loaded_at if current else None,
+        'reloading': model_store.reloading,
+        'last_reload_error': model_store.last_error,
         'timestamp': datetime.now().isoformat()
     })
 
 
+@app.route('/health/live')
+def health_live():
+    """Liveness probe: the process is up and serving HTTP"""
+    return jsonify({
+        'status': 'alive',
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@app.route('/health/ready')
+def health_ready():
+    """
+    Readiness probe: 200 once a model is loaded and warmed up within the
+    latency budget, 503 before that
+    """
+    current = model_store.active
+    ready = model_store.ready
+    return jsonify({
+        'status': 'ready' if ready else 'not ready',
+        'model_version': current.version if current else None,
+        'loading': model_store.loading,
+        'warmup': model_store.warmup,
+        'last_error': model_store.last_error,
+        'timestamp': datetime.now().isoformat()
+    }), 200 if ready else 503
+
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Load a model version in the background and swap it in when warmed up
+    
+    Optional JSON payload:
+    {
+        "version": "20250101-120000"
+    }
+    """
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        target = model_store.reload(data.get('version'))
+    except FileNotFoundError as e:
+        return jsonify({
+            'error': 'Model version not found',
+            'message': str(e)
+        }), 404
+    
+    if target is None:
+        return jsonify({
+            'error': 'Reload in progress',
+            'message': 'Another model version is currently loading'
+        }), 409
+    
+    current = model_store.active
+    return jsonify({
+        'status': 'reloading',
+        'active_version': current.version if current else None,
+        'target_version': target,
+        'timestamp': datetime.now().isoformat()
+    }), 202
+
+
+@app.route('/admin/shadow')
+def admin_shadow():
+    """Agreement statistics between the serving model and the shadow candidate"""
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    
+    if shadow is None:
+        return jsonify({
+            'error': 'Shadow mode disabled',
+            'message': 'Set SHADOW_MODEL_PATH to score a candidate model'
+        }), 404
+    
+    current = model_store.active
+    stats = shadow.stats()
+    stats['primary_version'] = current.version if current else None
+    stats['timestamp'] = datetime.now().isoformat()
+    return jsonify(stats)
+
+
+@app.route('/admin/shadow/reset', methods=['POST'])
+def admin_shadow_reset():
+    """Start a fresh shadow comparison window"""
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    
+    if shadow is None:
+        return jsonify({
+            'error': 'Shadow mode disabled',
+            'message': 'Set SHADOW_MODEL_PATH to score a candidate model'
+        }), 404
+    
+    shadow.reset()
+    return jsonify({'status': 'reset', 'timestamp': datetime.now().isoformat()})
+
+
+@app.route('/admin/prediction-log')
+def admin_prediction_log():
+    """Counters of the background prediction log"""
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    
+    if prediction_log is None:
+        return jsonify({
+            'error': 'Prediction log disabled',
+            'message': 'Set PREDICTION_LOG_SAMPLE_RATE above 0 to log predictions'
+        }), 404
+    
+    stats = prediction_log.stats()
+    stats['timestamp'] = datetime.now().isoformat()
+    return jsonify(stats)
+
+
+@app.route('/admin/admission')
+def admin_admission():
+    """In-flight work, queue depth and shed counts of the admission controller"""
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    
+    if admission is None:
+        return jsonify({
+            'error': 'Admission control disabled',
+            'message': 'Set ADMISSION_MAX_IN_FLIGHT above 0 to limit concurrent scoring'
+        }), 404
+    
+    stats = admission.stats()
+    stats['timestamp'] = datetime.now().isoformat()
+    return jsonify(stats)
+
+
+@app.route('/admin/drift')
+def admin_drift():
+    """
+    Drift of the scored features from the training data
+    
+    The "sketch" field can be saved and merged with other workers'
+    sketches by `python drift.py report`.
+    """
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    
+    if drift is None:
+        return jsonify({
+            'error': 'Drift monitoring disabled',
+            'message': f'Reference file {DRIFT_REFERENCE_PATH} not found; run train_model.py'
+        }), 404
+    
+    report = drift.report(DRIFT_MIN_ROWS)
+    report['sketch'] = drift.snapshot()
+    report['timestamp'] = datetime.now().isoformat()
+    return jsonify(report)
+
+
+@app.route('/admin/drift/reset', methods=['POST'])
+def admin_drift_reset():
+    """Start a fresh drift window"""
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    
+    if drift is None:
+        return jsonify({
+            'error': 'Drift monitoring disabled',
+            'message': f'Reference file {DRIFT_REFERENCE_PATH} not found; run train_model.py'
+        }), 404
+    
+    drift.reset()
+    return jsonify({'status': 'reset', 'timestamp': datetime.now().isoformat()})
+
+
+@app.route('/admin/memory')
+def admin_memory():
+    """
+    Memory used by the active model and allocated by a traced request
+    
+    Query parameters: batch_size (default 1000), top (allocation sites, default 10)
+    """
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    
+    current = model_store.active
+    if current is None:
+        return model_not_ready()
+    
+    try:
+        batch_size = int(request.args.get('batch_size', 1000))
+        top = int(request.args.get('top', 10))
+    except ValueError:
+        return jsonify({
+            'error': 'Invalid parameters',
+            'message': 'batch_size and top must be integers'
+        }), 400
+    if not 1 <= batch_size <= 100000 or top < 1:
+        return jsonify({
+            'error': 'Invalid parameters',
+            'message': 'batch_size must be between 1 and 100000 and top at least 1'
+        }), 400
+    
+    def traced_request(customers):
+        # The /predict/batch path, including JSON serialization
+        validated, predictions, probabilities = score_customers(current.model, customers)
+        document = {
+            'results': batch_results(validated.indices, validated.features,
+                                     predictions, probabilities),
+            'errors': validated.errors
+        }
+        return ''.join(stream_json(document))
+    
+    report = memory_report(current.model, traced_request, batch_size=batch_size, top=top)
+    report['model_version'] = current.version
+    report['timestamp'] = datetime.now().isoformat()
+    return jsonify(report)
+
+
 @app.route('/predict', methods=['POST'])
+@admitted('single')
 def predict():
     """
     Predict purchase probability for a single customer
@@ -57,14 +654,17 @@ def predict():
         "age": 35,
         "salary": 50000
     }
+
+    Add "labels_only": true to get only the predicted label, which skips
+    computing probabilities and is faster.
     """
+    started = time.perf_counter()
     try:
-        # Check if model is loaded
-        if model is None or scaler is None:
-            return jsonify({
-                'error': 'Model not loaded',
-                'message': 'Please ensure model files exist'
-            }), 500
+        # Pin the model version for the whole request
+        current = model_store.active
+        if current is None:
+            return model_not_ready()
+        model = current.model
         
         # Get JSON data
         data = request.get_json()
@@ -75,44 +675,54 @@ def predict():
                 'message': 'Please send JSON data with age and salary'
             }), 400
         
-        # Validate required fields
-        if 'age' not in data or 'salary' not in data:
-            return jsonify({
-                'error': 'Missing required fields',
-                'message': 'Both age and salary are required',
-                'example': {'age': 35, 'salary': 50000}
-            }), 400
-        
-        # Extract and validate data
-        try:
-            age = float(data['age'])
-            salary = float(data['salary'])
-        except (ValueError, TypeError):
-            return jsonify({
-                'error': 'Invalid data type',
-                'message': 'Age and salary must be numeric values'
-            }), 400
+        # Validate with the same rules as /predict/batch
+        validated = validate_customers([data])
+        if validated.errors:
+            error = validated.errors[0]
+            response = {
+                'error': error['error'],
+                'message': error['message']
+            }
+            if error['error'] == 'Missing required fields':
+                response['example'] = {'age': 35, 'salary': 50000}
+            return jsonify(response), 400
         
-        # Validate ranges
-        if age < 0 or age > 120:
+        # Make prediction
+        input_data = validated.features
+        age, salary = input_data[0].tolist()
+        if data.get('labels_only'):
+            prediction = model.predict_labels(input_data)
+            if prediction_log is not None:
+                prediction_log.record('/predict', current.version, time.perf_counter() - started,
+                                      input_data, None, labels=prediction)
+            if drift is not None:
+                drift.update(input_data)
             return jsonify({
-                'error': 'Invalid age',
-                'message': 'Age must be between 0 and 120'
-            }), 400
+                'input': {
+                    'age': age,
+                    'salary': salary
+                },
+                'prediction': {
+                    'will_purchase': bool(prediction[0] == 1),
+                    'label': 'Will Purchase' if prediction[0] == 1 else 'Will Not Purchase'
+                },
+                'model_version': current.version,
+                'timestamp': datetime.now().isoformat()
+            }), 200
+        probabilities = model.predict_proba(input_data)[0]
+        prediction = model.classes_[np.argmax(probabilities)]
         
-        if salary < 0:
-            return jsonify({
-                'error': 'Invalid salary',
-                'message': 'Salary must be a positive value'
-            }), 400
+        # Hand a copy to the shadow model; never waits
+        if shadow is not None:
+            shadow.submit(input_data, probabilities[np.newaxis, :])
         
-        # Prepare input data
-        input_data = np.array([[age, salary]])
-        input_scaled = scaler.transform(input_data)
+        # Queue an audit record; a background thread writes it to disk
+        if prediction_log is not None:
+            prediction_log.record('/predict', current.version, time.perf_counter() - started,
+                                  input_data, probabilities[np.newaxis, :])
         
-        # Make prediction
-        prediction = model.predict(input_scaled)[0]
-        probabilities = model.predict_proba(input_scaled)[0]
+        if drift is not None:
+            drift.update(input_data)
         
         # Prepare response
         result = {
@@ -129,6 +739,7 @@ def predict():
                     'purchase': float(probabilities[1])
                 }
             },
+            'model_version': current.version,
             'timestamp': datetime.now().isoformat()
         }
         
@@ -142,6 +753,7 @@ def predict():
 
 
 @app.route('/predict/batch', methods=['POST'])
+@admitted('batch')
 def predict_batch():
     """
     Predict purchase probability for multiple customers
@@ -152,16 +764,20 @@ def predict_batch():
             {"age": 35, "salary": 50000},
             {"age": 25, "salary": 30000},
             {"age": 45, "salary": 75000}
-        ]
+        ],
+        "labels_only": false
     }
+
+    With "labels_only": true each result holds only the predicted label;
+    the forest stops evaluating trees once each vote is decided.
     """
+    started = time.perf_counter()
     try:
-        # Check if model is loaded
-        if model is None or scaler is None:
-            return jsonify({
-                'error': 'Model not loaded',
-                'message': 'Please ensure model files exist'
-            }), 500
+        # Pin the model version for the whole request
+        current = model_store.active
+        if current is None:
+            return model_not_ready()
+        model = current.model
         
         # Get JSON data
         data = request.get_json()
@@ -186,62 +802,44 @@ def predict_batch():
                 'message': 'customers must be a non-empty array'
             }), 400
         
-        # Process each customer
-        results = []
-        errors = []
+        if admission is not None and not admission.allow_rows(len(customers)):
+            return jsonify({
+                'error': 'Batch too large',
+                'message': (f'At most {admission.max_batch_rows} customers per request; '
+                            'split the batch or submit it to POST /jobs')
+            }), 413
         
-        for idx, customer in enumerate(customers):
-            try:
-                age = float(customer.get('age', 0))
-                salary = float(customer.get('salary', 0))
-                
-                # Validate
-                if age < 0 or age > 120 or salary < 0:
-                    errors.append({
-                        'index': idx,
-                        'error': 'Invalid values',
-                        'data': customer
-                    })
-                    continue
-                
-                # Prepare and predict
-                input_data = np.array([[age, salary]])
-                input_scaled = scaler.transform(input_data)
-                prediction = model.predict(input_scaled)[0]
-                probabilities = model.predict_proba(input_scaled)[0]
-                
-                results.append({
-                    'index': idx,
-                    'input': {
-                        'age': age,
-                        'salary': salary
-                    },
-                    'prediction': {
-                        'will_purchase': bool(prediction == 1),
-                        'label': 'Will Purchase' if prediction == 1 else 'Will Not Purchase',
-                        'confidence': float(probabilities[1] if prediction == 1 else probabilities[0]),
-                        'probabilities': {
-                            'not_purchase': float(probabilities[0]),
-                            'purchase': float(probabilities[1])
-                        }
-                    }
-                })
-                
-            except Exception as e:
-                errors.append({
-                    'index': idx,
-                    'error': str(e),
-                    'data': customer
-                })
+        # Validate all customers at once, then score every valid row
+        # in a single model call
+        validated, predictions, probabilities = score_customers(
+            model, customers, labels_only=bool(data.get('labels_only')))
+        errors = validated.errors
+        input_data = validated.features
         
-        return jsonify({
+        # Hand the whole batch to the shadow model in one piece; it
+        # compares probabilities, so label-only batches are not shadowed
+        if shadow is not None and len(input_data) and probabilities is not None:
+            shadow.submit(input_data, probabilities)
+        
+        if prediction_log is not None and len(input_data):
+            prediction_log.record('/predict/batch', current.version, time.perf_counter() - started,
+                                  input_data, probabilities, validated.indices, labels=predictions)
+        
+        if drift is not None:
+            drift.update(input_data)
+        
+        # Serialize results while the response is being sent, so large
+        # batches are never held in memory as one JSON document
+        document = {
             'total': len(customers),
-            'successful': len(results),
+            'successful': len(validated.indices),
             'failed': len(errors),
-            'results': results,
+            'results': batch_results(validated.indices, input_data, predictions, probabilities),
             'errors': errors if errors else None,
+            'model_version': current.version,
             'timestamp': datetime.now().isoformat()
-        }), 200
+        }
+        return Response(stream_json(document), status=200, mimetype='application/json')
         
     except Exception as e:
         return jsonify({
@@ -250,6 +848,323 @@ def predict_batch():
         }), 500
 
 
+@app.route('/explain', methods=['POST'])
+@admitted('single')
+def explain():
+    """
+    Explain the purchase probability of a single customer
+    
+    Expected JSON payload:
+    {
+        "age": 35,
+        "salary": 50000
+    }
+
+    The explanation splits P(purchase) into a base value (the forest's
+    average over its training data) plus one contribution per feature,
+    taken from the decision paths the customer follows through the trees:
+    base_value + age + salary = purchase probability.
+    """
+    started = time.perf_counter()
+    try:
+        current = model_store.active
+        if current is None:
+            return model_not_ready()
+        model = current.model
+        
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({
+                'error': 'No data provided',
+                'message': 'Please send JSON data with age and salary'
+            }), 400
+        
+        validated = validate_customers([data])
+        if validated.errors:
+            error = validated.errors[0]
+            response = {
+                'error': error['error'],
+                'message': error['message']
+            }
+            if error['error'] == 'Missing required fields':
+                response['example'] = {'age': 35, 'salary': 50000}
+            return jsonify(response), 400
+        
+        input_data = validated.features
+        probabilities, bias, contributions = model.explain(input_data)
+        
+        if prediction_log is not None:
+            prediction_log.record('/explain', current.version, time.perf_counter() - started,
+                                  input_data, probabilities)
+        
+        if drift is not None:
+            drift.update(input_data)
+        
+        result = next(explained_results(validated.indices, input_data, probabilities,
+                                        float(bias[1]), contributions))
+        del result['index']
+        result['model_version'] = current.version
+        result['timestamp'] = datetime.now().isoformat()
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Explanation failed',
+            'message': str(e)
+        }), 500
+
+
+@app.route('/explain/batch', methods=['POST'])
+@admitted('batch')
+def explain_batch():
+    """
+    Explain the purchase probabilities of multiple customers
+    
+    Expected JSON payload:
+    {
+        "customers": [
+            {"age": 35, "salary": 50000},
+            {"age": 25, "salary": 30000}
+        ]
+    }
+
+    All valid customers are explained with one vectorized model call.
+    """
+    started = time.perf_counter()
+    try:
+        current = model_store.active
+        if current is None:
+            return model_not_ready()
+        model = current.model
+        
+        data = request.get_json()
+        
+        if not data or 'customers' not in data:
+            return jsonify({
+                'error': 'Invalid request',
+                'message': 'Please provide a "customers" array',
+                'example': {
+                    'customers': [
+                        {'age': 35, 'salary': 50000},
+                        {'age': 25, 'salary': 30000}
+                    ]
+                }
+            }), 400
+        
+        customers = data['customers']
+        
+        if not isinstance(customers, list) or len(customers) == 0:
+            return jsonify({
+                'error': 'Invalid customers data',
+                'message': 'customers must be a non-empty array'
+            }), 400
+        
+        if admission is not None and not admission.allow_rows(len(customers)):
+            return jsonify({
+                'error': 'Batch too large',
+                'message': f'At most {admission.max_batch_rows} customers per request'
+            }), 413
+        
+        validated = validate_customers(customers)
+        input_data = validated.features
+        results = []
+        if len(input_data):
+            probabilities, bias, contributions = model.explain(input_data)
+            results = explained_results(validated.indices, input_data, probabilities,
+                                        float(bias[1]), contributions)
+            if prediction_log is not None:
+                prediction_log.record('/explain/batch', current.version,
+                                      time.perf_counter() - started,
+                                      input_data, probabilities, validated.indices)
+        
+        if drift is not None:
+            drift.update(input_data)
+        
+        document = {
+            'total': len(customers),
+            'successful': len(validated.indices),
+            'failed': len(validated.errors),
+            'results': results,
+            'errors': validated.errors if validated.errors else None,
+            'model_version': current.version,
+            'timestamp': datetime.now().isoformat()
+        }
+        return Response(stream_json(document), status=200, mimetype='application/json')
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Batch explanation failed',
+            'message': str(e)
+        }), 500
+
+
+@app.route('/score/<customer_id>')
+def customer_score(customer_id):
+    """
+    Precomputed prediction for a known customer.
+
+    Served from the score index without rescoring. If the index was built
+    with an older model version, the customer's stored age and salary are
+    rescored with the current model ("source": "rescored").
+    """
+    index = score_indexes.current()
+    if index is None:
+        return jsonify({
+            'error': 'Score index not available',
+            'message': 'Build it with "python score_index.py build customers.csv"'
+        }), 404
+    record = index.lookup(customer_id)
+    if record is None:
+        return jsonify({
+            'error': 'Unknown customer',
+            'message': f'Customer {customer_id} is not in the score index'
+        }), 404
+
+    current = model_store.active
+    source = 'index'
+    p_not, p_buy, prediction = record['not_purchase'], record['purchase'], record['label']
+    if current is not None and current.version != index.version:
+        model = current.model
+        probabilities = model.predict_proba(np.array([[record['age'], record['salary']]]))[0]
+        p_not, p_buy = float(probabilities[0]), float(probabilities[1])
+        prediction = int(model.classes_[np.argmax(probabilities)])
+        source = 'rescored'
+
+    return jsonify({
+        'customer_id': customer_id,
+        'input': {
+            'age': record['age'],
+            'salary': record['salary']
+        },
+        'prediction': {
+            'will_purchase': prediction == 1,
+            'label': 'Will Purchase' if prediction == 1 else 'Will Not Purchase',
+            'confidence': p_buy if prediction == 1 else p_not,
+            'probabilities': {
+                'not_purchase': p_not,
+                'purchase': p_buy
+            }
+        },
+        'source': source,
+        'model_version': current.version if source == 'rescored' else index.version,
+        'index_version': index.version,
+        'timestamp': datetime.now().isoformat()
+    }), 200
+
+
+@app.route('/admin/score-index')
+def admin_score_index():
+    """Version and size of the served score index, and the last rebuild"""
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    index = score_indexes.current()
+    current = model_store.active
+    return jsonify({
+        'index': index.meta if index else None,
+        'stale': bool(index and current and index.version != current.version),
+        'model_version': current.version if current else None,
+        'rebuild': score_indexes.rebuild,
+        'timestamp': datetime.now().isoformat()
+    }), 200
+
+
+@app.route('/admin/score-index/rebuild', methods=['POST'])
+def admin_score_index_rebuild():
+    """Rescore SCORE_INDEX_CUSTOMERS with the current model in the background"""
+    if not admin_authorized():
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'A valid X-Admin-Token header is required'
+        }), 401
+    if not SCORE_INDEX_CUSTOMERS:
+        return jsonify({
+            'error': 'Score index rebuild disabled',
+            'message': 'Set SCORE_INDEX_CUSTOMERS to the customer table to enable it'
+        }), 404
+    current = model_store.active
+    if current is None:
+        return model_not_ready()
+    if not score_indexes.start_rebuild(current.model, current.version, SCORE_INDEX_CUSTOMERS,
+                                       id_column=SCORE_INDEX_ID_COLUMN):
+        return jsonify({
+            'error': 'Rebuild in progress',
+            'message': 'Wait for the running rebuild to finish',
+            'rebuild': score_indexes.rebuild
+        }), 409
+    return jsonify({
+        'message': 'Rebuild started',
+        'rebuild': score_indexes.rebuild,
+        'timestamp': datetime.now().isoformat()
+    }), 202
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a large batch for background scoring
+    
+    Accepts either the /predict/batch JSON payload or a multipart upload
+    of a CSV file (field "file") with age and salary columns.
+    """
+    try:
+        if 'file' in request.files:
+            status = jobs.submit_file(request.files['file'].stream)
+        else:
+            data = request.get_json(silent=True)
+            customers = data.get('customers') if isinstance(data, dict) else None
+            if not isinstance(customers, list) or len(customers) == 0:
+                return jsonify({
+                    'error': 'Invalid request',
+                    'message': 'Send a non-empty "customers" array or upload a CSV file as "file"'
+                }), 400
+            status = jobs.submit_customers(customers)
+    except JobQueueFull as e:
+        response = jsonify({'error': 'Too many jobs', 'message': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    job_id = status['job_id']
+    status['status_url'] = f'/jobs/{job_id}'
+    status['result_url'] = f'/jobs/{job_id}/result'
+    return jsonify(status), 202
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Progress of a batch job"""
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({
+            'error': 'Job not found',
+            'message': f'No job {job_id} (finished jobs expire after {JOB_RETENTION_HOURS:g} hours)'
+        }), 404
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Results of a completed batch job as JSON Lines"""
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({
+            'error': 'Job not found',
+            'message': f'No job {job_id} (finished jobs expire after {JOB_RETENTION_HOURS:g} hours)'
+        }), 404
+    path = jobs.result_path(job_id)
+    if path is None:
+        return jsonify({
+            'error': 'Job not completed',
+            'message': f"Job is {status['status']}",
+            'status': status
+        }), 409
+    return send_file(os.path.abspath(path), mimetype='application/x-ndjson',
+                     as_attachment=True, download_name=f'{job_id}.jsonl')
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
@@ -259,8 +1174,16 @@ def not_found(error):
         'available_endpoints': [
             'GET /',
             'GET /health',
+            'GET /health/live',
+            'GET /health/ready',
             'POST /predict',
-            'POST /predict/batch'
+            'POST /predict/batch',
+            'POST /explain',
+            'POST /explain/batch',
+            'POST /jobs',
+            'GET /jobs/<job_id>',
+            'GET /jobs/<job_id>/result',
+            'POST /admin/reload'
         ]
     }), 404
 
@@ -282,8 +1205,12 @@ if __name__ == '__main__':
     print("\nAPI Endpoints:")
     print("  GET  http://127.0.0.1:5001/           - API info")
     print("  GET  http://127.0.0.1:5001/health     - Health check")
+    print("  GET  http://127.0.0.1:5001/health/ready - Readiness probe")
     print("  POST http://127.0.0.1:5001/predict    - Single prediction")
     print("  POST http://127.0.0.1:5001/predict/batch - Batch predictions")
+    print("  POST http://127.0.0.1:5001/explain    - Explain a prediction")
+    print("  POST http://127.0.0.1:5001/jobs       - Background batch job")
+    print("  POST http://127.0.0.1:5001/admin/reload - Load new model version")
     print("\nPress Ctrl+C to stop the server")
     print("=" * 70)
     
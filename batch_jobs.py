@@ -0,0 +1,275 @@
+"""
+Asynchronous Batch Jobs
+
+Scores very large batches in the background instead of holding an HTTP
+connection open. A submitted batch (JSON customers or an uploaded CSV
+file) is written to disk and queued; a small, bounded pool of worker
+threads scores it in chunks and appends the results to a JSON Lines file.
+Clients poll the job status for progress and download the results once
+the job has completed. Finished jobs are deleted after a retention period.
+
+Each job directory under JOBS_DIR contains:
+    input.jsonl or input.csv   - the submitted customers
+    results.jsonl              - one result or error object per customer
+    status.json                - the latest status snapshot
+"""
+
+import csv
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already queued or running"""
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_jsonl(path):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_csv(path):
+    """Yield customers from a CSV with age and salary columns (any case)"""
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        if 'age' not in header or 'salary' not in header:
+            raise ValueError("CSV file must have 'age' and 'salary' columns")
+        age_col = header.index('age')
+        salary_col = header.index('salary')
+        for row in reader:
+            if not row:
+                continue
+            age = row[age_col].strip() if age_col < len(row) else ''
+            salary = row[salary_col].strip() if salary_col < len(row) else ''
+            yield {'age': age or None, 'salary': salary or None}
+
+
+class JobManager:
+    """
+    Parameters:
+    -----------
+    score_chunk : callable(pinned, customers, offset) -> iterable of dict
+        Scores a list of customers and returns one result or error object
+        per customer, with indices starting at offset
+    pin_model : callable() -> (pinned, version)
+        Called once when a job starts; the same pinned model is used for
+        every chunk of the job
+    jobs_dir : str
+        Where job inputs and results are stored
+    workers : int
+        Jobs scored at the same time
+    max_pending : int
+        Queued plus running jobs accepted before submissions are refused
+    chunk_size : int
+        Customers scored per model call
+    retention_seconds : float
+        How long finished jobs are kept on disk
+    cleanup_interval : float
+        Seconds between background sweeps for expired jobs; 0 only
+        cleans up when a job is submitted
+    """
+
+    def __init__(self, score_chunk, pin_model, jobs_dir='jobs', workers=1,
+                 max_pending=20, chunk_size=10000, retention_seconds=24 * 3600,
+                 cleanup_interval=600):
+        self.score_chunk = score_chunk
+        self.pin_model = pin_model
+        self.jobs_dir = jobs_dir
+        self.max_pending = max_pending
+        self.chunk_size = chunk_size
+        self.retention_seconds = retention_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='batch-job')
+        self._stopped = threading.Event()
+        os.makedirs(jobs_dir, exist_ok=True)
+
+        # Expired jobs are removed even while no new jobs are submitted
+        if cleanup_interval > 0:
+            thread = threading.Thread(target=self._clean_periodically, args=(cleanup_interval,),
+                                      name='batch-job-cleanup', daemon=True)
+            thread.start()
+
+    def _clean_periodically(self, interval):
+        while not self._stopped.wait(interval):
+            try:
+                self.cleanup()
+            except Exception as e:
+                print(f"✗ Batch job cleanup error: {e}")
+
+    def close(self):
+        """Stop the cleanup sweeps and wait for running jobs to finish"""
+        self._stopped.set()
+        self._executor.shutdown(wait=True)
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _pending(self):
+        return sum(1 for job in self._jobs.values() if job['status'] in (QUEUED, RUNNING))
+
+    def _create(self, total, input_name):
+        with self._lock:
+            if self._pending() >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} jobs are already queued or running")
+            job_id = uuid.uuid4().hex
+            job = {
+                'job_id': job_id,
+                'status': QUEUED,
+                'total': total,
+                'processed': 0,
+                'successful': 0,
+                'failed': 0,
+                'progress': 0.0,
+                'model_version': None,
+                'error': None,
+                'submitted_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                '_input': input_name,
+            }
+            self._jobs[job_id] = job
+        os.makedirs(self._job_dir(job_id))
+        return job
+
+    def submit_customers(self, customers):
+        """Queue a list of customer objects; returns the job status"""
+        self.cleanup()
+        job = self._create(len(customers), 'input.jsonl')
+        with open(os.path.join(self._job_dir(job['job_id']), 'input.jsonl'), 'w') as f:
+            for customer in customers:
+                f.write(json.dumps(customer) + '\n')
+        return self._start(job)
+
+    def submit_file(self, stream):
+        """Queue an uploaded CSV file (file-like object); returns the job status"""
+        self.cleanup()
+        job = self._create(None, 'input.csv')
+        path = os.path.join(self._job_dir(job['job_id']), 'input.csv')
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(stream, f)
+
+        # Count rows without loading the file, so progress is meaningful
+        with open(path, 'rb') as f:
+            lines = sum(1 for line in f if line.strip())
+        job['total'] = max(lines - 1, 0)
+        return self._start(job)
+
+    def _start(self, job):
+        self._save(job)
+        self._executor.submit(self._run, job)
+        return self.status(job['job_id'])
+
+    def _save(self, job):
+        _write_json_atomic(os.path.join(self._job_dir(job['job_id']), 'status.json'),
+                           {k: v for k, v in job.items() if not k.startswith('_')})
+
+    def _run(self, job):
+        job_dir = self._job_dir(job['job_id'])
+        job['status'] = RUNNING
+        job['started_at'] = datetime.now().isoformat()
+
+        try:
+            pinned, job['model_version'] = self.pin_model()
+            self._save(job)
+
+            input_path = os.path.join(job_dir, job['_input'])
+            reader = _read_csv if job['_input'].endswith('.csv') else _read_jsonl
+            customers = reader(input_path)
+
+            tmp_results = os.path.join(job_dir, 'results.jsonl.tmp')
+            with open(tmp_results, 'w') as out:
+                while True:
+                    chunk = list(islice(customers, self.chunk_size))
+                    if not chunk:
+                        break
+                    for row in self.score_chunk(pinned, chunk, job['processed']):
+                        if 'error' in row:
+                            job['failed'] += 1
+                        else:
+                            job['successful'] += 1
+                        out.write(json.dumps(row) + '\n')
+
+                    job['processed'] += len(chunk)
+                    if job['total']:
+                        job['progress'] = min(job['processed'] / job['total'], 1.0)
+                    self._save(job)
+                    # Give request threads a chance to run between chunks
+                    time.sleep(0)
+            os.replace(tmp_results, os.path.join(job_dir, 'results.jsonl'))
+
+            job['total'] = job['processed']
+            job['progress'] = 1.0
+            job['status'] = COMPLETED
+        except Exception as e:
+            job['status'] = FAILED
+            job['error'] = str(e)
+            print(f"✗ Batch job {job['job_id']} failed: {e}")
+        finally:
+            job['finished_at'] = datetime.now().isoformat()
+            job['_finished'] = time.time()
+            self._save(job)
+            # The input is no longer needed once the job has finished
+            try:
+                os.remove(os.path.join(job_dir, job['_input']))
+            except OSError:
+                pass
+
+    def status(self, job_id):
+        """Public status of a job, or None if unknown or expired"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        status = {k: v for k, v in job.items() if not k.startswith('_')}
+        if job['status'] == COMPLETED:
+            status['expires_at'] = datetime.fromtimestamp(
+                job['_finished'] + self.retention_seconds).isoformat()
+        return status
+
+    def result_path(self, job_id):
+        """Path of a completed job's results file, or None"""
+        job = self._jobs.get(job_id)
+        if job is None or job['status'] != COMPLETED:
+            return None
+        return os.path.join(self._job_dir(job_id), 'results.jsonl')
+
+    def cleanup(self):
+        """Delete finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.get('_finished', cutoff + 1) <= cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        # Also remove directories left behind by a previous server process
+        for name in os.listdir(self.jobs_dir):
+            path = self._job_dir(name)
+            if (name not in self._jobs and os.path.isdir(path)
+                    and os.path.getmtime(path) <= cutoff):
+                expired.append(name)
+        for job_id in expired:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+        return len(expired)
@@ -0,0 +1,315 @@
+"""
+Prediction API Client
+
+A small client library for the Customer Purchase Prediction API.
+
+- One pooled keep-alive session is shared by every call, so requests reuse
+  TCP connections instead of opening a new one per prediction.
+- predict_many() splits large inputs into /predict/batch calls sized to
+  keep every worker busy, and sends them concurrently.
+- predict() calls made close together (within `coalesce_window` seconds)
+  are transparently merged into a single /predict/batch call.
+- AsyncPredictionClient offers the same calls for asyncio code.
+
+Usage:
+    from client import PredictionClient
+
+    with PredictionClient('http://127.0.0.1:5001') as api:
+        result = api.predict(45, 75000)
+        results = api.predict_many([{'age': 25, 'salary': 30000}, ...])
+
+For local testing, pass the Flask test client instead of a URL:
+    PredictionClient(session=FlaskSession(app.test_client()))
+"""
+
+import asyncio
+import math
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class PredictionError(Exception):
+    """Raised when the API rejects a customer or a request fails"""
+
+    def __init__(self, error, message, status_code=None):
+        super().__init__(f"{error}: {message}")
+        self.error = error
+        self.message = message
+        self.status_code = status_code
+
+
+class _TestResponse:
+    """requests-style view of a Flask test response"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+
+    def json(self):
+        return self._response.get_json()
+
+
+class FlaskSession:
+    """
+    Adapter that lets the client talk to a Flask test client.
+
+    Parameters:
+    -----------
+    test_client : flask.testing.FlaskClient
+    """
+
+    def __init__(self, test_client):
+        self.test_client = test_client
+
+    def get(self, url, timeout=None):
+        return _TestResponse(self.test_client.get(url))
+
+    def post(self, url, json=None, timeout=None):
+        return _TestResponse(self.test_client.post(url, json=json))
+
+    def close(self):
+        pass
+
+
+def pooled_session(pool_size=10, retries=2):
+    """
+    requests session with a keep-alive connection pool.
+
+    Connection errors and 503 responses from a shedding server are retried
+    up to `retries` times, waiting as long as its Retry-After header asks.
+    Predictions have no side effects, so POSTs are retried too.
+    """
+    session = requests.Session()
+    retry = Retry(total=retries, status_forcelist=[503],
+                  allowed_methods=frozenset(['GET', 'POST']),
+                  respect_retry_after_header=True, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class PredictionClient:
+    """
+    Parameters:
+    -----------
+    base_url : str
+        API address, e.g. http://127.0.0.1:5001
+    session : requests.Session or FlaskSession, optional
+        Defaults to a pooled keep-alive session
+    batch_size : int
+        Largest number of customers sent in one /predict/batch call
+    min_batch_size : int
+        Smallest chunk predict_many() splits into when spreading work
+        across workers
+    max_workers : int
+        Concurrent /predict/batch calls (also the connection pool size)
+    coalesce_window : float
+        Seconds predict() waits for other calls to share its request;
+        0 sends each call on its own
+    timeout : float
+        Per-request timeout in seconds
+    """
+
+    def __init__(self, base_url='http://127.0.0.1:5001', session=None, batch_size=1000,
+                 min_batch_size=100, max_workers=4, coalesce_window=0.005, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.session = session if session is not None else pooled_session(max_workers)
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.max_workers = max_workers
+        self.coalesce_window = coalesce_window
+        self.timeout = timeout
+        self.requests_sent = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='prediction-client')
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Send any coalesced calls still waiting, then release connections"""
+        # Once closed, a coalescing timer that fires late finds nothing
+        # to send, and later predict() calls fail instead of hanging
+        with self._lock:
+            self._submit_pending()
+            self._closed = True
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def _post(self, path, payload):
+        with self._lock:
+            self.requests_sent += 1
+        response = self.session.post(self.base_url + path, json=payload, timeout=self.timeout)
+        # Error pages from proxies and load balancers are often not JSON
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if response.status_code != 200:
+            data = data if isinstance(data, dict) else {}
+            raise PredictionError(data.get('error', 'Request failed'),
+                                  data.get('message', f'HTTP {response.status_code}'),
+                                  response.status_code)
+        if data is None:
+            raise PredictionError('Invalid response', 'Response body is not JSON',
+                                  response.status_code)
+        return data
+
+    def health(self):
+        """Contents of /health"""
+        return self.session.get(self.base_url + '/health', timeout=self.timeout).json()
+
+    def _score_batch(self, customers):
+        """One /predict/batch call; one result or error object per customer"""
+        data = self._post('/predict/batch', {'customers': customers})
+        rows = [None] * len(customers)
+        for result in data['results']:
+            result['model_version'] = data['model_version']
+            rows[result['index']] = result
+        for error in data['errors'] or []:
+            rows[error['index']] = error
+        return rows
+
+    def _chunk_size(self, n):
+        """Spread n customers over the workers without tiny or oversized calls"""
+        per_worker = math.ceil(n / self.max_workers)
+        return max(1, min(self.batch_size, max(self.min_batch_size, per_worker)))
+
+    def predict_many(self, customers):
+        """
+        Score a list of customers with concurrent /predict/batch calls.
+
+        Parameters:
+        -----------
+        customers : list of dict
+            Records of the form {"age": ..., "salary": ...}
+
+        Returns:
+        --------
+        rows : list of dict
+            One entry per customer in input order: a result object as in
+            /predict/batch, or an error object for invalid customers
+        """
+        customers = list(customers)
+        if not customers:
+            return []
+        size = self._chunk_size(len(customers))
+        starts = range(0, len(customers), size)
+        futures = [self._executor.submit(self._score_batch, customers[start:start + size])
+                   for start in starts]
+
+        rows = []
+        for start, future in zip(starts, futures):
+            for row in future.result():
+                row['index'] += start
+                rows.append(row)
+        return rows
+
+    def predict_async(self, age, salary):
+        """
+        Queue one prediction for coalescing; returns a concurrent Future.
+
+        The future resolves to the result object, or raises PredictionError
+        if the customer is invalid.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                future.set_exception(PredictionError('Client closed',
+                                                     'predict() called after close()'))
+                return future
+            self._pending.append(({'age': age, 'salary': salary}, future))
+            if len(self._pending) >= self.batch_size or self.coalesce_window <= 0:
+                flush_now = True
+            else:
+                flush_now = False
+                if self._timer is None:
+                    self._timer = threading.Timer(self.coalesce_window, self._flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if flush_now:
+            self._flush()
+        return future
+
+    def predict(self, age, salary):
+        """Predict for one customer, sharing a request with concurrent calls"""
+        return self.predict_async(age, salary).result()
+
+    def _flush(self):
+        with self._lock:
+            self._submit_pending()
+
+    def _submit_pending(self):
+        """Hand the waiting calls to a worker; the caller holds the lock"""
+        pending, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not pending:
+            return
+        if self._closed:
+            error = PredictionError('Client closed', 'The client was closed before sending')
+            for _, future in pending:
+                future.set_exception(error)
+            return
+        # Submitting under the lock means close() cannot shut the executor
+        # down between taking the calls and handing them over
+        self._executor.submit(self._resolve, pending)
+
+    def _resolve(self, pending):
+        try:
+            rows = self._score_batch([customer for customer, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        for row, (_, future) in zip(rows, pending):
+            if 'error' in row:
+                future.set_exception(PredictionError(row['error'], row['message'], 400))
+            else:
+                row.pop('index')
+                future.set_result(row)
+
+
+class AsyncPredictionClient:
+    """
+    asyncio interface over PredictionClient; takes the same parameters.
+
+    Network calls run on the client's pooled worker threads, so awaiting
+    a prediction never blocks the event loop.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.client = PredictionClient(*args, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.client.close)
+
+    async def predict(self, age, salary):
+        """Predict for one customer, coalesced with concurrent calls"""
+        return await asyncio.wrap_future(self.client.predict_async(age, salary))
+
+    async def predict_many(self, customers):
+        """Score a list of customers; see PredictionClient.predict_many"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.client.predict_many, customers)
@@ -0,0 +1,166 @@
+"""
+HTTP Compression
+
+WSGI middleware that accepts gzip-compressed request bodies and gzips
+responses for clients that send `Accept-Encoding: gzip`.
+
+Responses are compressed as a stream: the middleware holds back at most
+`min_size` bytes to decide whether compression is worth it, then passes
+every further chunk through the compressor as the application yields it.
+Responses that end before reaching `min_size` are sent as-is with an exact
+Content-Length, so small /predict calls never pay for compression.
+"""
+
+import io
+import json
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+
+def _error(start_response, status, message):
+    body = json.dumps({'error': status.split(' ', 1)[1], 'message': message}).encode()
+    start_response(status, [('Content-Type', 'application/json'),
+                            ('Content-Length', str(len(body)))])
+    return [body]
+
+
+class GzipMiddleware:
+    """
+    Parameters:
+    -----------
+    app : WSGI application
+    min_size : int
+        Responses smaller than this many bytes are not compressed
+    level : int
+        zlib compression level (1 = fastest, 9 = smallest)
+    max_request_size : int
+        Largest decompressed request body accepted, guarding against
+        decompression bombs
+    """
+
+    def __init__(self, app, min_size=1400, level=6, max_request_size=100 * 1024 * 1024):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.max_request_size = max_request_size
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding == 'gzip':
+            error = self._decompress_request(environ)
+            if error:
+                return _error(start_response, *error)
+        elif encoding not in ('', 'identity'):
+            return _error(start_response, '415 Unsupported Media Type',
+                          f'Unsupported Content-Encoding: {encoding}')
+
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if not accept.quality('gzip'):
+            return self.app(environ, start_response)
+        return self._compress_response(environ, start_response)
+
+    def _decompress_request(self, environ):
+        """Replace a gzip request body with its decompressed bytes"""
+        stream = environ['wsgi.input']
+        remaining = environ.get('CONTENT_LENGTH')
+        remaining = int(remaining) if remaining else None
+        decompressor = zlib.decompressobj(wbits=31)
+        body = io.BytesIO()
+
+        try:
+            while remaining is None or remaining > 0:
+                block = stream.read(65536 if remaining is None else min(65536, remaining))
+                if not block:
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                body.write(decompressor.decompress(block, self.max_request_size + 1 - body.tell()))
+                if body.tell() > self.max_request_size or decompressor.unconsumed_tail:
+                    return ('413 Request Entity Too Large',
+                            f'Decompressed body exceeds {self.max_request_size} bytes')
+            body.write(decompressor.flush())
+        except zlib.error:
+            return '400 Bad Request', 'Request body is not valid gzip data'
+        if not decompressor.eof:
+            return '400 Bad Request', 'Request body is truncated gzip data'
+
+        environ['wsgi.input'] = io.BytesIO(body.getvalue())
+        environ['CONTENT_LENGTH'] = str(body.tell())
+        del environ['HTTP_CONTENT_ENCODING']
+        return None
+
+    def _compress_response(self, environ, start_response):
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            captured['exc_info'] = exc_info
+            return lambda data: None  # the legacy write() callable is not used by Flask
+
+        app_iter = self.app(environ, capture)
+        return self._stream(environ, start_response, app_iter, captured)
+
+    def _should_compress(self, environ, status, headers):
+        names = {name.lower(): value for name, value in headers}
+        content_type = names.get('content-type', '')
+        return (environ.get('REQUEST_METHOD') != 'HEAD'
+                and not status.startswith(('204', '304'))
+                and 'content-encoding' not in names
+                and content_type.startswith(COMPRESSIBLE_TYPES))
+
+    def _stream(self, environ, start_response, app_iter, captured):
+        try:
+            chunks = iter(app_iter)
+            held = []
+            held_size = 0
+            finished = False
+
+            # Hold back just enough of the body to know if it is large
+            while held_size < self.min_size:
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    finished = True
+                    break
+                held.append(chunk)
+                held_size += len(chunk)
+
+            status, headers = captured['status'], captured['headers']
+            compress = not finished and self._should_compress(environ, status, headers)
+
+            if not compress:
+                if finished:
+                    headers = [(k, v) for k, v in headers if k.lower() != 'content-length']
+                    headers.append(('Content-Length', str(held_size)))
+                    if self._should_compress(environ, status, headers):
+                        # Larger responses from this URL would be gzipped
+                        headers.append(('Vary', 'Accept-Encoding'))
+                start_response(status, headers, captured['exc_info'])
+                yield from held
+                if not finished:
+                    yield from chunks
+                return
+
+            headers = [(k, v) for k, v in headers
+                       if k.lower() not in ('content-length', 'vary')]
+            headers.append(('Content-Encoding', 'gzip'))
+            headers.append(('Vary', 'Accept-Encoding'))
+            start_response(status, headers, captured['exc_info'])
+
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+            for chunk in held:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            for chunk in chunks:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
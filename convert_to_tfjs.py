@@ -1,88 +1,250 @@
-import joblib
-import numpy as np
-import json
-from sklearn.ensemble import RandomForestClassifier
-import tensorflowjs as tfjs
-import tensorflow as tf
-from tensorflow import keras
+"""
+Browser Model Export
 
-# Load the trained model and scaler
-print("Loading model and scaler...")
-model = joblib.load('purchase_model.pkl')
-scaler = joblib.load('scaler.pkl')
+Builds the model used by index_tfjs.html: a lookup table over the forest's
+own split grid, serialized as plain JSON arrays. No TensorFlow.js download
+is needed in the browser.
 
-print(f"Model type: {type(model).__name__}")
-print(f"Scaler mean: {scaler.mean_}")
-print(f"Scaler scale: {scaler.scale_}")
+Every tree splits on age <= a or salary <= s, so the split points of the
+whole forest cut the (age, salary) plane into cells in which the forest's
+probability is constant. Scoring the forest once per cell therefore gives a
+table that reproduces it exactly for every possible input. The split points
+come from purchase_model.npz, where the scaler is already folded in, so the
+browser works on raw age and salary just like the server.
 
-# Save scaler parameters for JavaScript
-scaler_params = {
-    'mean': scaler.mean_.tolist(),
-    'scale': scaler.scale_.tolist()
-}
+The table is then shrunk by removing split points whose neighbouring cells
+can share one value without exceeding the allowed probability error
+(--max-error, default 0: only merges that change nothing). The error is
+measured over every cell, so it is a bound for all inputs, not a sample.
 
-with open('scaler_params.json', 'w') as f:
-    json.dump(scaler_params, f, indent=2)
+A distilled network or a subset of the trees was not used: neither can be
+more faithful than the exact table, and both are larger here.
 
-print("\n✓ Scaler parameters saved to scaler_params.json")
+Usage:
+    python convert_to_tfjs.py [--max-error 0.02] [--max-bytes 20000]
+"""
 
-# Since RandomForest doesn't directly convert to TensorFlow.js,
-# we'll create a neural network that mimics the behavior
-print("\nTraining a neural network to mimic the Random Forest...")
+import argparse
+import json
+import os
+import sys
 
-# Load the training data
+import numpy as np
 import pandas as pd
-df = pd.read_csv('storepurchasedata_large.csv')
-X = df[['Age', 'Salary']].values
-y = df['Purchased'].values
-
-# Scale the data
-X_scaled = scaler.transform(X)
-
-# Get Random Forest predictions as training labels
-rf_predictions = model.predict_proba(X_scaled)
-
-# Create a neural network
-nn_model = keras.Sequential([
-    keras.layers.Dense(64, activation='relu', input_shape=(2,)),
-    keras.layers.Dropout(0.3),
-    keras.layers.Dense(32, activation='relu'),
-    keras.layers.Dropout(0.2),
-    keras.layers.Dense(16, activation='relu'),
-    keras.layers.Dense(2, activation='softmax')
-])
-
-nn_model.compile(
-    optimizer='adam',
-    loss='sparse_categorical_crossentropy',
-    metrics=['accuracy']
-)
-
-# Train the neural network
-print("\nTraining neural network...")
-history = nn_model.fit(
-    X_scaled, y,
-    epochs=50,
-    batch_size=32,
-    validation_split=0.2,
-    verbose=0
-)
-
-# Evaluate
-train_accuracy = nn_model.evaluate(X_scaled, y, verbose=0)[1]
-print(f"\nNeural Network Accuracy: {train_accuracy:.4f} ({train_accuracy*100:.2f}%)")
-
-# Compare with Random Forest
-rf_accuracy = model.score(X_scaled, y)
-print(f"Random Forest Accuracy: {rf_accuracy:.4f} ({rf_accuracy*100:.2f}%)")
-
-# Save the model in TensorFlow.js format
-print("\nSaving model in TensorFlow.js format...")
-tfjs.converters.save_keras_model(nn_model, 'tfjs_model')
-
-print("\n✓ Model saved to 'tfjs_model' directory")
-print("\nFiles created:")
-print("  - tfjs_model/model.json")
-print("  - tfjs_model/group1-shard1of1.bin")
-print("  - scaler_params.json")
-print("\n✓ Model is ready for browser deployment!")
+
+from model_runtime import load_model
+from model_store import file_version
+
+MODEL_PATH = 'purchase_model.npz'
+OUTPUT_PATH = 'browser_model.json'
+DATA_PATH = 'storepurchasedata_large.csv'
+FEATURES = ['Age', 'Salary']
+
+FORMAT_NAME = 'grid-table'
+FORMAT_VERSION = 1
+
+
+def cell_representatives(boundaries):
+    """One raw input value inside each cell along a feature"""
+    boundaries = np.asarray(boundaries, dtype=np.float64)
+    if len(boundaries) == 0:
+        return np.zeros(1)
+    # Cell k holds boundaries[k-1] < x <= boundaries[k]; the last is open
+    return np.append(boundaries, np.nextafter(boundaries[-1], np.inf))
+
+
+def forest_grid(model):
+    """
+    Score the forest once per cell of its split grid.
+
+    Returns:
+    --------
+    boundaries : list of np.ndarray
+        Raw split points per feature
+    proba : np.ndarray, shape (n_age_cells, n_salary_cells)
+        Purchase probability in each cell
+    """
+    if model.n_features_in_ != 2 or model.meta.get('input') != 'raw':
+        raise ValueError("A grid table needs a two-feature model that takes raw inputs; "
+                         "run 'python export_model.py' without --scaled")
+    boundaries = [np.asarray(t, dtype=np.float64) for t in model.thresholds]
+    age, salary = (cell_representatives(b) for b in boundaries)
+    grid = np.stack(np.meshgrid(age, salary, indexing='ij'), axis=-1).reshape(-1, 2)
+    proba = model.predict_proba(grid)[:, 1].reshape(len(age), len(salary))
+    return boundaries, proba
+
+
+def choose_levels(proba, n_trees):
+    """Quantization steps for the stored probabilities"""
+    # Forests of pure leaves only produce multiples of 1/n_trees
+    scaled = proba * n_trees
+    if np.allclose(scaled, np.round(scaled), rtol=0, atol=1e-9):
+        return n_trees
+    return 1000
+
+
+def _merge_error(lo, hi, levels):
+    """Worst error of each cell if stored as its quantized midrange"""
+    value = np.round((lo + hi) / 2 * levels) / levels
+    return np.maximum(value - lo, hi - value)
+
+
+def coarsen(boundaries, proba, levels, max_error=0.0):
+    """
+    Remove split points while the table stays within max_error.
+
+    Each step merges the pair of neighbouring rows or columns that adds the
+    least error; merged cells keep the range of forest probabilities they
+    cover, so the error is exact rather than estimated.
+
+    Returns:
+    --------
+    boundaries : list of np.ndarray
+        Remaining split points per feature
+    table : np.ndarray of int
+        Stored probability of each cell, in units of 1/levels
+    error : float
+        Largest absolute probability error over all inputs
+    """
+    bounds = [list(b) for b in boundaries]
+    lo = proba.copy()
+    hi = proba.copy()
+    tolerance = max_error + 1e-9
+
+    while True:
+        best = None
+        for axis in (0, 1):
+            a_lo = lo if axis == 0 else lo.T
+            a_hi = hi if axis == 0 else hi.T
+            if len(a_lo) < 2:
+                continue
+            cost = _merge_error(np.minimum(a_lo[:-1], a_lo[1:]),
+                                np.maximum(a_hi[:-1], a_hi[1:]), levels).max(axis=1)
+            k = int(np.argmin(cost))
+            if best is None or cost[k] < best[0]:
+                best = (cost[k], axis, k)
+        if best is None or best[0] > tolerance:
+            break
+
+        _, axis, k = best
+        a_lo = lo if axis == 0 else lo.T
+        a_hi = hi if axis == 0 else hi.T
+        merged_lo = np.minimum(a_lo[k], a_lo[k + 1])
+        merged_hi = np.maximum(a_hi[k], a_hi[k + 1])
+        a_lo = np.delete(a_lo, k + 1, axis=0)
+        a_hi = np.delete(a_hi, k + 1, axis=0)
+        a_lo[k] = merged_lo
+        a_hi[k] = merged_hi
+        lo, hi = (a_lo, a_hi) if axis == 0 else (a_lo.T, a_hi.T)
+        del bounds[axis][k]
+
+    table = np.round((lo + hi) / 2 * levels).astype(int)
+    error = float(_merge_error(lo, hi, levels).max())
+    return [np.asarray(b) for b in bounds], table, error
+
+
+def build_browser_model(model, max_error=0.0, model_version=None):
+    """
+    Build the JSON-serializable browser model for a compact forest.
+
+    Parameters:
+    -----------
+    model : CompactForest
+        Forest with the scaler folded in (raw inputs)
+    max_error : float
+        Largest allowed absolute error in the purchase probability
+    model_version : str, optional
+        Version of the serving model the table was built from
+
+    Returns:
+    --------
+    browser_model : dict
+    """
+    boundaries, proba = forest_grid(model)
+    levels = choose_levels(proba, model.n_estimators)
+    boundaries, table, error = coarsen(boundaries, proba, levels, max_error)
+    return {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'model_version': model_version,
+        'features': FEATURES,
+        'levels': levels,
+        'max_error': round(error, 6),
+        # Floats are written with repr, which JavaScript parses back to the
+        # same doubles, so cell lookups match the server bit for bit.
+        'boundaries': [b.tolist() for b in boundaries],
+        'table': table.tolist(),
+    }
+
+
+def table_predict_proba(browser_model, X):
+    """Score raw inputs with a browser model, exactly as index_tfjs.html does"""
+    X = np.asarray(X, dtype=np.float64)
+    rows = np.searchsorted(browser_model['boundaries'][0], X[:, 0], side='left')
+    cols = np.searchsorted(browser_model['boundaries'][1], X[:, 1], side='left')
+    purchase = np.asarray(browser_model['table'])[rows, cols] / browser_model['levels']
+    return np.column_stack([1 - purchase, purchase])
+
+
+def serialize(browser_model):
+    return json.dumps(browser_model, separators=(',', ':'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the browser model')
+    parser.add_argument('--max-error', type=float, default=0.0,
+                        help='largest allowed purchase probability error (default 0: exact)')
+    parser.add_argument('--max-bytes', type=int, default=None,
+                        help='fail if the artifact is larger than this')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BROWSER MODEL EXPORT")
+    print("=" * 70)
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"Error: {MODEL_PATH} not found. Run 'export_model.py' first.")
+        sys.exit(1)
+
+    model = load_model(MODEL_PATH)
+    version = file_version(MODEL_PATH)
+    boundaries, proba = forest_grid(model)
+    print(f"Serving model {version}: {model.n_estimators} trees, "
+          f"{len(boundaries[0])} age and {len(boundaries[1])} salary split points")
+
+    browser_model = build_browser_model(model, args.max_error, version)
+    body = serialize(browser_model)
+
+    # Agreement with the serving model on the training data
+    X = pd.read_csv(DATA_PATH)[FEATURES].values.astype(np.float64)
+    server = model.predict_proba(X)
+    browser = table_predict_proba(browser_model, X)
+    agreement = np.mean((browser[:, 1] > browser[:, 0]) == (server[:, 1] > server[:, 0]))
+    mean_delta = np.mean(np.abs(browser[:, 1] - server[:, 1]))
+
+    print("\n" + "-" * 70)
+    print("EXPORT REPORT")
+    print("-" * 70)
+    print(f"{'Grid cells (exact forest)':<36} {proba.size:>10,}")
+    print(f"{'Table cells (exported)':<36} {np.size(browser_model['table']):>10,}")
+    print(f"{'Probability levels':<36} {browser_model['levels']:>10}")
+    print(f"{'Max probability error (all inputs)':<36} {browser_model['max_error']:>10.4f}")
+    print(f"{'Mean probability error (training)':<36} {mean_delta:>10.4f}")
+    print(f"{'Label agreement (training)':<36} {agreement:>10.2%}")
+    print(f"{'Artifact size':<36} {len(body):>10,} bytes")
+    print("-" * 70)
+
+    if args.max_bytes is not None and len(body) > args.max_bytes:
+        print(f"\n✗ {len(body):,} bytes exceeds the {args.max_bytes:,} byte budget; "
+              f"allow a larger --max-error")
+        sys.exit(1)
+
+    tmp_path = OUTPUT_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(body)
+    os.replace(tmp_path, OUTPUT_PATH)
+    print(f"\n✓ Browser model saved as '{OUTPUT_PATH}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Duplicate Row Collapsing
+
+Training extracts repeat the same (Age, Salary, Purchased) rows many
+times. Collapsing them into unique rows with counts, and passing the
+counts as sample_weight, gives every estimator in train_model.py the same
+objective as the full data on far fewer rows:
+- Logistic Regression and the SVC minimize a sum of per-row losses, so a
+  row with weight k counts exactly like k copies; the SVC's kernel width
+  must come from the full data (scale_gamma), not from the unique rows
+- tree impurities are computed from weighted counts, so the Decision
+  Tree finds the same splits
+- the Random Forest draws its bootstrap samples from the unique rows and
+  scales them by the counts, so each row keeps the same expected weight;
+  the trees differ from a run on the full data, as between two seeds
+
+Usage:
+    python dedupe.py [--data storepurchasedata_large.csv]
+
+Reports the compression ratio and, for each estimator, the fit time on
+the full and the collapsed training data and how often the two models
+agree on the test set. Set TRAINING_DEDUPE=1 to train with collapsed rows
+in train_model.py.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+DATA_PATH = 'storepurchasedata_large.csv'
+
+
+def collapse_duplicates(X, y):
+    """
+    Unique (features, label) rows and how often each occurs.
+
+    Parameters:
+    -----------
+    X : np.ndarray, shape (n_samples, n_features)
+    y : np.ndarray, shape (n_samples,)
+
+    Returns:
+    --------
+    X_unique : np.ndarray, shape (n_unique, n_features)
+    y_unique : np.ndarray, shape (n_unique,)
+    counts : np.ndarray, shape (n_unique,)
+        Pass as sample_weight
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    rows = np.column_stack([X, y]).astype(np.float64)
+    unique, first, counts = np.unique(rows, axis=0, return_index=True, return_counts=True)
+    return X[first], y[first], counts
+
+
+def scale_gamma(X, sample_weight=None):
+    """
+    RBF kernel width gamma='scale' would pick on the expanded rows.
+
+    SVC computes 1 / (n_features * X.var()) from the rows it is given;
+    on collapsed rows that variance ignores the counts and the kernel
+    changes. Weighting each row by its count gives the full-data value.
+
+    Parameters:
+    -----------
+    X : np.ndarray, shape (n_samples, n_features)
+    sample_weight : np.ndarray, shape (n_samples,), optional
+        Row counts, as returned by collapse_duplicates
+
+    Returns:
+    --------
+    gamma : float
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if sample_weight is None:
+        sample_weight = np.ones(len(X))
+    weights = np.repeat(np.asarray(sample_weight, dtype=np.float64), X.shape[1])
+    values = X.ravel()
+    mean = np.average(values, weights=weights)
+    variance = np.average((values - mean) ** 2, weights=weights)
+    return 1.0 / (X.shape[1] * variance) if variance > 0 else 1.0
+
+
+def timed_fit(model, X, y, sample_weight=None):
+    """Fit model and return the seconds it took"""
+    started = time.perf_counter()
+    model.fit(X, y, sample_weight=sample_weight)
+    return time.perf_counter() - started
+
+
+def compare_training(models, X_train, y_train, X_test):
+    """
+    Fit each model on the full and on the collapsed training data.
+
+    Parameters:
+    -----------
+    models : dict of str -> callable
+        Name to a function returning a fresh, unfitted estimator
+    X_train, y_train : training data (already scaled)
+    X_test : rows the two fits are compared on
+
+    Returns:
+    --------
+    report : dict
+        'rows', 'unique_rows', 'compression' and per-model 'models' entries
+        with full_seconds, collapsed_seconds, speedup and test_agreement
+    """
+    X_unique, y_unique, counts = collapse_duplicates(X_train, y_train)
+    report = {
+        'rows': len(X_train),
+        'unique_rows': len(X_unique),
+        'compression': len(X_train) / max(len(X_unique), 1),
+        'models': {},
+    }
+    for name, make_model in models.items():
+        full, collapsed = make_model(), make_model()
+        full_seconds = timed_fit(full, X_train, y_train)
+        collapsed_seconds = timed_fit(collapsed, X_unique, y_unique, counts)
+        report['models'][name] = {
+            'full_seconds': full_seconds,
+            'collapsed_seconds': collapsed_seconds,
+            'speedup': full_seconds / max(collapsed_seconds, 1e-9),
+            'test_agreement': float(np.mean(full.predict(X_test) == collapsed.predict(X_test))),
+        }
+    return report
+
+
+def default_models(gamma='scale'):
+    """
+    The estimators train_model.py compares.
+
+    Pass the full-data gamma (scale_gamma) so the SVC fitted on collapsed
+    rows uses the same kernel as the one fitted on every row.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.svm import SVC
+    from sklearn.tree import DecisionTreeClassifier
+
+    return {
+        'Logistic Regression': lambda: LogisticRegression(random_state=42, max_iter=1000),
+        'Decision Tree': lambda: DecisionTreeClassifier(random_state=42),
+        'Random Forest': lambda: RandomForestClassifier(n_estimators=100, random_state=42),
+        'SVM (RBF Kernel)': lambda: SVC(kernel='rbf', gamma=gamma, random_state=42),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare training on full and collapsed rows')
+    parser.add_argument('--data', default=DATA_PATH, help='CSV with Age, Salary, Purchased')
+    args = parser.parse_args()
+
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    df = pd.read_csv(args.data)
+    X = df[['Age', 'Salary']].values
+    y = df['Purchased'].values
+    X_train, X_test, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+    scaler = StandardScaler().fit(X_train)
+
+    print("=" * 78)
+    print("DUPLICATE ROW COLLAPSING")
+    print("=" * 78)
+    X_train_scaled = scaler.transform(X_train)
+    report = compare_training(default_models(gamma=scale_gamma(X_train_scaled)), X_train_scaled,
+                              y_train, scaler.transform(X_test))
+    print(f"Training rows: {report['rows']:,}   Unique rows: {report['unique_rows']:,}   "
+          f"Compression: {report['compression']:.1f}x")
+
+    print("\n" + "-" * 78)
+    print(f"{'Model':<22} {'Full fit':>12} {'Collapsed fit':>15} {'Speedup':>9} {'Test agreement':>16}")
+    print("-" * 78)
+    for name, row in report['models'].items():
+        print(f"{name:<22} {row['full_seconds'] * 1000:>9.1f} ms {row['collapsed_seconds'] * 1000:>12.1f} ms"
+              f" {row['speedup']:>8.1f}x {row['test_agreement']:>15.1%}")
+    print("-" * 78)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,10 @@
-import joblib
 import numpy as np
 import pandas as pd
 
-# Load the model and scaler
-model = joblib.load('purchase_model.pkl')
-scaler = joblib.load('scaler.pkl')
+from model_runtime import load_model
+
+# Load the serving model (scaler is folded into it)
+model = load_model('purchase_model.npz')
 
 print("=" * 80)
 print("CUSTOMER PURCHASE PREDICTION - BATCH DEMO")
@@ -32,18 +32,15 @@ print("-" * 80)
 print(f"{'Age':<6} {'Salary':<12} {'Description':<30} {'Prediction':<12} {'Confidence'}")
 print("-" * 80)
 
-for case in test_cases:
+# Score every profile in one vectorized call
+input_data = np.array([[case['age'], case['salary']] for case in test_cases])
+probabilities = model.predict_proba(input_data)
+predictions = model.classes_[np.argmax(probabilities, axis=1)]
+
+for case, probability, prediction in zip(test_cases, probabilities, predictions):
     age = case['age']
     salary = case['salary']
     desc = case['description']
-    
-    # Prepare input
-    input_data = np.array([[age, salary]])
-    input_scaled = scaler.transform(input_data)
-    
-    # Make prediction
-    prediction = model.predict(input_scaled)[0]
-    probability = model.predict_proba(input_scaled)[0]
     confidence = probability[1] if prediction == 1 else probability[0]
     
     # Store result
@@ -78,3 +75,4 @@ print("✓ Higher age + higher salary = stronger purchase likelihood")
 print("✓ Young customers with high salaries show strong purchase intent")
 print("✓ Low salary customers are less likely to purchase regardless of age")
 print("=" * 80)
+print("For whole age × salary ranges and per-age salary thresholds, run sweep.py")
@@ -174,7 +174,8 @@ chmod +x /tmp/build-docker.sh
 echo "Copying files to EC2 instance..."
 scp -i "$EC2_KEY_PATH" -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null \
     Dockerfile requirements.txt lambda_function.py \
-    ../purchase_model.pkl ../scaler.pkl \
+    ../model_runtime.py ../purchase_model.npz \
+    ../drift.py ../drift_reference.json ../validation.py \
     ec2-user@$PUBLIC_IP:/tmp/
 
 scp -i "$EC2_KEY_PATH" -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null \
@@ -185,7 +186,7 @@ echo "Executing Docker build on EC2..."
 ssh -i "$EC2_KEY_PATH" -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null \
     ec2-user@$PUBLIC_IP << 'ENDSSH'
 mkdir -p /home/ec2-user/docker-lambda
-mv /tmp/Dockerfile /tmp/requirements.txt /tmp/lambda_function.py /tmp/purchase_model.pkl /tmp/scaler.pkl /home/ec2-user/docker-lambda/
+mv /tmp/Dockerfile /tmp/requirements.txt /tmp/lambda_function.py /tmp/model_runtime.py /tmp/purchase_model.npz /tmp/drift.py /tmp/drift_reference.json /tmp/validation.py /home/ec2-user/docker-lambda/
 cd /home/ec2-user
 chmod +x /tmp/build-docker.sh
 /tmp/build-docker.sh
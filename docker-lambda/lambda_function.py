@@ -1,22 +1,150 @@
 import json
-import joblib
 import numpy as np
 import os
+import time
 
-# Load models at cold start (outside handler for reuse)
-MODEL_PATH = 'purchase_model.pkl'
-SCALER_PATH = 'scaler.pkl'
+from drift import DriftMonitor, load_reference
+from model_runtime import load_model
+from validation import validate_customers
+
+# Load model at cold start (outside handler for reuse).
+# The scaler is folded into the exported artifact.
+MODEL_PATH = 'purchase_model.npz'
 
 print(f"Loading model from {MODEL_PATH}")
-model = joblib.load(MODEL_PATH)
-print(f"Loading scaler from {SCALER_PATH}")
-scaler = joblib.load(SCALER_PATH)
-print("Models loaded successfully")
+model = load_model(MODEL_PATH)
+print("Model loaded successfully")
+
+# Sketch of the scored age/salary distributions. Each container prints
+# its sketch to CloudWatch every DRIFT_EMIT_SECONDS; the printed sketches
+# from all containers merge with `python drift.py report`.
+DRIFT_REFERENCE_PATH = 'drift_reference.json'
+DRIFT_EMIT_SECONDS = float(os.environ.get('DRIFT_EMIT_SECONDS', '300'))
+
+drift = None
+try:
+    drift = DriftMonitor(load_reference(DRIFT_REFERENCE_PATH))
+except Exception as e:
+    print(f"Drift monitoring disabled: {e}")
+last_drift_emit = time.time()
+
+
+def record_drift(rows):
+    """Add an invocation's scored rows and emit the sketch when due"""
+    global last_drift_emit
+    if drift is None or len(rows) == 0:
+        return
+    drift.update(np.array(rows, dtype=np.float64))
+    if time.time() - last_drift_emit >= DRIFT_EMIT_SECONDS:
+        print(json.dumps({'drift_sketch': drift.snapshot()}))
+        drift.reset()
+        last_drift_emit = time.time()
+
+
+def score_customers(customers):
+    """
+    Validate customers and score the valid ones with one model call.
+
+    Returns:
+    --------
+    results : list of dict
+        One prediction or error object per customer, in order
+    failed : np.ndarray of bool
+        Which customers were invalid
+    """
+    validated = validate_customers(customers)
+    results = [None] * len(customers)
+    if len(validated.indices):
+        probabilities = model.predict_proba(validated.features)
+        predictions = model.classes_[np.argmax(probabilities, axis=1)]
+        for idx, prediction, probability in zip(validated.indices.tolist(),
+                                                predictions.tolist(),
+                                                probabilities[:, 1].tolist()):
+            results[idx] = {
+                'age': customers[idx]['age'],
+                'salary': customers[idx]['salary'],
+                'will_purchase': bool(prediction),
+                'confidence': round(probability * 100, 2)
+            }
+    failed = np.zeros(len(customers), dtype=bool)
+    for error in validated.errors:
+        results[error['index']] = {
+            'error': error['message'],
+            'customer': error['data']
+        }
+        failed[error['index']] = True
+    record_drift(validated.features)
+    return results, failed
+
+
+def handle_records(records):
+    """
+    Score a batch of event-source records (SQS-style) in one model call.
+
+    Each record's body holds one customer or a {"customers": [...]} batch.
+    The customers of all records are validated and scored together, then
+    split back per record. Records whose body cannot be parsed or that
+    hold an invalid customer are reported in batchItemFailures, so with
+    ReportBatchItemFailures enabled only those messages are retried (and
+    eventually sent to the dead-letter queue); the rest are deleted.
+
+    Returns:
+    --------
+    response : dict
+        batchItemFailures, plus per-record results
+    """
+    customers = []
+    spans = []
+    parse_errors = {}
+    for i, record in enumerate(records):
+        start = len(customers)
+        try:
+            body = record.get('body')
+            body = json.loads(body) if isinstance(body, str) else body
+            if not isinstance(body, dict):
+                raise ValueError('Record body must be a JSON object')
+            batch = body['customers'] if 'customers' in body else [body]
+            if not isinstance(batch, list) or not batch:
+                raise ValueError('customers must be a non-empty array')
+            customers.extend(batch)
+        except (TypeError, ValueError, AttributeError) as e:
+            parse_errors[i] = str(e)
+        spans.append((start, len(customers)))
+
+    try:
+        scored, failed = score_customers(customers)
+    except Exception as e:
+        # Nothing was scored; let the event source retry the whole batch
+        print(f"Error: {str(e)}")
+        return {'batchItemFailures': [{'itemIdentifier': record.get('messageId')}
+                                      for record in records]}
+
+    results = []
+    failures = []
+    for i, (record, (start, end)) in enumerate(zip(records, spans)):
+        result = {'messageId': record.get('messageId')}
+        if i in parse_errors:
+            result['error'] = parse_errors[i]
+        else:
+            result['predictions'] = scored[start:end]
+            result['count'] = end - start
+        if i in parse_errors or failed[start:end].any():
+            failures.append({'itemIdentifier': record.get('messageId')})
+        results.append(result)
+    return {'batchItemFailures': failures, 'results': results}
+
 
 def lambda_handler(event, context):
     """
     AWS Lambda handler for customer purchase predictions
+
+    Accepts API Gateway-style events (a single customer or a "customers"
+    batch in `body`) and batched event-source payloads with a `Records`
+    list, which are scored in one pass with partial batch failures.
     """
+    if isinstance(event.get('Records'), list):
+        return handle_records(event['Records'])
+
     try:
         # Parse request body
         if isinstance(event.get('body'), str):
@@ -26,32 +154,7 @@ def lambda_handler(event, context):
         
         # Handle batch predictions
         if 'customers' in body:
-            customers = body['customers']
-            predictions = []
-            
-            for customer in customers:
-                age = customer.get('age')
-                salary = customer.get('salary')
-                
-                if age is None or salary is None:
-                    predictions.append({
-                        'error': 'Missing age or salary',
-                        'customer': customer
-                    })
-                    continue
-                
-                # Make prediction
-                features = np.array([[age, salary]])
-                features_scaled = scaler.transform(features)
-                prediction = int(model.predict(features_scaled)[0])
-                probability = float(model.predict_proba(features_scaled)[0][1])
-                
-                predictions.append({
-                    'age': age,
-                    'salary': salary,
-                    'will_purchase': bool(prediction),
-                    'confidence': round(probability * 100, 2)
-                })
+            predictions, _ = score_customers(body['customers'])
             
             return {
                 'statusCode': 200,
@@ -85,9 +188,10 @@ def lambda_handler(event, context):
         
         # Make prediction
         features = np.array([[age, salary]])
-        features_scaled = scaler.transform(features)
-        prediction = int(model.predict(features_scaled)[0])
-        probability = float(model.predict_proba(features_scaled)[0][1])
+        probabilities = model.predict_proba(features)[0]
+        prediction = int(model.classes_[np.argmax(probabilities)])
+        probability = float(probabilities[1])
+        record_drift([(age, salary)])
         
         result = {
             'age': age,
@@ -0,0 +1,135 @@
+"""
+Local Lambda Harness
+
+Invokes lambda_function.lambda_handler in-process with event files, with
+no AWS service, container or emulator involved:
+
+    python docker-lambda/local_invoke.py docker-lambda/events/sqs_batch.json
+
+Benchmark queue-driven scoring: one invocation per SQS message (the old
+way) against one invocation with all messages as a Records batch:
+
+    python docker-lambda/local_invoke.py --benchmark [--records 100] [--customers 1]
+
+Times cover the handler only; the per-invocation overhead of Lambda
+itself comes on top of every call of the first method.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+LAMBDA_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(LAMBDA_DIR)
+EVENT_PATH = os.path.join(LAMBDA_DIR, 'events', 'sqs_batch.json')
+
+
+def load_handler():
+    """Import lambda_function the way the image lays it out (artifacts in the working directory)"""
+    os.chdir(ROOT)
+    sys.path[:0] = [LAMBDA_DIR, ROOT]
+    import lambda_function
+    return lambda_function.lambda_handler
+
+
+def sqs_event(n_records, customers_per_record=1, seed=0):
+    """
+    Synthetic SQS event with n_records messages.
+
+    Returns:
+    --------
+    event : dict
+        {"Records": [...]}, each body a single customer or a "customers" batch
+    """
+    rng = np.random.default_rng(seed)
+    records = []
+    for i in range(n_records):
+        customers = [{'age': int(age), 'salary': int(salary)}
+                     for age, salary in zip(rng.integers(18, 70, customers_per_record),
+                                            rng.integers(15, 150, customers_per_record) * 1000)]
+        body = customers[0] if customers_per_record == 1 else {'customers': customers}
+        records.append({
+            'messageId': f'msg-{i}',
+            'receiptHandle': f'receipt-handle-{i}',
+            'body': json.dumps(body),
+            'attributes': {'ApproximateReceiveCount': '1'},
+            'messageAttributes': {},
+            'eventSource': 'aws:sqs',
+            'eventSourceARN': 'arn:aws:sqs:us-east-1:123456789012:customer-scoring',
+            'awsRegion': 'us-east-1',
+        })
+    return {'Records': records}
+
+
+def benchmark(handler, event, repeats=5):
+    """
+    Time per-message invocations against one batched invocation.
+
+    Returns:
+    --------
+    timings : dict
+        per_message_ms and batched_ms (best of `repeats`), and speedup
+    """
+    messages = [{'body': record['body']} for record in event['Records']]
+    per_message = np.inf
+    batched = np.inf
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for message in messages:
+            handler(message, None)
+        per_message = min(per_message, time.perf_counter() - started)
+        started = time.perf_counter()
+        handler(event, None)
+        batched = min(batched, time.perf_counter() - started)
+    return {
+        'per_message_ms': per_message * 1000,
+        'batched_ms': batched * 1000,
+        'speedup': per_message / batched,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Invoke the Lambda handler locally')
+    parser.add_argument('events', nargs='*', help='Event JSON files to invoke the handler with')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare per-message and batched invocations')
+    parser.add_argument('--records', type=int, default=100, help='Messages per benchmark batch')
+    parser.add_argument('--customers', type=int, default=1, help='Customers per message')
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(path) for path in args.events]
+    handler = load_handler()
+
+    if not args.benchmark:
+        for path in paths or [EVENT_PATH]:
+            with open(path) as f:
+                event = json.load(f)
+            print(f"\n{os.path.relpath(path, ROOT)}")
+            print(json.dumps(handler(event, None), indent=2))
+        return 0
+
+    print("=" * 70)
+    print("LAMBDA BATCH BENCHMARK")
+    print("=" * 70)
+    print(f"{'Messages':>9} {'Customers':>10} {'Per message':>14} {'Batched':>12} {'Speedup':>9}")
+    print("-" * 70)
+    for n_records in sorted({1, 10, args.records}):
+        event = sqs_event(n_records, args.customers)
+        response = handler(event, None)
+        if response['batchItemFailures']:
+            print(f"Error: {len(response['batchItemFailures'])} records failed")
+            return 1
+        timings = benchmark(handler, event)
+        print(f"{n_records:>9,} {n_records * args.customers:>10,} "
+              f"{timings['per_message_ms']:>11.2f} ms {timings['batched_ms']:>9.2f} ms "
+              f"{timings['speedup']:>8.1f}x")
+    print("-" * 70)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
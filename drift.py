@@ -0,0 +1,378 @@
+"""
+Feature Drift Sketches
+
+Tracks the live age/salary distributions in constant memory and scores
+them against the training data, to tell when the model needs retraining.
+
+Each feature is summarized by a fixed-bin histogram whose bin edges are
+the training data's quantiles, plus two open-ended bins for values below
+and above anything seen in training. Updating a sketch is a searchsorted
+and a bincount per batch; sketches are plain counts, so sketches from
+several shards, workers or Lambda containers merge by adding them.
+
+Drift is reported as the Population Stability Index (PSI) between the live
+and the training bin proportions:
+    PSI < 0.1    stable
+    0.1 - 0.25   moderate drift
+    > 0.25       significant drift, consider retraining
+
+Usage:
+    python drift.py reference                  # rebuild drift_reference.json
+    python drift.py report snap1.json [...]    # merge saved snapshots and score them
+
+A snapshot file may hold a GET /admin/drift response, or Lambda log lines
+with one {"drift_sketch": ...} object per line.
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+import numpy as np
+
+REFERENCE_PATH = 'drift_reference.json'
+DATA_PATH = 'storepurchasedata_large.csv'
+FEATURES = ['Age', 'Salary']
+
+# Independently locked sketch sets DriftMonitor spreads threads over
+DRIFT_SHARDS = 8
+
+FORMAT_NAME = 'drift-reference'
+FORMAT_VERSION = 1
+
+MODERATE_PSI = 0.1
+SIGNIFICANT_PSI = 0.25
+
+
+class FeatureSketch:
+    """
+    Histogram of one feature over fixed bin edges.
+
+    counts[0] holds values below edges[0], counts[-1] values above
+    edges[-1], and counts[i] values in [edges[i-1], edges[i]) with the
+    last inner bin closed on the right.
+    """
+
+    def __init__(self, edges, counts=None, n=0, total=0.0, total_sq=0.0,
+                 minimum=np.inf, maximum=-np.inf):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = (np.zeros(len(self.edges) + 1, dtype=np.int64) if counts is None
+                       else np.asarray(counts, dtype=np.int64).copy())
+        self.n = int(n)
+        self.total = float(total)
+        self.total_sq = float(total_sq)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+
+    def update(self, values):
+        """Add a batch of values"""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        bins = np.searchsorted(self.edges, values, side='right')
+        bins[values == self.edges[-1]] -= 1
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        self.n += len(values)
+        self.total += float(values.sum())
+        self.total_sq += float(np.dot(values, values))
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+
+    def merge(self, other):
+        """Add another sketch with the same edges into this one"""
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge sketches with different bin edges")
+        self.counts += other.counts
+        self.n += other.n
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def copy(self):
+        return FeatureSketch(self.edges, self.counts, self.n, self.total,
+                             self.total_sq, self.minimum, self.maximum)
+
+    def mean(self):
+        return self.total / self.n if self.n else None
+
+    def std(self):
+        if not self.n:
+            return None
+        return float(np.sqrt(max(self.total_sq / self.n - self.mean() ** 2, 0.0)))
+
+    def to_dict(self):
+        return {
+            'edges': self.edges.tolist(),
+            'counts': self.counts.tolist(),
+            'n': self.n,
+            'sum': self.total,
+            'sum_sq': self.total_sq,
+            'min': self.minimum if self.n else None,
+            'max': self.maximum if self.n else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['edges'], data['counts'], data['n'], data['sum'], data['sum_sq'],
+                   np.inf if data['min'] is None else data['min'],
+                   -np.inf if data['max'] is None else data['max'])
+
+
+def quantile_edges(values, bins=20):
+    """Bin edges that split values into (at most) `bins` equally full bins"""
+    return np.unique(np.quantile(np.asarray(values, dtype=np.float64),
+                                 np.linspace(0, 1, bins + 1)))
+
+
+def build_reference(X, features=FEATURES, bins=20):
+    """
+    Reference sketches of the training data.
+
+    Parameters:
+    -----------
+    X : np.ndarray, shape (n_samples, n_features)
+        Raw training features
+    features : list of str
+    bins : int
+        Quantile bins per feature
+
+    Returns:
+    --------
+    reference : dict
+        JSON-serializable; pass to DriftMonitor
+    """
+    X = np.asarray(X, dtype=np.float64)
+    sketches = []
+    for f in range(X.shape[1]):
+        sketch = FeatureSketch(quantile_edges(X[:, f], bins))
+        sketch.update(X[:, f])
+        sketches.append(sketch.to_dict())
+    return {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'features': list(features),
+        'created_at': datetime.now().isoformat(),
+        'sketches': sketches,
+    }
+
+
+def save_reference(X, path=REFERENCE_PATH, features=FEATURES, bins=20):
+    """Build the training reference and write it to path"""
+    reference = build_reference(X, features, bins)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(reference, f)
+    os.replace(tmp_path, path)
+    return reference
+
+
+def load_reference(path=REFERENCE_PATH):
+    with open(path) as f:
+        reference = json.load(f)
+    if reference.get('format') != FORMAT_NAME:
+        raise ValueError(f"{path} is not a drift reference")
+    return reference
+
+
+def psi(live_counts, reference_counts, epsilon=1e-4):
+    """Population Stability Index between two histograms over the same bins"""
+    live = np.asarray(live_counts, dtype=np.float64)
+    ref = np.asarray(reference_counts, dtype=np.float64)
+    live = np.maximum(live / max(live.sum(), 1), epsilon)
+    ref = np.maximum(ref / max(ref.sum(), 1), epsilon)
+    return float(np.sum((live - ref) * np.log(live / ref)))
+
+
+def drift_status(score):
+    if score >= SIGNIFICANT_PSI:
+        return 'significant'
+    if score >= MODERATE_PSI:
+        return 'moderate'
+    return 'stable'
+
+
+def drift_report(reference, live_sketches, min_rows=100):
+    """
+    Score live sketches against the reference.
+
+    Parameters:
+    -----------
+    reference : dict
+        From build_reference / load_reference
+    live_sketches : list of FeatureSketch
+    min_rows : int
+        Below this many live rows the status is 'insufficient_data'
+
+    Returns:
+    --------
+    report : dict
+    """
+    features = {}
+    worst = 0.0
+    for name, ref_data, live in zip(reference['features'], reference['sketches'], live_sketches):
+        ref = FeatureSketch.from_dict(ref_data)
+        score = psi(live.counts, ref.counts) if live.n else None
+        if score is not None and live.n >= min_rows:
+            worst = max(worst, score)
+        features[name] = {
+            'psi': round(score, 4) if score is not None else None,
+            'status': (drift_status(score) if live.n >= min_rows else 'insufficient_data'),
+            'rows': live.n,
+            'live_mean': live.mean(),
+            'reference_mean': ref.mean(),
+            'live_std': live.std(),
+            'reference_std': ref.std(),
+            'live_min': live.minimum if live.n else None,
+            'live_max': live.maximum if live.n else None,
+            'below_training_range': int(live.counts[0]),
+            'above_training_range': int(live.counts[-1]),
+        }
+    rows = live_sketches[0].n if live_sketches else 0
+    return {
+        'rows': rows,
+        'max_psi': round(worst, 4),
+        'status': drift_status(worst) if rows >= min_rows else 'insufficient_data',
+        'features': features,
+    }
+
+
+class DriftMonitor:
+    """
+    Live sketches of the serving traffic.
+
+    Sketches are split into a fixed number of shards, each behind its own
+    lock. Every thread is assigned a shard on its first update, so
+    concurrent updates rarely wait on each other, and memory stays the
+    same however many threads come and go. report() and snapshot() merge
+    the shards on demand.
+
+    Parameters:
+    -----------
+    reference : dict
+        Training reference from load_reference
+    shards : int
+        Number of independently locked sketch sets
+    """
+
+    def __init__(self, reference, shards=DRIFT_SHARDS):
+        self.reference = reference
+        self.features = reference['features']
+        self._edges = [sketch['edges'] for sketch in reference['sketches']]
+        self._shards = [(threading.Lock(), self._new_sketches()) for _ in range(max(1, shards))]
+        self._local = threading.local()
+        self._next_shard = itertools.count()
+        self.started_at = datetime.now().isoformat()
+
+    def _new_sketches(self):
+        return [FeatureSketch(edges) for edges in self._edges]
+
+    def _shard(self):
+        local = self._local
+        if not hasattr(local, 'shard'):
+            local.shard = next(self._next_shard) % len(self._shards)
+        return self._shards[local.shard]
+
+    def update(self, X):
+        """Add a batch of scored rows, shape (n_rows, n_features)"""
+        if not len(X):
+            return
+        X = np.asarray(X, dtype=np.float64)
+        lock, sketches = self._shard()
+        with lock:
+            for f, sketch in enumerate(sketches):
+                sketch.update(X[:, f])
+
+    def merged(self):
+        """One sketch per feature covering every thread"""
+        merged = self._new_sketches()
+        for lock, sketches in self._shards:
+            with lock:
+                copies = [sketch.copy() for sketch in sketches]
+            for total, sketch in zip(merged, copies):
+                total.merge(sketch)
+        return merged
+
+    def snapshot(self):
+        """Mergeable JSON form of the live sketches"""
+        return {
+            'features': self.features,
+            'since': self.started_at,
+            'sketches': [sketch.to_dict() for sketch in self.merged()],
+        }
+
+    def report(self, min_rows=100):
+        report = drift_report(self.reference, self.merged(), min_rows)
+        report['since'] = self.started_at
+        return report
+
+    def reset(self):
+        """Start a new window with empty sketches"""
+        for lock, sketches in self._shards:
+            with lock:
+                sketches[:] = self._new_sketches()
+        self.started_at = datetime.now().isoformat()
+
+
+def merge_snapshots(snapshots):
+    """Combine snapshots from several workers into one list of sketches"""
+    merged = None
+    for snapshot in snapshots:
+        sketches = [FeatureSketch.from_dict(s) for s in snapshot['sketches']]
+        if merged is None:
+            merged = sketches
+        else:
+            for total, sketch in zip(merged, sketches):
+                total.merge(sketch)
+    return merged
+
+
+def read_snapshots(path):
+    """Sketches saved from /admin/drift or printed by the Lambda handler"""
+    with open(path) as f:
+        text = f.read()
+    try:
+        documents = [json.loads(text)]
+    except json.JSONDecodeError:
+        documents = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [doc.get('drift_sketch') or doc.get('sketch') or doc for doc in documents]
+
+
+def _print_report(report):
+    print(f"Rows: {report['rows']:,}   Max PSI: {report['max_psi']}   Status: {report['status']}")
+    for name, feature in report['features'].items():
+        live_mean = feature['live_mean']
+        print(f"  {name:<8} PSI {feature['psi']}  ({feature['status']})  "
+              f"mean {live_mean if live_mean is None else round(live_mean, 1)} "
+              f"vs {round(feature['reference_mean'], 1)} in training, "
+              f"{feature['below_training_range']} below / "
+              f"{feature['above_training_range']} above the training range")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+
+    if command == 'reference':
+        import pandas as pd
+        X = pd.read_csv(DATA_PATH)[FEATURES].values
+        save_reference(X)
+        print(f"✓ Drift reference for {len(X)} training rows saved as '{REFERENCE_PATH}'")
+
+    elif command == 'report' and len(sys.argv) > 2:
+        snapshots = []
+        for path in sys.argv[2:]:
+            snapshots.extend(read_snapshots(path))
+        report = drift_report(load_reference(), merge_snapshots(snapshots))
+        print(f"Merged {len(snapshots)} snapshot(s)")
+        _print_report(report)
+
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
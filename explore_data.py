@@ -1,82 +1,457 @@
+"""
+Data Exploration
+
+    python explore_data.py                   # in-memory overview with plots
+    python explore_data.py --stream [--data big.csv] [--chunk-mb 64] [--workers 4]
+
+The streaming mode profiles CSV extracts that do not fit in memory. The
+file is split into byte ranges of about --chunk-mb each, and worker
+processes parse and summarize the ranges in parallel. Each summary holds
+counts, moments, missing values and fine-grained value counts, and the
+summaries are merged. Peak memory is about one chunk per worker,
+whatever the file size. The profile is written to data_profile.json and
+the plots to data_exploration.png without opening a window.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# Load the dataset
-df = pd.read_csv('storepurchasedata_large.csv')
-
-# Display basic information
-print("=" * 50)
-print("DATASET OVERVIEW")
-print("=" * 50)
-print(f"\nDataset Shape: {df.shape}")
-print(f"Number of rows: {df.shape[0]}")
-print(f"Number of columns: {df.shape[1]}")
-
-print("\n" + "=" * 50)
-print("FIRST FEW ROWS")
-print("=" * 50)
-print(df.head(10))
-
-print("\n" + "=" * 50)
-print("DATASET INFO")
-print("=" * 50)
-print(df.info())
-
-print("\n" + "=" * 50)
-print("STATISTICAL SUMMARY")
-print("=" * 50)
-print(df.describe())
-
-print("\n" + "=" * 50)
-print("MISSING VALUES")
-print("=" * 50)
-print(df.isnull().sum())
-
-print("\n" + "=" * 50)
-print("CLASS DISTRIBUTION")
-print("=" * 50)
-print(df['Purchased'].value_counts())
-print(f"\nPercentage distribution:")
-print(df['Purchased'].value_counts(normalize=True) * 100)
-
-# Create visualizations
-fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-
-# Age distribution by purchase status
-axes[0, 0].hist([df[df['Purchased'] == 0]['Age'], df[df['Purchased'] == 1]['Age']], 
-                bins=20, label=['Not Purchased', 'Purchased'], color=['red', 'green'], alpha=0.7)
-axes[0, 0].set_xlabel('Age')
-axes[0, 0].set_ylabel('Frequency')
-axes[0, 0].set_title('Age Distribution by Purchase Status')
-axes[0, 0].legend()
-
-# Salary distribution by purchase status
-axes[0, 1].hist([df[df['Purchased'] == 0]['Salary'], df[df['Purchased'] == 1]['Salary']], 
-                bins=20, label=['Not Purchased', 'Purchased'], color=['red', 'green'], alpha=0.7)
-axes[0, 1].set_xlabel('Salary')
-axes[0, 1].set_ylabel('Frequency')
-axes[0, 1].set_title('Salary Distribution by Purchase Status')
-axes[0, 1].legend()
-
-# Scatter plot
-scatter = axes[1, 0].scatter(df['Age'], df['Salary'], c=df['Purchased'], 
-                            cmap='RdYlGn', alpha=0.6, edgecolors='black')
-axes[1, 0].set_xlabel('Age')
-axes[1, 0].set_ylabel('Salary')
-axes[1, 0].set_title('Age vs Salary (colored by Purchase Status)')
-plt.colorbar(scatter, ax=axes[1, 0], label='Purchased')
-
-# Purchase status count
-purchase_counts = df['Purchased'].value_counts()
-axes[1, 1].bar(['Not Purchased', 'Purchased'], purchase_counts.values, color=['red', 'green'], alpha=0.7)
-axes[1, 1].set_ylabel('Count')
-axes[1, 1].set_title('Purchase Status Distribution')
-axes[1, 1].set_xlabel('Purchase Status')
-
-plt.tight_layout()
-plt.savefig('data_exploration.png', dpi=300, bbox_inches='tight')
-print("\n" + "=" * 50)
-print("Visualization saved as 'data_exploration.png'")
-print("=" * 50)
-plt.show()
+DATA_PATH = 'storepurchasedata_large.csv'
+FEATURES = ['Age', 'Salary']
+LABEL = 'Purchased'
+# Width of the fine bins kept per chunk; the histograms, percentiles and
+# purchase-rate grid are built from these, so they are exact for data
+# recorded at this resolution (whole years, salaries in thousands)
+RESOLUTION = {'Age': 1, 'Salary': 1000}
+HISTOGRAM_BINS = 20
+GRID_BINS = 20
+
+
+def chunk_ranges(path, chunk_bytes):
+    """
+    Split a CSV into byte ranges that start and end on line boundaries.
+
+    Returns:
+    --------
+    header : bytes
+    ranges : list of (start, end)
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            if f.tell() < size:
+                f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def _moments(values):
+    if not len(values):
+        return {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': None, 'max': None}
+    mean = float(values.mean())
+    return {'count': len(values), 'mean': mean, 'm2': float(((values - mean) ** 2).sum()),
+            'min': float(values.min()), 'max': float(values.max())}
+
+
+def _value_counts(columns):
+    keys, counts = np.unique(np.column_stack(columns), axis=0, return_counts=True)
+    return Counter({tuple(int(k) for k in key): int(c) for key, c in zip(keys, counts)})
+
+
+def profile_frame(df):
+    """Summary of one chunk; summaries of chunks combine with merge_profiles"""
+    labels = pd.to_numeric(df[LABEL], errors='coerce')
+    label_keys = labels.fillna(-1).astype(np.int64).to_numpy()
+
+    partial = {'rows': len(df), 'columns': {}, 'histograms': {},
+               'classes': Counter(labels.dropna().astype(np.int64).tolist())}
+    fine = {}
+    for name in FEATURES:
+        values = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        stats = _moments(values[present])
+        stats['missing'] = int((~present).sum())
+        partial['columns'][name] = stats
+        fine[name] = np.floor(values / RESOLUTION[name])
+        partial['histograms'][name] = _value_counts(
+            [fine[name][present].astype(np.int64), label_keys[present]])
+
+    complete = ~np.isnan(fine[FEATURES[0]]) & ~np.isnan(fine[FEATURES[1]]) & (label_keys >= 0)
+    partial['grid'] = _value_counts([fine[name][complete].astype(np.int64) for name in FEATURES]
+                                    + [label_keys[complete]])
+    return partial
+
+
+def profile_range(path, header, start, end):
+    """Read and summarize the rows between two byte offsets"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return profile_frame(pd.read_csv(io.BytesIO(header + data)))
+
+
+def _merge_moments(a, b):
+    """Chan et al.'s pairwise update of count, mean and sum of squared deviations"""
+    if not a['count']:
+        return dict(b, missing=a['missing'] + b['missing'])
+    if not b['count']:
+        return dict(a, missing=a['missing'] + b['missing'])
+    count = a['count'] + b['count']
+    delta = b['mean'] - a['mean']
+    return {
+        'count': count,
+        'mean': a['mean'] + delta * b['count'] / count,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / count,
+        'min': min(a['min'], b['min']),
+        'max': max(a['max'], b['max']),
+        'missing': a['missing'] + b['missing'],
+    }
+
+
+def merge_profiles(a, b):
+    """Combine the summaries of two disjoint sets of rows"""
+    return {
+        'rows': a['rows'] + b['rows'],
+        'columns': {name: _merge_moments(a['columns'][name], b['columns'][name])
+                    for name in FEATURES},
+        'classes': a['classes'] + b['classes'],
+        'histograms': {name: a['histograms'][name] + b['histograms'][name]
+                       for name in FEATURES},
+        'grid': a['grid'] + b['grid'],
+    }
+
+
+def _fine_values(counter, name, label=None):
+    """Representative values and counts of a column's fine bins"""
+    items = [(key, count) for (key, lab), count in counter.items()
+             if label is None or lab == label]
+    if not items:
+        return np.empty(0), np.empty(0)
+    keys, counts = map(np.array, zip(*sorted(items)))
+    return keys * RESOLUTION[name], counts
+
+
+def _percentiles(values, counts, quantiles=(0.25, 0.5, 0.75)):
+    if not len(values):
+        return {}
+    cumulative = np.cumsum(counts)
+    result = {}
+    for q in quantiles:
+        # Linear interpolation between order statistics, as pandas does
+        position = q * (cumulative[-1] - 1)
+        lower = values[np.searchsorted(cumulative, np.floor(position) + 1)]
+        upper = values[np.searchsorted(cumulative, np.ceil(position) + 1)]
+        result[f'{q:.0%}'] = float(lower + (upper - lower) * (position - np.floor(position)))
+    return result
+
+
+def summarize(partial, source, chunks, workers, chunk_bytes):
+    """Turn a merged partial profile into the JSON summary"""
+    classes = sorted(partial['classes'])
+    labelled = sum(partial['classes'].values())
+    summary = {
+        'source': source,
+        'created_at': datetime.now().isoformat(),
+        'rows': partial['rows'],
+        'chunks': chunks,
+        'workers': workers,
+        'chunk_bytes': chunk_bytes,
+        'columns': {},
+        'class_balance': {
+            str(c): {'count': partial['classes'][c],
+                     'percent': round(100 * partial['classes'][c] / labelled, 4)}
+            for c in classes
+        },
+        'missing': {LABEL: partial['rows'] - labelled},
+        'histograms': {},
+    }
+
+    for name in FEATURES:
+        stats = partial['columns'][name]
+        summary['missing'][name] = stats['missing']
+        values, counts = _fine_values(partial['histograms'][name], name)
+        summary['columns'][name] = {
+            'count': stats['count'],
+            'mean': stats['mean'] if stats['count'] else None,
+            'std': float(np.sqrt(stats['m2'] / (stats['count'] - 1))) if stats['count'] > 1 else None,
+            'min': stats['min'],
+            'max': stats['max'],
+            'percentiles': _percentiles(values, counts),
+            'resolution': RESOLUTION[name],
+        }
+        if not stats['count']:
+            continue
+        edges = np.histogram_bin_edges([stats['min'], stats['max']], bins=HISTOGRAM_BINS)
+        histogram = {'edges': edges.tolist(), 'counts': {}}
+        for c in classes:
+            values, counts = _fine_values(partial['histograms'][name], name, c)
+            histogram['counts'][str(c)] = np.histogram(values, edges, weights=counts)[0] \
+                .astype(np.int64).tolist()
+        summary['histograms'][name] = histogram
+
+    summary['purchase_rate_grid'] = _purchase_rate_grid(partial['grid'], summary['columns'])
+    return summary
+
+
+def _purchase_rate_grid(grid, columns):
+    """Share of buyers per age/salary cell, from the fine joint counts"""
+    if not grid:
+        return None
+    keys = np.array(list(grid.keys()), dtype=np.float64)
+    counts = np.array(list(grid.values()), dtype=np.float64)
+    edges = [np.histogram_bin_edges([columns[name]['min'], columns[name]['max']], bins=GRID_BINS)
+             for name in FEATURES]
+    coords = [keys[:, i] * RESOLUTION[name] for i, name in enumerate(FEATURES)]
+    total = np.histogram2d(*coords, bins=edges, weights=counts)[0]
+    buyers = np.histogram2d(*coords, bins=edges, weights=counts * (keys[:, 2] == 1))[0]
+    with np.errstate(invalid='ignore'):
+        rate = np.where(total > 0, buyers / np.maximum(total, 1), np.nan)
+    return {
+        'age_edges': edges[0].tolist(),
+        'salary_edges': edges[1].tolist(),
+        'counts': total.astype(np.int64).tolist(),
+        'purchase_rate': [[None if np.isnan(r) else round(float(r), 4) for r in row] for row in rate],
+    }
+
+
+def profile_csv(path, chunk_bytes=64 * 1024 * 1024, workers=None):
+    """
+    Profile a CSV in one chunked, parallel pass.
+
+    Parameters:
+    -----------
+    path : str
+    chunk_bytes : int
+        Approximate bytes parsed at a time by each worker
+    workers : int, optional
+        Worker processes (default: CPU count; 1 profiles in this process)
+
+    Returns:
+    --------
+    summary : dict
+        JSON-serializable profile
+    """
+    workers = workers or os.cpu_count() or 1
+    header, ranges = chunk_ranges(path, chunk_bytes)
+    partial = profile_frame(pd.read_csv(io.BytesIO(header)))
+    if workers == 1:
+        results = (profile_range(path, header, start, end) for start, end in ranges)
+        for result in results:
+            partial = merge_profiles(partial, result)
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(profile_range, path, header, start, end)
+                       for start, end in ranges]
+            for future in futures:
+                partial = merge_profiles(partial, future.result())
+    return summarize(partial, path, len(ranges), workers, chunk_bytes)
+
+
+def print_profile(summary):
+    print("=" * 50)
+    print("DATASET OVERVIEW (streamed)")
+    print("=" * 50)
+    print(f"\nSource: {summary['source']}")
+    print(f"Number of rows: {summary['rows']:,}")
+    print(f"Chunks: {summary['chunks']} of ~{summary['chunk_bytes'] / 1024 / 1024:g} MB "
+          f"on {summary['workers']} worker(s)")
+
+    print("\n" + "=" * 50)
+    print("STATISTICAL SUMMARY")
+    print("=" * 50)
+    for name, stats in summary['columns'].items():
+        percentiles = ', '.join(f"{q} {v:,.0f}" for q, v in stats['percentiles'].items())
+        if stats['count']:
+            print(f"{name:<8} count {stats['count']:,}  mean {stats['mean']:,.2f}  "
+                  f"std {stats['std'] or 0:,.2f}  min {stats['min']:,.0f}  "
+                  f"max {stats['max']:,.0f}  ({percentiles})")
+        else:
+            print(f"{name:<8} no values")
+
+    print("\n" + "=" * 50)
+    print("MISSING VALUES")
+    print("=" * 50)
+    for name, missing in summary['missing'].items():
+        print(f"{name:<10} {missing:,}")
+
+    print("\n" + "=" * 50)
+    print("CLASS DISTRIBUTION")
+    print("=" * 50)
+    for label, balance in summary['class_balance'].items():
+        print(f"{label}: {balance['count']:,} ({balance['percent']:.2f}%)")
+
+
+def plot_profile(summary, path):
+    """Histograms, purchase-rate grid and class counts, saved without a window"""
+    plt.switch_backend('Agg')
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+
+    for ax, name in zip(axes[0], FEATURES):
+        histogram = summary['histograms'].get(name)
+        if histogram:
+            edges = np.array(histogram['edges'])
+            centers = (edges[:-1] + edges[1:]) / 2
+            counts = [histogram['counts'].get(c, [0] * len(centers)) for c in ('0', '1')]
+            ax.hist([centers, centers], bins=edges, weights=counts,
+                    label=['Not Purchased', 'Purchased'], color=['red', 'green'], alpha=0.7)
+            ax.legend()
+        ax.set_xlabel(name)
+        ax.set_ylabel('Frequency')
+        ax.set_title(f'{name} Distribution by Purchase Status')
+
+    grid = summary['purchase_rate_grid']
+    if grid:
+        rate = np.array(grid['purchase_rate'], dtype=np.float64)
+        mesh = axes[1, 0].pcolormesh(grid['age_edges'], grid['salary_edges'], rate.T,
+                                     cmap='RdYlGn', vmin=0, vmax=1)
+        plt.colorbar(mesh, ax=axes[1, 0], label='Purchase rate')
+    axes[1, 0].set_xlabel('Age')
+    axes[1, 0].set_ylabel('Salary')
+    axes[1, 0].set_title('Purchase Rate by Age and Salary')
+
+    balance = summary['class_balance']
+    axes[1, 1].bar(['Not Purchased', 'Purchased'],
+                   [balance.get(c, {'count': 0})['count'] for c in ('0', '1')],
+                   color=['red', 'green'], alpha=0.7)
+    axes[1, 1].set_ylabel('Count')
+    axes[1, 1].set_title('Purchase Status Distribution')
+    axes[1, 1].set_xlabel('Purchase Status')
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+def explore(path=DATA_PATH):
+    """In-memory overview of a CSV that fits in memory; shows the plots"""
+    # Load the dataset
+    df = pd.read_csv(path)
+
+    # Display basic information
+    print("=" * 50)
+    print("DATASET OVERVIEW")
+    print("=" * 50)
+    print(f"\nDataset Shape: {df.shape}")
+    print(f"Number of rows: {df.shape[0]}")
+    print(f"Number of columns: {df.shape[1]}")
+
+    print("\n" + "=" * 50)
+    print("FIRST FEW ROWS")
+    print("=" * 50)
+    print(df.head(10))
+
+    print("\n" + "=" * 50)
+    print("DATASET INFO")
+    print("=" * 50)
+    print(df.info())
+
+    print("\n" + "=" * 50)
+    print("STATISTICAL SUMMARY")
+    print("=" * 50)
+    print(df.describe())
+
+    print("\n" + "=" * 50)
+    print("MISSING VALUES")
+    print("=" * 50)
+    print(df.isnull().sum())
+
+    print("\n" + "=" * 50)
+    print("CLASS DISTRIBUTION")
+    print("=" * 50)
+    print(df['Purchased'].value_counts())
+    print(f"\nPercentage distribution:")
+    print(df['Purchased'].value_counts(normalize=True) * 100)
+
+    # Create visualizations
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+
+    # Age distribution by purchase status
+    axes[0, 0].hist([df[df['Purchased'] == 0]['Age'], df[df['Purchased'] == 1]['Age']], 
+                    bins=20, label=['Not Purchased', 'Purchased'], color=['red', 'green'], alpha=0.7)
+    axes[0, 0].set_xlabel('Age')
+    axes[0, 0].set_ylabel('Frequency')
+    axes[0, 0].set_title('Age Distribution by Purchase Status')
+    axes[0, 0].legend()
+
+    # Salary distribution by purchase status
+    axes[0, 1].hist([df[df['Purchased'] == 0]['Salary'], df[df['Purchased'] == 1]['Salary']], 
+                    bins=20, label=['Not Purchased', 'Purchased'], color=['red', 'green'], alpha=0.7)
+    axes[0, 1].set_xlabel('Salary')
+    axes[0, 1].set_ylabel('Frequency')
+    axes[0, 1].set_title('Salary Distribution by Purchase Status')
+    axes[0, 1].legend()
+
+    # Scatter plot
+    scatter = axes[1, 0].scatter(df['Age'], df['Salary'], c=df['Purchased'], 
+                                cmap='RdYlGn', alpha=0.6, edgecolors='black')
+    axes[1, 0].set_xlabel('Age')
+    axes[1, 0].set_ylabel('Salary')
+    axes[1, 0].set_title('Age vs Salary (colored by Purchase Status)')
+    plt.colorbar(scatter, ax=axes[1, 0], label='Purchased')
+
+    # Purchase status count
+    purchase_counts = df['Purchased'].value_counts()
+    axes[1, 1].bar(['Not Purchased', 'Purchased'], purchase_counts.values, color=['red', 'green'], alpha=0.7)
+    axes[1, 1].set_ylabel('Count')
+    axes[1, 1].set_title('Purchase Status Distribution')
+    axes[1, 1].set_xlabel('Purchase Status')
+
+    plt.tight_layout()
+    plt.savefig('data_exploration.png', dpi=300, bbox_inches='tight')
+    print("\n" + "=" * 50)
+    print("Visualization saved as 'data_exploration.png'")
+    print("=" * 50)
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Explore the store purchase data')
+    parser.add_argument('--data', default=DATA_PATH, help='CSV file to profile')
+    parser.add_argument('--stream', action='store_true',
+                        help='Profile in one chunked, parallel pass with bounded memory')
+    parser.add_argument('--chunk-mb', type=float, default=64,
+                        help='Approximate megabytes parsed at a time per worker (--stream)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (--stream, default: CPU count)')
+    parser.add_argument('--output', default='data_profile.json',
+                        help='Where to write the JSON profile (--stream)')
+    parser.add_argument('--plot', default='data_exploration.png',
+                        help='Where to write the plots (--stream)')
+    args = parser.parse_args()
+
+    if not args.stream:
+        explore(args.data)
+        return 0
+
+    summary = profile_csv(args.data, chunk_bytes=int(args.chunk_mb * 1024 * 1024),
+                          workers=args.workers)
+    print_profile(summary)
+    with open(args.output, 'w') as f:
+        json.dump(summary, f, indent=2)
+    plot_profile(summary, args.plot)
+    print("\n" + "=" * 50)
+    print(f"Profile saved as '{args.output}'")
+    print(f"Visualization saved as '{args.plot}'")
+    print("=" * 50)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""
+Export the trained Random Forest to the compact serving format.
+
+Usage:
+    python export_model.py
+
+    python export_model.py --scaled
+
+Reads purchase_model.pkl and scaler.pkl, writes purchase_model.npz, checks
+that the compact model reproduces the forest's predictions on the training
+data exactly and reports how much smaller it is than the pickle, and how
+many trees early-exit label prediction evaluates per row.
+
+By default the StandardScaler is folded into the split points, so the
+artifact scores raw age/salary directly and serving needs one load and one
+call. Pass --scaled to export a model that expects scaled input instead.
+"""
+
+import json
+import os
+import sys
+import joblib
+import numpy as np
+import pandas as pd
+
+from model_runtime import FORMAT_NAME, FORMAT_VERSION, CompactForest, load_model
+
+MODEL_PATH = 'purchase_model.pkl'
+SCALER_PATH = 'scaler.pkl'
+OUTPUT_PATH = 'purchase_model.npz'
+DATA_PATH = 'storepurchasedata_large.csv'
+FEATURES = ['Age', 'Salary']
+
+
+def narrowest_uint(max_value):
+    """Smallest unsigned integer dtype that can hold max_value"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def compact_forest_arrays(model):
+    """
+    Flatten a fitted RandomForestClassifier into compact node arrays.
+
+    Parameters:
+    -----------
+    model : RandomForestClassifier or DecisionTreeClassifier
+        Fitted single-output forest; a single tree is exported as a
+        forest of one
+
+    Returns:
+    --------
+    arrays : dict of str -> np.ndarray
+    meta : dict
+        JSON-serialisable description of the arrays
+    """
+    trees = [estimator.tree_ for estimator in getattr(model, 'estimators_', [model])]
+    n_features = model.n_features_in_
+    n_classes = len(model.classes_)
+
+    feature = np.concatenate([tree.feature for tree in trees])
+    threshold = np.concatenate([tree.threshold for tree in trees])
+    is_leaf = np.concatenate([tree.children_left == -1 for tree in trees])
+
+    # Quantize thresholds to the finite set of split points in use
+    tables = []
+    threshold_index = np.zeros(len(feature), dtype=np.int64)
+    for f in range(n_features):
+        used = ~is_leaf & (feature == f)
+        table = np.unique(threshold[used])
+        threshold_index[used] = np.searchsorted(table, threshold[used])
+        tables.append(table)
+
+    # Leaf probabilities normalised the way DecisionTreeClassifier does,
+    # then deduplicated into one shared table
+    leaf_proba = []
+    for tree in trees:
+        proba = tree.value[:, 0, :n_classes]
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        leaf_proba.append(proba / normalizer)
+    leaf_proba = np.concatenate(leaf_proba)
+    leaf_values, leaf_index = np.unique(leaf_proba[is_leaf], axis=0,
+                                        return_inverse=True)
+    node_leaf_index = np.zeros(len(feature), dtype=np.int64)
+    node_leaf_index[is_leaf] = leaf_index.ravel()
+
+    children_left = np.concatenate([tree.children_left for tree in trees])
+    children_right = np.concatenate([tree.children_right for tree in trees])
+    children_left[is_leaf] = 0
+    children_right[is_leaf] = 0
+    max_nodes = max(tree.node_count for tree in trees)
+    child_dtype = narrowest_uint(max_nodes - 1)
+
+    arrays = {
+        'tree_offsets': np.concatenate(
+            [[0], np.cumsum([tree.node_count for tree in trees])]
+        ).astype(narrowest_uint(len(feature))),
+        'feature': np.where(is_leaf, -1, feature).astype(np.int8),
+        'threshold_index': threshold_index.astype(
+            narrowest_uint(max(len(table) for table in tables))),
+        'left': children_left.astype(child_dtype),
+        'right': children_right.astype(child_dtype),
+        'leaf_index': node_leaf_index.astype(narrowest_uint(len(leaf_values))),
+        'leaf_values': leaf_values,
+        # Internal nodes' class probabilities, for tree-path explanations
+        'node_values': leaf_proba[~is_leaf],
+        'thresholds': np.concatenate(tables),
+        'threshold_offsets': np.concatenate(
+            [[0], np.cumsum([len(table) for table in tables])]
+        ).astype(np.uint32),
+    }
+    meta = {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'n_features': int(n_features),
+        'n_trees': len(trees),
+        'max_depth': int(max(tree.max_depth for tree in trees)),
+        'classes': model.classes_.tolist(),
+        # sklearn evaluates trees on float32 copies of the input
+        'float32_inputs': True,
+        'input': 'scaled',
+    }
+    return arrays, meta
+
+
+def _ordered(x):
+    """Map float64 values to int64 keys with the same ordering"""
+    bits = np.asarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits >= 0, bits, -(bits & np.int64(0x7FFFFFFFFFFFFFFF)))
+
+
+def _from_ordered(keys):
+    """Inverse of _ordered"""
+    keys = np.asarray(keys, dtype=np.int64)
+    bits = np.where(keys >= 0, keys, (-keys) | np.int64(-0x8000000000000000))
+    return bits.view(np.float64)
+
+
+def fold_scaler_thresholds(thresholds, mean, scale):
+    """
+    Translate split points on scaled data into split points on raw data.
+
+    A tree sends x left when float32((x - mean) / scale) <= t. That
+    expression is monotone in x, so for each t there is a largest float64
+    raw value that still goes left. Bisecting on the float64 bit patterns
+    finds it exactly, which makes `raw <= folded` agree with the
+    scaler + tree comparison for every float64 input, not just approximately.
+
+    Parameters:
+    -----------
+    thresholds : np.ndarray
+        Sorted split points for one feature, in scaled units
+    mean, scale : float
+        StandardScaler parameters for that feature
+
+    Returns:
+    --------
+    folded : np.ndarray
+        Split points in raw units
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+
+    def goes_left(raw):
+        with np.errstate(over='ignore'):
+            scaled = ((raw - mean) / scale).astype(np.float32).astype(np.float64)
+        return scaled <= thresholds
+
+    finfo = np.finfo(np.float64)
+    lo = np.full(thresholds.shape, _ordered(finfo.min), dtype=np.int64)
+    hi = np.full(thresholds.shape, _ordered(finfo.max), dtype=np.int64)
+
+    # Invariant: lo goes left, hi goes right (or is the top of the range)
+    while np.any(lo + 1 < hi):
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+        left = goes_left(_from_ordered(mid))
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+    return _from_ordered(np.where(goes_left(_from_ordered(hi)), hi, lo))
+
+
+def fold_scaler(arrays, meta, scaler):
+    """
+    Fold a fitted StandardScaler into compact forest arrays in place.
+
+    Only the per-feature split point tables change; the node arrays keep
+    their threshold indices because folding preserves the ordering.
+    """
+    offsets = arrays['threshold_offsets'].astype(np.intp)
+    thresholds = arrays['thresholds'].copy()
+    for f in range(meta['n_features']):
+        table = slice(offsets[f], offsets[f + 1])
+        thresholds[table] = fold_scaler_thresholds(
+            thresholds[table], scaler.mean_[f], scaler.scale_[f])
+    arrays['thresholds'] = thresholds
+
+    meta['input'] = 'raw'
+    meta['float32_inputs'] = False
+    meta['scaler'] = {
+        'mean': scaler.mean_.tolist(),
+        'scale': scaler.scale_.tolist(),
+    }
+
+
+def early_exit_order(compact, X):
+    """
+    Order in which predict_labels() should evaluate the trees.
+
+    Greedy on the given rows: each step picks the tree that lets the most
+    still-undecided rows stop, breaking ties by how close it brings them to
+    stopping. Trees that move the vote a lot for typical rows, and leave
+    little uncertainty behind, come first.
+
+    Parameters:
+    -----------
+    compact : CompactForest
+        Binary forest to order
+    X : np.ndarray
+        Rows in the compact model's input units (usually the training data)
+
+    Returns:
+    --------
+    order : np.ndarray of tree indices
+    """
+    from model_runtime import EARLY_EXIT_MARGIN
+
+    contributions = compact.leaf_margin[compact.apply(X)]
+    low = compact.tree_margin_min.copy()
+    high = compact.tree_margin_max.copy()
+    remaining = np.ones(compact.n_estimators, dtype=bool)
+    lead = np.zeros(len(X))
+    undecided = np.ones(len(X), dtype=bool)
+    order = []
+    for _ in range(compact.n_estimators):
+        candidates = np.flatnonzero(remaining)
+        rest_low = low[remaining].sum() - low[candidates]
+        rest_high = high[remaining].sum() - high[candidates]
+        new_lead = lead[undecided, np.newaxis] + contributions[undecided][:, candidates]
+        lower = new_lead + rest_low
+        upper = new_lead + rest_high
+        decided = (lower > EARLY_EXIT_MARGIN) | (upper < -EARLY_EXIT_MARGIN)
+        progress = np.maximum(lower, -upper).sum(axis=0)
+        best = candidates[np.lexsort((-progress, -decided.sum(axis=0)))[0]]
+
+        order.append(best)
+        remaining[best] = False
+        lead += contributions[:, best]
+        rest_low, rest_high = low[remaining].sum(), high[remaining].sum()
+        undecided &= ~((lead + rest_low > EARLY_EXIT_MARGIN) |
+                       (lead + rest_high < -EARLY_EXIT_MARGIN))
+    return np.array(order)
+
+
+def export_compact_model(model, path, scaler=None, extra_meta=None, order_data=None):
+    """
+    Write a fitted forest to path as a compressed .npz artifact.
+
+    Parameters:
+    -----------
+    model : RandomForestClassifier or DecisionTreeClassifier
+        Fitted forest to export
+    path : str
+        Destination file
+    scaler : StandardScaler, optional
+        If given, folded into the split points so the artifact takes raw input
+    extra_meta : dict, optional
+        Additional metadata to embed (e.g. feature names)
+    order_data : np.ndarray, optional
+        Rows in the artifact's input units (raw when the scaler is folded);
+        if given, a tree order for early-exit label prediction is chosen
+        on them and stored with the artifact
+
+    Returns:
+    --------
+    meta : dict
+        Metadata written with the artifact
+    """
+    arrays, meta = compact_forest_arrays(model)
+    if scaler is not None:
+        fold_scaler(arrays, meta, scaler)
+    if extra_meta:
+        meta.update(extra_meta)
+    if order_data is not None and len(meta['classes']) == 2:
+        compact = CompactForest(arrays, meta)
+        order = early_exit_order(compact, np.asarray(order_data, dtype=np.float64))
+        arrays['tree_order'] = order.astype(narrowest_uint(meta['n_trees'] - 1))
+        compact.tree_order = order
+        _, trees = compact.predict_labels(order_data, return_trees=True)
+        meta['early_exit'] = {'rows': len(trees), 'mean_trees': round(float(trees.mean()), 2)}
+    write_artifact(path, arrays, meta)
+    return meta
+
+
+def write_artifact(path, arrays, meta):
+    """Write artifact arrays and metadata to path as a compressed .npz"""
+    # Write to a temporary file and rename, so a running server watching
+    # this path never loads a half-written artifact
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp_path, path)
+
+
+def sklearn_node_bytes(model):
+    """In-memory bytes of the sklearn tree arrays, split by whether serving reads them"""
+    used = 0
+    unused = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        used += (tree.children_left.nbytes + tree.children_right.nbytes +
+                 tree.feature.nbytes + tree.threshold.nbytes + tree.value.nbytes)
+        unused += (tree.impurity.nbytes + tree.n_node_samples.nbytes +
+                   tree.weighted_n_node_samples.nbytes)
+    return used, unused
+
+
+def verify_identical(model, compact, X, X_compact=None):
+    """
+    Check the compact model reproduces predict and predict_proba exactly.
+
+    X is what the sklearn forest sees; X_compact is what the compact model
+    sees (the raw features when the scaler has been folded in).
+    """
+    if X_compact is None:
+        X_compact = X
+    expected_proba = model.predict_proba(X)
+    actual_proba = compact.predict_proba(X_compact)
+    if not np.array_equal(expected_proba, actual_proba):
+        mismatches = int(np.sum(np.any(expected_proba != actual_proba, axis=1)))
+        raise AssertionError(f"{mismatches} rows have different probabilities")
+    if not np.array_equal(model.predict(X), compact.predict(X_compact)):
+        raise AssertionError("Predicted labels differ")
+    if not np.array_equal(model.predict(X), compact.predict_labels(X_compact)):
+        raise AssertionError("Early-exit labels differ")
+
+
+def main():
+    print("=" * 70)
+    print("COMPACT MODEL EXPORT")
+    print("=" * 70)
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"Error: {MODEL_PATH} not found. Run 'train_model.py' first.")
+        sys.exit(1)
+
+    fold = '--scaled' not in sys.argv[1:]
+
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+
+    df = pd.read_csv(DATA_PATH)
+    X = df[FEATURES].values
+    X_scaled = scaler.transform(X)
+
+    meta = export_compact_model(model, OUTPUT_PATH,
+                                scaler=scaler if fold else None,
+                                extra_meta={'feature_names': FEATURES},
+                                order_data=X if fold else X_scaled)
+    compact = load_model(OUTPUT_PATH)
+    verify_identical(model, compact, X_scaled, X if fold else X_scaled)
+    print(f"✓ Identical predictions on all {len(X)} rows of {DATA_PATH}")
+    if fold:
+        print("✓ Scaler folded into split points (artifact takes raw age/salary)")
+
+    pickle_size = os.path.getsize(MODEL_PATH)
+    compact_size = os.path.getsize(OUTPUT_PATH)
+    used, unused = sklearn_node_bytes(model)
+    with np.load(OUTPUT_PATH) as data:
+        compact_arrays = sum(data[name].nbytes for name in data.files)
+
+    print("\n" + "-" * 70)
+    print("SIZE REPORT")
+    print("-" * 70)
+    print(f"Trees: {meta['n_trees']}   Max depth: {meta['max_depth']}   "
+          f"Nodes: {len(compact.feature)}")
+    print(f"Split points: {sum(len(t) for t in compact.thresholds)}   "
+          f"Distinct leaf values: {len(compact.leaf_values)}")
+    print(f"{'Pickle on disk':<32} {pickle_size:>12,} bytes")
+    print(f"{'Compact artifact on disk':<32} {compact_size:>12,} bytes "
+          f"({pickle_size / compact_size:.1f}x smaller)")
+    print(f"{'sklearn node arrays (used)':<32} {used:>12,} bytes")
+    print(f"{'sklearn node arrays (unused)':<32} {unused:>12,} bytes")
+    print(f"{'Compact arrays (uncompressed)':<32} {compact_arrays:>12,} bytes")
+    if 'early_exit' in meta:
+        print(f"{'Early-exit labels (trees/row)':<32} {meta['early_exit']['mean_trees']:>12} "
+              f"of {meta['n_trees']} on {DATA_PATH}")
+    print("-" * 70)
+    print(f"\n✓ Compact model saved as '{OUTPUT_PATH}'")
+
+
+if __name__ == "__main__":
+    main()
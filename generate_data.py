@@ -0,0 +1,264 @@
+"""
+Synthetic Data Generator
+
+Writes Age/Salary/Purchased data shaped like storepurchasedata_large.csv
+at any size, for load and performance testing.
+
+The generator is fitted to the CSV:
+- (Age, Salary) come from a Gaussian kernel density estimate of the
+  observed pairs. The bandwidth follows Scott's rule (scaled by
+  --smoothing; 0 resamples the observed pairs exactly) and samples are
+  reflected back into the observed range. Values are rounded to whole
+  years and thousands of salary, as in the source.
+- Purchased is drawn with the purchase probability of the nearest
+  observed customers, a kernel-weighted average of their labels that is
+  precomputed for every (age, salary) cell.
+
+Rows are produced in blocks of BLOCK_ROWS. Block i always uses the seed
+(seed, i), so a given seed and row count give the same data whatever the
+chunk size, and memory stays bounded by the chunk size.
+
+Usage:
+    python generate_data.py --rows 10M --output synthetic_10m.csv [--seed 0] [--chunk-rows 1M]
+
+The CSV has the source's columns, so it can be passed to
+`TRAINING_DATA=... python train_model.py`,
+`python explore_data.py --stream --data ...` or uploaded to POST /jobs.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from drift import FeatureSketch, build_reference, psi
+
+DATA_PATH = 'storepurchasedata_large.csv'
+COLUMNS = ['Age', 'Salary', 'Purchased']
+BLOCK_ROWS = 1_000_000
+SALARY_STEP = 1000
+
+
+class SyntheticData:
+    """
+    Sampler fitted to observed customers.
+
+    Parameters:
+    -----------
+    X : np.ndarray, shape (n_samples, 2)
+        Observed age and salary
+    y : np.ndarray, shape (n_samples,)
+        Observed purchase labels (0/1)
+    smoothing : float
+        Density bandwidth as a multiple of Scott's rule; 0 resamples the
+        observed pairs exactly
+    label_bandwidth : float
+        Kernel width for the purchase probability, as a multiple of
+        Scott's rule (smaller keeps the decision boundary sharper)
+    """
+
+    def __init__(self, X, y, smoothing=1.0, label_bandwidth=0.5):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+
+        # Weighted unique points keep sampling and smoothing cheap
+        points, inverse, counts = np.unique(X, axis=0, return_inverse=True, return_counts=True)
+        self.points = points
+        self.weights = counts / counts.sum()
+        buyers = np.bincount(inverse.ravel(), weights=y, minlength=len(points))
+
+        # Scott's rule for a 2-D Gaussian kernel
+        scott = X.std(axis=0, ddof=1) * len(X) ** (-1 / 6)
+        self.bandwidth = scott * smoothing
+        self.low = X.min(axis=0)
+        self.high = X.max(axis=0)
+
+        # Purchase probability for every whole-year, whole-thousand cell
+        self.ages = np.arange(self.low[0], self.high[0] + 1)
+        self.salaries = np.arange(self.low[1], self.high[1] + SALARY_STEP, SALARY_STEP)
+        grid = np.stack(np.meshgrid(self.ages, self.salaries, indexing='ij'), axis=-1).reshape(-1, 2)
+        scaled = (grid[:, None, :] - points[None, :, :]) / (scott * label_bandwidth)
+        kernel = np.exp(-0.5 * np.sum(scaled ** 2, axis=-1))
+        weight = kernel @ counts
+        probability = np.where(weight > 0, kernel @ buyers / np.maximum(weight, 1e-300),
+                               buyers.sum() / counts.sum())
+        self.purchase_probability = probability.reshape(len(self.ages), len(self.salaries))
+
+    @classmethod
+    def from_csv(cls, path=DATA_PATH, **kwargs):
+        data = np.loadtxt(path, delimiter=',', skiprows=1, usecols=(0, 1, 2))
+        return cls(data[:, :2], data[:, 2], **kwargs)
+
+    def _reflect(self, values):
+        """Fold values that fall outside [low, high] back inside"""
+        span = self.high - self.low
+        offset = np.mod(values - self.low, 2 * span)
+        return self.low + np.where(offset > span, 2 * span - offset, offset)
+
+    def sample(self, n, rng):
+        """
+        Draw n customers.
+
+        Returns:
+        --------
+        X : np.ndarray, shape (n, 2), int64
+        y : np.ndarray, shape (n,), int64
+        """
+        chosen = rng.choice(len(self.points), size=n, p=self.weights)
+        X = self.points[chosen] + rng.standard_normal((n, 2)) * self.bandwidth
+        X = self._reflect(X)
+        age = np.rint(X[:, 0]).astype(np.int64)
+        salary_step = np.rint(X[:, 1] / SALARY_STEP).astype(np.int64)
+
+        age_index = age - int(self.low[0])
+        salary_index = salary_step - int(self.low[1] // SALARY_STEP)
+        p = self.purchase_probability[age_index, salary_index]
+        y = (rng.random(n) < p).astype(np.int64)
+        return np.column_stack([age, salary_step * SALARY_STEP]), y
+
+    def blocks(self, rows, seed=0):
+        """Yield (X, y) blocks of at most BLOCK_ROWS, deterministic per seed"""
+        for block, start in enumerate(range(0, rows, BLOCK_ROWS)):
+            rng = np.random.default_rng([seed, block])
+            yield self.sample(min(BLOCK_ROWS, rows - start), rng)
+
+    def chunks(self, rows, seed=0, chunk_rows=BLOCK_ROWS):
+        """
+        Yield (X, y) chunks of chunk_rows rows (the last may be shorter).
+
+        Chunks are cut from the same blocks whatever chunk_rows is, so the
+        rows do not depend on it.
+        """
+        pending_X, pending_y, pending = [], [], 0
+        for X, y in self.blocks(rows, seed):
+            start = 0
+            while start < len(X):
+                take = min(chunk_rows - pending, len(X) - start)
+                pending_X.append(X[start:start + take])
+                pending_y.append(y[start:start + take])
+                pending += take
+                start += take
+                if pending == chunk_rows:
+                    yield np.concatenate(pending_X), np.concatenate(pending_y)
+                    pending_X, pending_y, pending = [], [], 0
+        if pending:
+            yield np.concatenate(pending_X), np.concatenate(pending_y)
+
+    def generate(self, rows, seed=0):
+        """All rows in memory, for tests and benchmarks of modest size"""
+        X, y = zip(*self.blocks(rows, seed)) if rows else ([np.empty((0, 2), np.int64)],
+                                                           [np.empty(0, np.int64)])
+        return np.concatenate(X), np.concatenate(y)
+
+    def customers(self, n, seed=0):
+        """n customers as API request dicts"""
+        X, _ = self.generate(n, seed)
+        return [{'age': int(age), 'salary': int(salary)} for age, salary in X.tolist()]
+
+
+def write_csv(path, rows, seed=0, chunk_rows=BLOCK_ROWS, data=None, progress=False):
+    """
+    Stream rows to a CSV one chunk at a time.
+
+    Parameters:
+    -----------
+    path : str
+    rows : int
+    seed : int
+    chunk_rows : int
+        Rows formatted and written per write call
+    data : SyntheticData, optional
+        Fitted sampler (default: fitted to storepurchasedata_large.csv)
+    progress : bool
+        Print progress after each chunk
+
+    Returns:
+    --------
+    rows_written : int
+    """
+    import pandas as pd
+
+    data = data or SyntheticData.from_csv()
+    written = 0
+    started = time.perf_counter()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', newline='') as f:
+        f.write(','.join(COLUMNS) + '\n')
+        for X, y in data.chunks(rows, seed, chunk_rows):
+            frame = pd.DataFrame({'Age': X[:, 0], 'Salary': X[:, 1], 'Purchased': y})
+            frame.to_csv(f, header=False, index=False)
+            written += len(frame)
+            if progress:
+                elapsed = time.perf_counter() - started
+                print(f"  {written:,} / {rows:,} rows ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+    os.replace(tmp_path, path)
+    return written
+
+
+def parse_rows(text):
+    """'5000', '250k', '10M' or '1.5B' as an integer"""
+    multipliers = {'k': 10 ** 3, 'm': 10 ** 6, 'b': 10 ** 9}
+    text = text.strip().lower().replace('_', '').replace(',', '')
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def fidelity(data, X_real, y_real, rows=100000, seed=0):
+    """Compare a synthetic sample with the source data"""
+    X, y = data.generate(rows, seed)
+    reference = build_reference(X_real)
+    report = {'purchase_rate': float(y.mean()), 'source_purchase_rate': float(np.mean(y_real))}
+    for f, (name, ref) in enumerate(zip(reference['features'], reference['sketches'])):
+        sketch = FeatureSketch(ref['edges'])
+        sketch.update(X[:, f])
+        report[name] = {'psi': psi(sketch.counts, ref['counts']),
+                        'mean': float(X[:, f].mean()), 'source_mean': float(X_real[:, f].mean())}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic purchase data')
+    parser.add_argument('--rows', default='1M', help="Rows to write, e.g. 5000, 250k, 10M")
+    parser.add_argument('--output', default=None,
+                        help='CSV to write (default: synthetic_<rows>.csv)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', default='1M', help='Rows written per chunk')
+    parser.add_argument('--source', default=DATA_PATH, help='CSV the generator is fitted to')
+    parser.add_argument('--smoothing', type=float, default=1.0,
+                        help="Kernel bandwidth relative to Scott's rule (0 resamples source rows)")
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    chunk_rows = parse_rows(args.chunk_rows)
+    output = args.output or f'synthetic_{args.rows.lower()}.csv'
+
+    print("=" * 50)
+    print("SYNTHETIC DATA GENERATOR")
+    print("=" * 50)
+    source = np.loadtxt(args.source, delimiter=',', skiprows=1, usecols=(0, 1, 2))
+    data = SyntheticData(source[:, :2], source[:, 2], smoothing=args.smoothing)
+    print(f"Fitted to {len(source):,} rows of {args.source} "
+          f"({len(data.points)} distinct age/salary pairs)")
+    print(f"Kernel bandwidth: age {data.bandwidth[0]:.2f} years, salary {data.bandwidth[1]:,.0f}")
+
+    report = fidelity(data, source[:, :2], source[:, 2])
+    print(f"Purchase rate: {report['purchase_rate']:.1%} (source {report['source_purchase_rate']:.1%})")
+    for name in ('Age', 'Salary'):
+        print(f"{name:<7} mean {report[name]['mean']:,.1f} (source {report[name]['source_mean']:,.1f}), "
+              f"PSI vs source {report[name]['psi']:.3f}")
+    print("(PSI grows with --smoothing: the source has few distinct values, the samples fill the gaps)")
+
+    print(f"\nWriting {rows:,} rows to {output} (seed {args.seed})...")
+    started = time.perf_counter()
+    write_csv(output, rows, seed=args.seed, chunk_rows=chunk_rows, data=data, progress=True)
+    elapsed = time.perf_counter() - started
+    print(f"\n✓ {rows:,} rows, {os.path.getsize(output) / 1024 / 1024:,.1f} MB "
+          f"in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
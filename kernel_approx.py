@@ -0,0 +1,178 @@
+"""
+Approximate RBF Kernel SVM
+
+SVC(kernel='rbf') fits in roughly quadratic to cubic time in the number
+of rows. Its predictions cost one kernel evaluation per support vector,
+and the number of support vectors grows with the data. ApproximateRBFSVC
+keeps the same kernel and the same hinge loss but approximates the kernel
+with a Nyström feature map built from `n_components` training rows, then
+fits a linear SVM on the mapped features:
+- fitting is roughly linear in the number of rows
+- predicting costs n_components kernel evaluations per row, whatever the
+  size of the training data
+
+train_model.py uses it in place of the exact SVC above SVC_EXACT_MAX_ROWS
+training rows, and reports how close it gets to the exact SVC below that.
+
+Usage:
+    python kernel_approx.py [--data storepurchasedata_large.csv] [--rows 10k,50k]
+
+Compares fit time, predict time and test accuracy of the exact and the
+approximate SVM on the data and on synthetic extracts of the given sizes.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.kernel_approximation import Nystroem
+from sklearn.svm import LinearSVC
+
+from dedupe import scale_gamma
+
+DATA_PATH = 'storepurchasedata_large.csv'
+# Above this many training rows train_model.py skips the exact SVC
+EXACT_MAX_ROWS = 20000
+
+
+class ApproximateRBFSVC(ClassifierMixin, BaseEstimator):
+    """
+    Nyström-approximated RBF kernel with a linear SVM.
+
+    Parameters:
+    -----------
+    C : float
+        Regularization, as in SVC
+    gamma : float or 'scale'
+        RBF kernel width; 'scale' uses 1 / (n_features * X.var()) like SVC,
+        with X.var() weighted by sample_weight
+    n_components : int
+        Landmark rows of the kernel approximation (capped at the row count)
+    random_state : int, optional
+    """
+
+    def __init__(self, C=1.0, gamma='scale', n_components=100, random_state=None):
+        self.C = C
+        self.gamma = gamma
+        self.n_components = n_components
+        self.random_state = random_state
+
+    def fit(self, X, y, sample_weight=None):
+        X = np.asarray(X, dtype=np.float64)
+        gamma = self.gamma
+        if gamma == 'scale':
+            # Weighted, so collapsed rows get the kernel of the full data
+            gamma = scale_gamma(X, sample_weight)
+        self.gamma_ = gamma
+        self.feature_map_ = Nystroem(kernel='rbf', gamma=gamma,
+                                     n_components=min(self.n_components, len(X)),
+                                     random_state=self.random_state)
+        features = self.feature_map_.fit_transform(X)
+        # The dual solver converges faster on the correlated Nyström features
+        self.linear_ = LinearSVC(C=self.C, dual=True, random_state=self.random_state,
+                                 max_iter=10000)
+        self.linear_.fit(features, y, sample_weight=sample_weight)
+        self.classes_ = self.linear_.classes_
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def decision_function(self, X):
+        return self.linear_.decision_function(self.feature_map_.transform(X))
+
+    def predict(self, X):
+        return self.linear_.predict(self.feature_map_.transform(X))
+
+
+def compare(X_train, y_train, X_test, y_test, exact_max_rows=EXACT_MAX_ROWS, random_state=42):
+    """
+    Fit the exact and the approximate SVM and time both.
+
+    The exact SVC is skipped (None) above exact_max_rows training rows.
+
+    Returns:
+    --------
+    report : dict of str -> dict or None
+        'exact' and 'approximate' entries with fit_seconds,
+        predict_us_per_row and accuracy; 'agreement' between the two
+    """
+    from sklearn.svm import SVC
+
+    def measure(model):
+        started = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        predictions = model.predict(X_test)
+        predict_seconds = time.perf_counter() - started
+        return predictions, {
+            'fit_seconds': fit_seconds,
+            'predict_us_per_row': predict_seconds / max(len(X_test), 1) * 1e6,
+            'accuracy': float(np.mean(predictions == y_test)),
+        }
+
+    approximate_predictions, approximate = measure(ApproximateRBFSVC(random_state=random_state))
+    report = {'rows': len(X_train), 'exact': None, 'approximate': approximate, 'agreement': None}
+    if len(X_train) <= exact_max_rows:
+        exact_predictions, report['exact'] = measure(SVC(kernel='rbf', random_state=random_state))
+        report['agreement'] = float(np.mean(exact_predictions == approximate_predictions))
+    return report
+
+
+def _print_report(label, report):
+    approximate, exact = report['approximate'], report['exact']
+    line = (f"{label:<28} {report['rows']:>9,} "
+            f"{approximate['fit_seconds']:>9.2f}s {approximate['predict_us_per_row']:>8.2f}us "
+            f"{approximate['accuracy']:>8.2%}")
+    if exact:
+        line += (f" {exact['fit_seconds']:>9.2f}s {exact['predict_us_per_row']:>8.2f}us "
+                 f"{exact['accuracy']:>8.2%} {report['agreement']:>9.2%}")
+    else:
+        line += f" {'skipped (too many rows)':>41}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the exact and the approximate RBF SVM')
+    parser.add_argument('--data', default=DATA_PATH, help='CSV with Age, Salary, Purchased')
+    parser.add_argument('--rows', default='10k,50k',
+                        help='Synthetic extract sizes to compare on, e.g. 10k,50k,1M')
+    parser.add_argument('--exact-max-rows', type=int, default=EXACT_MAX_ROWS * 3,
+                        help='Largest training set the exact SVC is fitted on')
+    args = parser.parse_args()
+
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    from generate_data import SyntheticData, parse_rows
+
+    df = pd.read_csv(args.data)
+    X = df[['Age', 'Salary']].values.astype(np.float64)
+    y = df['Purchased'].values
+    datasets = [(args.data, X, y)]
+    sampler = SyntheticData(X, y)
+    for size in filter(None, args.rows.split(',')):
+        X_synthetic, y_synthetic = sampler.generate(parse_rows(size))
+        datasets.append((f'synthetic {size}', X_synthetic.astype(np.float64), y_synthetic))
+
+    print("=" * 124)
+    print("EXACT VS APPROXIMATE RBF SVM")
+    print("=" * 124)
+    print(f"{'Data':<28} {'Train rows':>9} {'Approx fit':>10} {'predict':>10} {'accuracy':>8}"
+          f" {'Exact fit':>10} {'predict':>10} {'accuracy':>8} {'agreement':>9}")
+    print("-" * 124)
+    for label, X_all, y_all in datasets:
+        X_train, X_test, y_train, y_test = train_test_split(X_all, y_all, test_size=0.2,
+                                                            random_state=42)
+        scaler = StandardScaler().fit(X_train)
+        report = compare(scaler.transform(X_train), y_train, scaler.transform(X_test), y_test,
+                         exact_max_rows=args.exact_max_rows)
+        _print_report(label, report)
+    print("-" * 124)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
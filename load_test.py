@@ -0,0 +1,250 @@
+"""
+API Load Test
+
+Overloads the prediction API with concurrent single and batch requests and
+reports throughput, shed requests and latency percentiles per endpoint,
+plus the latency of /health probes made during the run.
+
+By default the test starts the API twice in a separate process, with and
+without admission control, and compares the two runs:
+
+    python load_test.py [--duration 10] [--concurrency 64] [--batch-size 2000]
+
+To load an already running server instead:
+
+    python load_test.py --url http://127.0.0.1:5001
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SERVER_SCRIPT = """
+import sys
+from werkzeug.serving import run_simple
+from app import app
+run_simple('127.0.0.1', int(sys.argv[1]), app, threaded=True)
+"""
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(env=None, timeout=30):
+    """
+    Start the API in a child process with a threaded server.
+
+    Returns:
+    --------
+    process : subprocess.Popen
+    url : str
+    """
+    port = _free_port()
+    server_env = dict(os.environ, MODEL_WATCH_INTERVAL='0', PREDICTION_LOG_SAMPLE_RATE='0',
+                      JOBS_DIR=tempfile.mkdtemp(prefix='load-test-jobs-'))
+    server_env.update(env or {})
+    process = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT, str(port)], cwd=ROOT,
+                               env=server_env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f'{url}/health/ready', timeout=1).status_code == 200:
+                return process, url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('API server did not start')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def run_load(url, duration=10.0, concurrency=64, batch_size=2000, batch_share=0.2, seed=0):
+    """
+    Send requests from `concurrency` threads for `duration` seconds.
+
+    Each thread repeatedly sends a /predict/batch of `batch_size` customers
+    (with probability `batch_share`) or a single /predict call. A separate
+    thread probes /health every 100 ms.
+
+    Returns:
+    --------
+    records : list of (kind, status_code, latency_seconds)
+        kind is 'single', 'batch' or 'health'; status 0 means the request
+        failed without a response
+    """
+    rng = np.random.default_rng(seed)
+    batch = json.dumps({'customers': [
+        {'age': int(a), 'salary': int(s)}
+        for a, s in zip(rng.integers(18, 70, batch_size), rng.integers(20000, 100000, batch_size))
+    ]}).encode()
+    single = json.dumps({'age': 45, 'salary': 75000}).encode()
+    headers = {'Content-Type': 'application/json'}
+
+    records = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        session = requests.Session()
+        choose = np.random.default_rng([seed, index])
+        local = []
+        while time.perf_counter() < deadline:
+            kind = 'batch' if choose.random() < batch_share else 'single'
+            endpoint, body = ('/predict/batch', batch) if kind == 'batch' else ('/predict', single)
+            started = time.perf_counter()
+            try:
+                response = session.post(url + endpoint, data=body, headers=headers, timeout=60)
+                status = response.status_code
+            except requests.RequestException:
+                status = 0
+            local.append((kind, status, time.perf_counter() - started))
+        session.close()
+        with lock:
+            records.extend(local)
+
+    def prober():
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = session.get(url + '/health', timeout=60).status_code
+            except requests.RequestException:
+                status = 0
+            local.append(('health', status, time.perf_counter() - started))
+            time.sleep(0.1)
+        session.close()
+        with lock:
+            records.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    threads.append(threading.Thread(target=prober))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records
+
+
+def _percentiles(latencies):
+    if not latencies:
+        return {'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+    values = np.array(latencies) * 1000
+    return {'p50_ms': round(float(np.percentile(values, 50)), 2),
+            'p99_ms': round(float(np.percentile(values, 99)), 2),
+            'max_ms': round(float(values.max()), 2)}
+
+
+def summarize(records, duration):
+    """Per-kind counts and latency percentiles of successful and shed requests"""
+    summary = {}
+    for kind in ('single', 'batch', 'health'):
+        rows = [(status, latency) for k, status, latency in records if k == kind]
+        ok = [latency for status, latency in rows if status == 200]
+        shed = [latency for status, latency in rows if status == 503]
+        summary[kind] = {
+            'requests': len(rows),
+            'ok': len(ok),
+            'shed': len(shed),
+            'errors': len(rows) - len(ok) - len(shed),
+            'ok_per_second': round(len(ok) / duration, 1),
+            'ok_latency': _percentiles(ok),
+            'shed_latency': _percentiles(shed),
+        }
+    return summary
+
+
+def print_summary(title, summary):
+    print(f"\n{title}")
+    print("-" * 92)
+    print(f"{'Endpoint':<10} {'Requests':>9} {'OK':>7} {'Shed':>7} {'Errors':>7} {'OK/s':>8}"
+          f" {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'shed p99':>9}")
+    print("-" * 92)
+    for kind, row in summary.items():
+        ok, shed = row['ok_latency'], row['shed_latency']
+        fmt = lambda v: '-' if v is None else f'{v:,.1f}'
+        print(f"{kind:<10} {row['requests']:>9,} {row['ok']:>7,} {row['shed']:>7,} {row['errors']:>7,}"
+              f" {row['ok_per_second']:>8,.1f} {fmt(ok['p50_ms']):>9} {fmt(ok['p99_ms']):>9}"
+              f" {fmt(ok['max_ms']):>9} {fmt(shed['p99_ms']):>9}")
+
+
+def compare(duration=10.0, concurrency=64, batch_size=2000, batch_share=0.2, admission_env=None):
+    """
+    Run the same load against the API without and with admission control.
+
+    Returns:
+    --------
+    results : dict
+        {'without_admission': summary, 'with_admission': summary}
+    """
+    runs = {
+        'without_admission': {'ADMISSION_MAX_IN_FLIGHT': '0'},
+        'with_admission': dict({'ADMISSION_MAX_IN_FLIGHT': '4'}, **(admission_env or {})),
+    }
+    results = {}
+    for name, env in runs.items():
+        process, url = start_server(env)
+        try:
+            records = run_load(url, duration, concurrency, batch_size, batch_share)
+        finally:
+            stop_server(process)
+        results[name] = summarize(records, duration)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the prediction API')
+    parser.add_argument('--url', help='Load a running server instead of starting one')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per run')
+    parser.add_argument('--concurrency', type=int, default=64, help='Concurrent clients')
+    parser.add_argument('--batch-size', type=int, default=2000, help='Customers per batch')
+    parser.add_argument('--batch-share', type=float, default=0.2,
+                        help='Fraction of requests that are batches')
+    args = parser.parse_args()
+
+    print("=" * 92)
+    print("API LOAD TEST")
+    print("=" * 92)
+    print(f"{args.concurrency} clients for {args.duration:g}s, {args.batch_share:.0%} batches "
+          f"of {args.batch_size:,} customers")
+
+    if args.url:
+        records = run_load(args.url, args.duration, args.concurrency, args.batch_size,
+                           args.batch_share)
+        print_summary(args.url, summarize(records, args.duration))
+        return 0
+
+    results = compare(args.duration, args.concurrency, args.batch_size, args.batch_share)
+    print_summary('Without admission control (ADMISSION_MAX_IN_FLIGHT=0)',
+                  results['without_admission'])
+    print_summary('With admission control (ADMISSION_MAX_IN_FLIGHT=4)', results['with_admission'])
+    before = results['without_admission']['single']['ok_latency']['p99_ms']
+    after = results['with_admission']['single']['ok_latency']['p99_ms']
+    print(f"\n/predict p99: {before:,.1f} ms without admission control, {after:,.1f} ms with it")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
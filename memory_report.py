@@ -0,0 +1,401 @@
+"""
+Model Memory Report
+
+Measures what the serving model costs in RAM and what a request allocates:
+
+- the loaded model broken down by component (node arrays, split point
+  tables, leaf values), flagging arrays serving never reads
+- per-tree node counts and depths
+- for the pickled scikit-learn forest, the same breakdown plus the memory
+  taken by importing scikit-learn and unpickling it
+- a line-by-line allocation trace of a representative single and batch
+  request, ranking the lines with the largest temporary allocations
+
+Allocations are measured with tracemalloc, which NumPy reports its array
+buffers to. Each executed line of the repository's own code is charged with
+the peak memory it allocated above what was live when it started, so
+temporaries freed within the line are still seen. Calls into NumPy are
+charged to the line that made them.
+
+Usage:
+    python memory_report.py [batch_size]
+"""
+
+import importlib
+import linecache
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from model_runtime import load_model
+from validation import validate_customers
+
+MODEL_PATH = 'purchase_model.npz'
+PICKLE_PATH = 'purchase_model.pkl'
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Attributes of CompactForest that predict_proba never reads; all but
+# is_leaf are only used (and, past the first, only built) by explain()
+UNUSED_COMPONENTS = {'is_leaf', 'internal_node_values', 'node_values',
+                     'node_contributions', 'bias'}
+
+# sklearn tree arrays that inference reads
+SKLEARN_USED = ('children_left', 'children_right', 'feature', 'threshold', 'value')
+SKLEARN_UNUSED = ('impurity', 'n_node_samples', 'weighted_n_node_samples')
+
+_trace_lock = threading.Lock()
+
+
+def forest_structure(model):
+    """
+    Node counts and depths of every tree in a compact forest.
+
+    Returns:
+    --------
+    structure : dict
+        Totals, min/mean/max summaries and one entry per tree
+    """
+    roots = np.append(model.roots, len(model.feature))
+    node_counts = np.diff(roots)
+
+    # Children always follow their parent, so max_depth sweeps settle depths
+    depth = np.zeros(len(model.feature), dtype=np.intp)
+    internal = np.flatnonzero(~model.is_leaf)
+    for _ in range(model.max_depth):
+        depth[model.left[internal]] = depth[internal] + 1
+        depth[model.right[internal]] = depth[internal] + 1
+
+    tree_of_node = np.repeat(np.arange(model.n_estimators), node_counts)
+    depths = np.zeros(model.n_estimators, dtype=np.intp)
+    np.maximum.at(depths, tree_of_node, depth)
+    leaves = np.bincount(tree_of_node[model.is_leaf], minlength=model.n_estimators)
+
+    return {
+        'n_trees': model.n_estimators,
+        'total_nodes': int(node_counts.sum()),
+        'total_leaves': int(leaves.sum()),
+        'nodes_per_tree': _summary(node_counts),
+        'depth': _summary(depths),
+        'trees': [{'nodes': int(n), 'leaves': int(l), 'depth': int(d)}
+                  for n, l, d in zip(node_counts, leaves, depths)],
+    }
+
+
+def _summary(values):
+    return {'min': int(np.min(values)), 'mean': round(float(np.mean(values)), 1),
+            'max': int(np.max(values))}
+
+
+def model_memory(model):
+    """
+    Bytes held by each array of a compact forest.
+
+    Returns:
+    --------
+    memory : dict
+        'components' sorted largest first, plus total and unused bytes
+    """
+    components = []
+    for name, value in vars(model).items():
+        if isinstance(value, np.ndarray):
+            arrays = [value]
+        elif isinstance(value, list) and value and all(isinstance(v, np.ndarray) for v in value):
+            arrays = value
+        else:
+            continue
+        components.append({
+            'component': name,
+            'bytes': int(sum(a.nbytes for a in arrays)),
+            'dtype': str(arrays[0].dtype),
+            'elements': int(sum(a.size for a in arrays)),
+            'used_by_serving': name not in UNUSED_COMPONENTS,
+        })
+    return _totals(components)
+
+
+def sklearn_memory(model):
+    """Bytes held by each tree array of a fitted scikit-learn forest"""
+    trees = [estimator.tree_ for estimator in getattr(model, 'estimators_', [model])]
+    components = []
+    for name in SKLEARN_USED + SKLEARN_UNUSED:
+        arrays = [getattr(tree, name) for tree in trees]
+        components.append({
+            'component': f'tree_.{name}',
+            'bytes': int(sum(a.nbytes for a in arrays)),
+            'dtype': str(arrays[0].dtype),
+            'elements': int(sum(a.size for a in arrays)),
+            'used_by_serving': name in SKLEARN_USED,
+        })
+    return _totals(components)
+
+
+def _totals(components):
+    components.sort(key=lambda c: c['bytes'], reverse=True)
+    return {
+        'components': components,
+        'total_bytes': sum(c['bytes'] for c in components),
+        'unused_bytes': sum(c['bytes'] for c in components if not c['used_by_serving']),
+    }
+
+
+def _start_tracing():
+    """Start tracemalloc if needed; returns True if this call started it"""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start()
+    return True
+
+
+def measure_load(loader, path):
+    """Memory retained and peak memory while loading a model file"""
+    with _trace_lock:
+        started = _start_tracing()
+        try:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            model = loader(path)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started:
+                tracemalloc.stop()
+    return model, {'retained_bytes': current - before, 'peak_bytes': peak - before}
+
+
+def _is_own_code(filename, root):
+    # A virtualenv inside the repository is not our code
+    return filename.startswith(root) and 'site-packages' not in filename
+
+
+def trace_allocations(fn, *args, top=10, root=ROOT):
+    """
+    Run fn(*args) and charge every allocation to a line of code under root.
+
+    Other threads keep running while the trace is taken, so on a busy
+    server their allocations can add noise to the totals.
+
+    Returns:
+    --------
+    trace : dict
+        Peak bytes of the whole call, bytes still allocated when it
+        returns (including its result), and the `top` lines with the
+        largest temporary allocations
+    """
+    sites = {}
+    state = {'site': None, 'start': 0, 'peak': 0}
+
+    def close():
+        current, peak = tracemalloc.get_traced_memory()
+        state['peak'] = max(state['peak'], peak)
+        if state['site'] is not None:
+            record = sites.setdefault(state['site'], [0, 0, 0])
+            record[0] += 1
+            record[1] = max(record[1], peak - state['start'])
+            record[2] += current - state['start']
+        state['site'] = None
+
+    def open_site(frame):
+        state['site'] = (frame.f_code.co_filename, frame.f_lineno)
+        tracemalloc.reset_peak()
+        state['start'] = tracemalloc.get_traced_memory()[0]
+
+    def local(frame, event, arg):
+        if event == 'line':
+            close()
+            open_site(frame)
+        elif event == 'return':
+            close()
+            caller = frame.f_back
+            if caller is not None and _is_own_code(caller.f_code.co_filename, root):
+                open_site(caller)
+        return local
+
+    def on_call(frame, event, arg):
+        if not _is_own_code(frame.f_code.co_filename, root):
+            return None
+        close()
+        return local
+
+    with _trace_lock:
+        started = _start_tracing()
+        try:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            t0 = time.perf_counter()
+            sys.settrace(on_call)
+            try:
+                result = fn(*args)
+            finally:
+                sys.settrace(None)
+                close()
+            duration = time.perf_counter() - t0
+            current, peak = tracemalloc.get_traced_memory()
+            # Peaks are reset at every line; the call's peak is the largest
+            peak = max(peak, state['peak'])
+        finally:
+            if started:
+                tracemalloc.stop()
+    del result
+
+    ranked = sorted(sites.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    return {
+        'peak_bytes': peak - before,
+        'retained_bytes': current - before,
+        'traced_seconds': round(duration, 4),
+        'sites': [{
+            'site': f'{os.path.relpath(filename, root)}:{lineno}',
+            'code': linecache.getline(filename, lineno).strip(),
+            'executions': calls,
+            'peak_bytes': int(site_peak),
+            'net_bytes': int(net),
+        } for (filename, lineno), (calls, site_peak, net) in ranked],
+    }
+
+
+def process_memory():
+    """Resident and peak resident set size of this process, where available"""
+    memory = {'rss_bytes': None, 'max_rss_bytes': None}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    memory['rss_bytes'] = int(line.split()[1]) * 1024
+                elif line.startswith('VmHWM:'):
+                    memory['max_rss_bytes'] = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return memory
+
+
+def sample_customers(n, seed=0):
+    """Representative customers for request traces"""
+    rng = np.random.default_rng(seed)
+    return [{'age': int(a), 'salary': int(s)}
+            for a, s in zip(rng.integers(18, 70, n), rng.integers(15000, 150000, n))]
+
+
+def score(model, customers):
+    """Validation plus one model call, as the prediction endpoints do"""
+    validated = validate_customers(customers)
+    probabilities = model.predict_proba(validated.features)
+    return model.classes_[np.argmax(probabilities, axis=1)], probabilities
+
+
+def request_traces(request_fn, batch_size=1000, top=10):
+    """Trace request_fn(customers) for one customer and for a batch"""
+    request_fn(sample_customers(batch_size))  # warm up caches and lazy imports
+    return {
+        'single': trace_allocations(request_fn, sample_customers(1), top=top),
+        'batch': dict(trace_allocations(request_fn, sample_customers(batch_size), top=top),
+                      batch_size=batch_size),
+    }
+
+
+def memory_report(model, request_fn=None, batch_size=1000, top=10):
+    """
+    Full report for a loaded compact forest.
+
+    Parameters:
+    -----------
+    model : CompactForest
+    request_fn : callable(customers), optional
+        Request path to trace; defaults to validation plus predict_proba
+    batch_size : int
+        Customers in the traced batch request
+    top : int
+        Allocation sites reported per trace
+    """
+    if request_fn is None:
+        request_fn = lambda customers: score(model, customers)
+    structure = forest_structure(model)
+    structure.pop('trees')
+    return {
+        'structure': structure,
+        'memory': model_memory(model),
+        'requests': request_traces(request_fn, batch_size, top),
+        'process': process_memory(),
+    }
+
+
+def _mb(n):
+    return f"{n / 1024 / 1024:,.2f} MB" if abs(n) >= 1024 * 1024 else f"{n / 1024:,.1f} KB"
+
+
+def _print_memory(memory):
+    for c in memory['components']:
+        flag = '' if c['used_by_serving'] else '  (unused by serving)'
+        print(f"  {c['component']:<32} {_mb(c['bytes']):>12}  {c['dtype']:<8}{flag}")
+    print(f"  {'Total':<32} {_mb(memory['total_bytes']):>12}")
+    print(f"  {'Never read by serving':<32} {_mb(memory['unused_bytes']):>12}")
+
+
+def _print_trace(name, trace):
+    print(f"\n{name}: peak {_mb(trace['peak_bytes'])}, "
+          f"still allocated on return {_mb(trace['retained_bytes'])}")
+    for site in trace['sites']:
+        print(f"  {_mb(site['peak_bytes']):>10}  x{site['executions']:<3} "
+              f"{site['site']:<24} {site['code'][:60]}")
+
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    print("=" * 70)
+    print("MODEL MEMORY REPORT")
+    print("=" * 70)
+
+    if not os.path.exists(MODEL_PATH):
+        print(f"Error: {MODEL_PATH} not found. Run 'export_model.py' first.")
+        sys.exit(1)
+
+    model, load_cost = measure_load(load_model, MODEL_PATH)
+    structure = forest_structure(model)
+    print(f"\nServing model ({MODEL_PATH}, {_mb(os.path.getsize(MODEL_PATH))} on disk)")
+    print(f"  Trees: {structure['n_trees']}   Nodes: {structure['total_nodes']}   "
+          f"Leaves: {structure['total_leaves']}")
+    print(f"  Nodes per tree: {structure['nodes_per_tree']}")
+    print(f"  Depth per tree: {structure['depth']}")
+    print(f"  Loading retains {_mb(load_cost['retained_bytes'])} "
+          f"(peak {_mb(load_cost['peak_bytes'])})")
+    _print_memory(model_memory(model))
+
+    if os.path.exists(PICKLE_PATH):
+        try:
+            # Importing scikit-learn is a cost of its own; measure it apart
+            _, import_cost = measure_load(importlib.import_module, 'sklearn.ensemble')
+            import joblib
+            forest, pickle_cost = measure_load(joblib.load, PICKLE_PATH)
+            print(f"\nscikit-learn pickle ({PICKLE_PATH}, "
+                  f"{_mb(os.path.getsize(PICKLE_PATH))} on disk)")
+            print(f"  Importing scikit-learn retains {_mb(import_cost['retained_bytes'])}")
+            print(f"  Unpickling retains {_mb(pickle_cost['retained_bytes'])} "
+                  f"(peak {_mb(pickle_cost['peak_bytes'])})")
+            _print_memory(sklearn_memory(forest))
+            del forest
+        except ImportError:
+            print(f"\n(scikit-learn not installed; skipping {PICKLE_PATH})")
+
+    print("\n" + "-" * 70)
+    print("REQUEST ALLOCATIONS (largest temporary allocation sites)")
+    print("-" * 70)
+    traces = request_traces(lambda customers: score(model, customers), batch_size)
+    _print_trace("Single request", traces['single'])
+    _print_trace(f"Batch of {batch_size}", traces['batch'])
+
+    per_worker = load_cost['retained_bytes'] + traces['batch']['peak_bytes']
+    print("\n" + "-" * 70)
+    print(f"Per worker: model {_mb(load_cost['retained_bytes'])} + "
+          f"batch peak {_mb(traces['batch']['peak_bytes'])} = {_mb(per_worker)} "
+          f"above the interpreter baseline")
+    rss = process_memory()
+    if rss['rss_bytes'] is not None:
+        print(f"Process now: {_mb(rss['rss_bytes'])} resident "
+              f"(peak {_mb(rss['max_rss_bytes'])}, includes scikit-learn if loaded above)")
+    print("-" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Compact Forest Runtime
+
+Loads a forest exported by export_model.py and scores it with NumPy only,
+so serving code does not need scikit-learn (or a matching sklearn version)
+to run the model.
+
+The artifact keeps only what inference needs:
+- per-feature tables of the split points the forest actually uses
+- per-node feature ids, threshold indices and child indices stored in the
+  narrowest integer types that fit
+- one shared table of leaf class probabilities
+- optionally, the order in which predict_labels() evaluates trees
+- optionally, the class probabilities of every node, for explain()
+
+predict_labels() serves callers that only need the label. It evaluates
+trees a few at a time in the stored order and stops for each row as soon
+as the remaining trees can no longer change which class wins. Its labels
+are identical to predict().
+
+explain() splits each prediction into per-feature contributions by
+following the decision path in every tree: each split moves the node's
+class probabilities from the parent's values to the child's, and that
+change is credited to the split's feature. The bias (the average root
+value) plus the contributions equals predict_proba() up to rounding.
+Contributions from the root to every node are summed by the first
+explain() call, so models that are only used for predictions never hold
+those tables, and every later explanation costs one forest traversal plus
+one lookup per tree.
+"""
+
+import json
+import numpy as np
+
+FORMAT_NAME = 'compact-forest'
+FORMAT_VERSION = 1
+
+# Trees evaluated between early-exit checks, after the first point where
+# any row could be decided; blocks grow so rows that need most of the
+# forest do not pay one traversal loop per tree
+EARLY_EXIT_BLOCKS = (1, 2, 4, 8, 16, 32)
+# Rows stop early only when the decision holds by more than this margin,
+# far above the rounding error of summing the tree probabilities
+EARLY_EXIT_MARGIN = 1e-9
+# Rows explained per gather in explain(); the temporary holds
+# rows x trees x features x classes floats
+EXPLAIN_BLOCK_ROWS = 1024
+
+
+class CompactForest:
+    """
+    Random forest classifier rebuilt from a compact artifact.
+
+    Mirrors the parts of the sklearn API the serving code uses
+    (predict, predict_proba, classes_, n_features_in_) and returns
+    bit-for-bit the same probabilities as the forest it was exported from.
+    """
+
+    def __init__(self, arrays, meta):
+        self.meta = meta
+        self.classes_ = np.asarray(meta['classes'])
+        self.n_features_in_ = int(meta['n_features'])
+        self.n_estimators = int(meta['n_trees'])
+        self.max_depth = int(meta['max_depth'])
+        self.float32_inputs = bool(meta['float32_inputs'])
+
+        # Per-feature split point tables, sorted ascending
+        offsets = arrays['threshold_offsets'].astype(np.intp)
+        thresholds = arrays['thresholds']
+        self.thresholds = [thresholds[offsets[f]:offsets[f + 1]]
+                           for f in range(self.n_features_in_)]
+
+        # Widen the stored node arrays into global, forest-wide indices
+        # once at load time so traversal is plain fancy indexing.
+        tree_offsets = arrays['tree_offsets'].astype(np.intp)
+        node_tree = np.repeat(np.arange(self.n_estimators),
+                              np.diff(tree_offsets))
+        node_base = tree_offsets[node_tree]
+        node_ids = np.arange(tree_offsets[-1], dtype=np.intp)
+
+        feature = arrays['feature'].astype(np.intp)
+        is_leaf = feature < 0
+
+        # Leaves point back at themselves, so every row can run exactly
+        # max_depth steps without tracking which rows have finished.
+        self.left = np.where(is_leaf, node_ids,
+                             node_base + arrays['left'].astype(np.intp))
+        self.right = np.where(is_leaf, node_ids,
+                              node_base + arrays['right'].astype(np.intp))
+        self.feature = np.where(is_leaf, 0, feature)
+        self.threshold_index = arrays['threshold_index'].astype(np.intp)
+        self.leaf_index = arrays['leaf_index'].astype(np.intp)
+        self.leaf_values = arrays['leaf_values']
+        self.roots = tree_offsets[:-1]
+        self.is_leaf = is_leaf
+
+        # Early-exit voting (binary forests): how much each tree can move
+        # P(class 1) - P(class 0), and how deep each tree is
+        self.tree_order = (arrays['tree_order'].astype(np.intp) if 'tree_order' in arrays
+                           else np.arange(self.n_estimators))
+        if len(self.classes_) == 2:
+            margin = self.leaf_values[:, 1] - self.leaf_values[:, 0]
+            node_margin = margin[self.leaf_index]
+            self.leaf_margin = np.where(is_leaf, node_margin, 0.0)
+            self.tree_margin_min = np.minimum.reduceat(np.where(is_leaf, node_margin, np.inf),
+                                                       self.roots)
+            self.tree_margin_max = np.maximum.reduceat(np.where(is_leaf, node_margin, -np.inf),
+                                                       self.roots)
+        self.tree_depth = np.maximum.reduceat(self._node_depth(), self.roots)
+
+        # Class probabilities of the internal nodes, for explain(); the
+        # per-node tables are built from them by the first explain() call
+        self.internal_node_values = arrays.get('node_values')
+        self.node_values = None
+        self.node_contributions = None
+        self.bias = None
+
+    def _node_depth(self):
+        """Depth of every node; max_depth sweeps settle every depth"""
+        depth = np.zeros(len(self.feature), dtype=np.intp)
+        internal = ~self.is_leaf
+        for _ in range(self.max_depth):
+            depth[self.left[internal]] = depth[internal] + 1
+            depth[self.right[internal]] = depth[internal] + 1
+        return depth
+
+    def _build_explanations(self):
+        """
+        Expand the node values and sum the tree-path contributions: for every
+        node, the change in class probabilities credited to each feature on
+        the way from the root.
+
+        Concurrent first calls may each build the tables; the results are
+        identical and node_contributions is assigned last, so a caller that
+        sees it set also sees the node values and bias.
+        """
+        if self.internal_node_values is None:
+            raise ValueError("This artifact has no node values; re-export it "
+                             "with export_model.py to enable explanations")
+        # Stored for internal nodes only; leaves use the leaf table
+        node_values = self.leaf_values[self.leaf_index]
+        node_values[~self.is_leaf] = self.internal_node_values
+        depth = self._node_depth()
+        contributions = np.zeros((len(self.feature), self.n_features_in_, len(self.classes_)))
+        for level in range(self.max_depth):
+            parents = np.flatnonzero(~self.is_leaf & (depth == level))
+            for children in (self.left[parents], self.right[parents]):
+                contributions[children] = contributions[parents]
+                contributions[children, self.feature[parents]] += (
+                    node_values[children] - node_values[parents])
+        self.node_values = node_values
+        self.bias = node_values[self.roots].mean(axis=0)
+        self.node_contributions = contributions
+
+    def _encode(self, X):
+        """Map each feature value to the index of the first split point >= it"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Expected input of shape (n_samples, {self.n_features_in_}), "
+                f"got {X.shape}"
+            )
+        if self.float32_inputs:
+            # sklearn trees compare float32 inputs against float64 thresholds
+            X = X.astype(np.float32).astype(np.float64)
+
+        # x <= thresholds[k]  <=>  searchsorted(thresholds, x) <= k
+        codes = np.empty(X.shape, dtype=np.intp)
+        for f in range(self.n_features_in_):
+            codes[:, f] = np.searchsorted(self.thresholds[f], X[:, f], side='left')
+        return codes
+
+    def _traverse(self, codes, trees, depth):
+        """Leaf node id reached in each of the given trees, shape (n_samples, len(trees))"""
+        rows = np.arange(codes.shape[0])[:, np.newaxis]
+        node = np.broadcast_to(self.roots[trees], (codes.shape[0], len(trees)))
+
+        for _ in range(depth):
+            go_left = codes[rows, self.feature[node]] <= self.threshold_index[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def apply(self, X):
+        """Return the leaf node id reached in every tree, shape (n_samples, n_trees)"""
+        return self._traverse(self._encode(X), np.arange(self.n_estimators), self.max_depth)
+
+    def predict_proba(self, X):
+        """Class probabilities averaged over all trees, shape (n_samples, n_classes)"""
+        return self._leaf_proba(self.apply(X))
+
+    def _leaf_proba(self, leaves):
+        """predict_proba for the leaves returned by apply()"""
+        # Accumulate trees in order, exactly like sklearn's forest does
+        per_tree = self.leaf_values[self.leaf_index[leaves.T]]
+        proba = np.zeros((leaves.shape[0], len(self.classes_)))
+        for tree_proba in per_tree:
+            proba += tree_proba
+        proba /= self.n_estimators
+        return proba
+
+    def explain(self, X):
+        """
+        Tree-path feature contributions to the predicted probabilities.
+
+        Parameters:
+        -----------
+        X : array-like, shape (n_samples, n_features)
+
+        Returns:
+        --------
+        probabilities : np.ndarray, shape (n_samples, n_classes)
+            Identical to predict_proba(X)
+        bias : np.ndarray, shape (n_classes,)
+            Average class probabilities at the tree roots
+        contributions : np.ndarray, shape (n_samples, n_features, n_classes)
+            bias + contributions.sum(axis=1) equals probabilities up to rounding
+        """
+        if self.node_contributions is None:
+            self._build_explanations()
+        leaves = self.apply(X)
+        contributions = np.empty((leaves.shape[0],) + self.node_contributions.shape[1:])
+        # Gather the per-node sums in row blocks to bound the temporary
+        for start in range(0, leaves.shape[0], EXPLAIN_BLOCK_ROWS):
+            block = leaves[start:start + EXPLAIN_BLOCK_ROWS]
+            contributions[start:start + len(block)] = self.node_contributions[block].sum(axis=1)
+        contributions /= self.n_estimators
+        return self._leaf_proba(leaves), self.bias.copy(), contributions
+
+    def predict(self, X):
+        """Predicted class labels"""
+        proba = self.predict_proba(X)
+        return self.classes_.take(np.argmax(proba, axis=1), axis=0)
+
+    def predict_labels(self, X, return_trees=False):
+        """
+        Predicted class labels, stopping early per row once the vote is decided.
+
+        Trees are evaluated in tree_order. No row can be decided before the
+        evaluated trees outweigh the remaining ones (just over half the
+        forest when leaves are pure), so the first block runs up to that
+        point and later blocks follow EARLY_EXIT_BLOCKS. After each block
+        a row is finished if its lead for one class exceeds anything the
+        remaining trees could add to the other.
+        Rows that stay undecided until the end are scored by predict(), so
+        labels always match predict() exactly.
+
+        Parameters:
+        -----------
+        X : array-like, shape (n_samples, n_features)
+        return_trees : bool
+            Also return the number of trees evaluated for each row
+
+        Returns:
+        --------
+        labels : np.ndarray, shape (n_samples,)
+        trees : np.ndarray, shape (n_samples,), only if return_trees
+        """
+        if len(self.classes_) != 2:
+            labels = self.predict(X)
+            trees = np.full(len(labels), self.n_estimators)
+            return (labels, trees) if return_trees else labels
+
+        codes = self._encode(X)
+        n = codes.shape[0]
+        order = self.tree_order
+        # Bounds on what the trees after position k can still add
+        remaining_min = np.append(np.cumsum(self.tree_margin_min[order][::-1])[::-1], 0.0)
+        remaining_max = np.append(np.cumsum(self.tree_margin_max[order][::-1])[::-1], 0.0)
+        best_lead = np.append(0.0, np.cumsum(np.maximum(self.tree_margin_max[order],
+                                                        -self.tree_margin_min[order])))
+        possible = ((best_lead + remaining_min > EARLY_EXIT_MARGIN) |
+                    (-best_lead + remaining_max < -EARLY_EXIT_MARGIN))
+        first = int(np.argmax(possible)) if possible.any() else self.n_estimators
+
+        labels = np.empty(n, dtype=self.classes_.dtype)
+        trees = np.full(n, self.n_estimators)
+        active = np.arange(n)
+        lead = np.zeros(n)
+        start = 0
+        for size in (first,) + EARLY_EXIT_BLOCKS + (self.n_estimators,):
+            if start >= self.n_estimators or not len(active):
+                break
+            block = order[start:start + size]
+            start += len(block)
+            # The first block is empty when every tree favors one class:
+            # the remaining bounds alone then decide every row
+            if len(block):
+                leaves = self._traverse(codes[active], block, int(self.tree_depth[block].max()))
+                lead[active] += self.leaf_margin[leaves].sum(axis=1)
+
+            one = lead[active] + remaining_min[start] > EARLY_EXIT_MARGIN
+            zero = lead[active] + remaining_max[start] < -EARLY_EXIT_MARGIN
+            labels[active[one]] = self.classes_[1]
+            labels[active[zero]] = self.classes_[0]
+            trees[active[one | zero]] = start
+            active = active[~(one | zero)]
+
+        if len(active):
+            labels[active] = self.predict(np.asarray(X)[active])
+        return (labels, trees) if return_trees else labels
+
+
+def read_artifact(path):
+    """
+    Read the raw arrays and metadata of a compact forest artifact.
+
+    Returns:
+    --------
+    arrays : dict of str -> np.ndarray
+    meta : dict
+    """
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+
+    meta = json.loads(str(arrays.pop('meta')))
+    if meta.get('format') != FORMAT_NAME:
+        raise ValueError(f"{path} is not a compact forest artifact")
+    if meta.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError(
+            f"{path} uses format version {meta['format_version']}, "
+            f"this runtime supports up to {FORMAT_VERSION}"
+        )
+    return arrays, meta
+
+
+def load_model(path):
+    """
+    Load a compact forest artifact.
+
+    Parameters:
+    -----------
+    path : str
+        Path to a .npz file written by export_model.py
+
+    Returns:
+    --------
+    model : CompactForest
+    """
+    return CompactForest(*read_artifact(path))
@@ -0,0 +1,349 @@
+"""
+Versioned Model Store
+
+Keeps the serving model behind a single reference that can be swapped
+atomically while the API is running.
+
+Versioned artifacts live in MODEL_DIR as purchase_model-<version>.npz.
+Versions are compared as strings, so use sortable names such as
+timestamps (the default when publishing). New versions are loaded and
+warmed up in a background thread and only then swapped in; requests that
+already picked up the previous version finish on it.
+
+Warm-up repeats a few synthetic predictions until single-row latency is
+within a budget, so lazy initialisation inside NumPy is paid before a
+model takes traffic. A model that never gets within budget is not swapped
+in. The store is ready once its first model is active.
+
+Publish a freshly exported model with:
+    python model_store.py purchase_model.npz [version]
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from model_runtime import load_model
+
+MODEL_DIR = os.environ.get('MODEL_DIR', 'models')
+DEFAULT_MODEL_PATH = 'purchase_model.npz'
+ARTIFACT_PATTERN = re.compile(r'^purchase_model-(?P<version>[\w.\-]+)\.npz$')
+
+# Synthetic customers used to warm up a model before it takes traffic
+WARMUP_INPUTS = np.array([
+    [25, 30000],
+    [35, 50000],
+    [45, 75000],
+    [60, 90000],
+], dtype=np.float64)
+# Warm-up passes over WARMUP_INPUTS until the slowest single-row
+# prediction of a pass is within the budget (0 disables the check)
+WARMUP_BUDGET_MS = 25.0
+WARMUP_MAX_ROUNDS = 20
+
+
+class ModelVersion:
+    """An immutable, fully loaded model and where it came from"""
+
+    def __init__(self, version, model, path):
+        self.version = version
+        self.model = model
+        self.path = path
+        self.loaded_at = datetime.now().isoformat()
+
+
+def file_version(path):
+    """Short content hash, used as the version of an unversioned artifact"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def list_versions(model_dir=MODEL_DIR):
+    """Return {version: path} for every complete artifact in model_dir"""
+    if not os.path.isdir(model_dir):
+        return {}
+    versions = {}
+    for name in os.listdir(model_dir):
+        match = ARTIFACT_PATTERN.match(name)
+        if match:
+            versions[match.group('version')] = os.path.join(model_dir, name)
+    return versions
+
+
+def publish_model(source_path, model_dir=MODEL_DIR, version=None):
+    """
+    Copy an exported artifact into model_dir under a new version.
+
+    The file is written under a temporary name and renamed into place, so
+    a watcher never sees a partially written artifact.
+
+    Returns:
+    --------
+    version : str
+    """
+    if version is None:
+        version = datetime.now().strftime('%Y%m%d-%H%M%S')
+    if not ARTIFACT_PATTERN.match(f'purchase_model-{version}.npz'):
+        raise ValueError(f"Invalid model version: {version!r}")
+
+    # Fail before publishing anything that cannot be loaded
+    load_model(source_path)
+
+    os.makedirs(model_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=model_dir, suffix='.tmp')
+    os.close(fd)
+    try:
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, os.path.join(model_dir, f'purchase_model-{version}.npz'))
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return version
+
+
+class ModelStore:
+    """
+    Holds the active ModelVersion and swaps in new ones without downtime.
+
+    Readers call `store.active` once per request and use the returned
+    ModelVersion throughout; replacing the reference is atomic, so a
+    request never mixes two versions.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, default_path=DEFAULT_MODEL_PATH,
+                 warmup_budget_ms=WARMUP_BUDGET_MS, warmup_max_rounds=WARMUP_MAX_ROUNDS):
+        self.model_dir = model_dir
+        self.default_path = default_path
+        self.warmup_budget_ms = warmup_budget_ms
+        self.warmup_max_rounds = warmup_max_rounds
+        self.active = None
+        self.last_error = None
+        self.reloading = False
+        self.loading = False
+        self.warmup = None
+        self._latest_seen = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._loader = None
+        self._watcher = None
+
+    @property
+    def ready(self):
+        """True once a model has been loaded and warmed within budget"""
+        return self._ready.is_set()
+
+    def wait_until_ready(self, timeout=None):
+        """Block until the store is ready; returns False on timeout"""
+        return self._ready.wait(timeout)
+
+    def latest_source(self):
+        """Newest versioned artifact, falling back to the default export"""
+        versions = list_versions(self.model_dir)
+        if versions:
+            version = max(versions)
+            return version, versions[version]
+        if os.path.exists(self.default_path):
+            return file_version(self.default_path), self.default_path
+        return None, None
+
+    def warm_up(self, model):
+        """
+        Run synthetic predictions until single-row latency is within budget.
+
+        Returns:
+        --------
+        report : dict
+            rounds run, slowest single-row latency of the last round
+            (single_ms), batch_ms and whether it was within_budget
+        """
+        report = {'rounds': 0, 'single_ms': None, 'batch_ms': None,
+                  'budget_ms': self.warmup_budget_ms, 'within_budget': False}
+        for _ in range(max(1, self.warmup_max_rounds)):
+            slowest = 0.0
+            for row in WARMUP_INPUTS:
+                started = time.perf_counter()
+                model.predict_proba(row[np.newaxis, :])
+                slowest = max(slowest, time.perf_counter() - started)
+            started = time.perf_counter()
+            model.predict_proba(WARMUP_INPUTS)
+            model.predict_labels(WARMUP_INPUTS)
+            report['batch_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            report['rounds'] += 1
+            report['single_ms'] = round(slowest * 1000, 3)
+            if self.warmup_budget_ms <= 0 or report['single_ms'] <= self.warmup_budget_ms:
+                report['within_budget'] = True
+                break
+        return report
+
+    def load_version(self, version, path):
+        """Load and warm a model, then make it the active version"""
+        model = load_model(path)
+        report = self.warm_up(model)
+        if not report['within_budget']:
+            raise RuntimeError(
+                f"warm-up latency {report['single_ms']} ms is over the "
+                f"{self.warmup_budget_ms} ms budget after {report['rounds']} rounds")
+        loaded = ModelVersion(version, model, path)
+        self.active = loaded
+        self.warmup = report
+        self._ready.set()
+        return loaded
+
+    def load_latest(self):
+        """Synchronously load the newest available model"""
+        version, path = self.latest_source()
+        if path is None:
+            raise FileNotFoundError(
+                f"No model found in {self.model_dir}/ or {self.default_path}")
+        self._latest_seen = version
+        return self.load_version(version, path)
+
+    def start_loading(self, retry_interval=5.0):
+        """
+        Load the newest model in a background thread.
+
+        Failed loads (missing artifact, or warm-up over budget) are retried
+        every `retry_interval` seconds until one succeeds.
+
+        Each attempt holds the same slot as reload(), so a reload requested
+        meanwhile is refused rather than racing the initial load. If a
+        reload gets in first and succeeds, its version is kept.
+        """
+        if self._loader is not None:
+            return
+        self.loading = True
+
+        def run():
+            while not self.ready:
+                with self._lock:
+                    busy = self.reloading
+                    if not busy:
+                        self.reloading = True
+                if busy:
+                    time.sleep(0.05)
+                    continue
+                try:
+                    loaded = self.load_latest()
+                    self.last_error = None
+                    print(f"✓ Model version {loaded.version} loaded and warmed up "
+                          f"({self.warmup['rounds']} rounds, {self.warmup['single_ms']} ms)")
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"✗ Error loading model: {e}")
+                finally:
+                    self.reloading = False
+                if not self.ready:
+                    time.sleep(retry_interval)
+            # A reload that won must not be undone by the watcher
+            if self._latest_seen is None:
+                self._latest_seen = self.latest_source()[0]
+            self.loading = False
+
+        self._loader = threading.Thread(target=run, name='model-loader', daemon=True)
+        self._loader.start()
+
+    def reload(self, version=None, wait=False):
+        """
+        Load a model version in the background and swap it in when ready.
+
+        Parameters:
+        -----------
+        version : str, optional
+            Version to load; defaults to the newest available
+        wait : bool
+            Block until the reload has finished
+
+        Returns:
+        --------
+        target : str or None
+            The version being loaded, or None if a reload is already running
+        """
+        if version is None:
+            target, path = self.latest_source()
+        else:
+            target, path = version, list_versions(self.model_dir).get(version)
+        if path is None:
+            raise FileNotFoundError(f"Model version not found: {version}")
+        return self._start_reload(target, path, wait)
+
+    def _start_reload(self, target, path, wait=False):
+        with self._lock:
+            if self.reloading:
+                return None
+            self.reloading = True
+
+        def run():
+            try:
+                self.load_version(target, path)
+                self.last_error = None
+                print(f"✓ Model version {target} is now active")
+            except Exception as e:
+                self.last_error = f"{target}: {e}"
+                print(f"✗ Failed to load model version {target}: {e}")
+            finally:
+                self.reloading = False
+
+        thread = threading.Thread(target=run, name='model-reload', daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return target
+
+    def check_for_update(self):
+        """
+        Reload when a new artifact appears.
+
+        Only reacts to changes in what is newest on disk, so an explicit
+        rollback through reload(version) is not undone by the watcher, and
+        a broken artifact is tried once rather than on every poll.
+        """
+        version, path = self.latest_source()
+        if version is None or version == self._latest_seen:
+            return
+        current = self.active
+        if current is None or version != current.version:
+            if self._start_reload(version, path) is None:
+                return  # busy; try again on the next poll
+        self._latest_seen = version
+
+    def start_watcher(self, interval):
+        """Poll model_dir for new versions every `interval` seconds"""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def watch():
+            # New versions are only looked for once the first one is serving
+            self._ready.wait()
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_for_update()
+                except Exception as e:
+                    print(f"✗ Model watcher error: {e}")
+
+        self._watcher = threading.Thread(target=watch, name='model-watcher', daemon=True)
+        self._watcher.start()
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python model_store.py <exported_model.npz> [version]")
+        sys.exit(1)
+
+    version = publish_model(sys.argv[1], version=sys.argv[2] if len(sys.argv) == 3 else None)
+    print(f"✓ Published {sys.argv[1]} as version {version} in {MODEL_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
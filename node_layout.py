@@ -0,0 +1,273 @@
+"""
+Hot-Path Node Layout
+
+sklearn numbers tree nodes in build order, and export_model.py keeps that
+order. A typical request therefore jumps around each tree's node arrays,
+100 times per prediction. This tool replays recorded request features
+through the serving forest, counts how often each node is visited, and
+renumbers every tree's nodes depth-first with the more frequently visited
+child first:
+- the most common path through each tree is stored contiguously from the
+  root down
+- every likely child directly follows its parent
+
+Split tests, leaves and the tree order are unchanged, so predictions are
+identical. The tool checks that on the replayed rows and benchmarks both
+layouts.
+
+Usage:
+    python node_layout.py [--features logs/predictions.jsonl] [--model purchase_model.npz]
+                          [--output purchase_model.optimized.npz]
+
+Features are read from prediction log lines ("age" and "salary" keys),
+JSON lines holding a "customers" array (API request bodies), or CSV files
+with Age and Salary columns. Publish the result with
+`python model_store.py purchase_model.optimized.npz`.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from export_model import write_artifact
+from model_runtime import CompactForest, read_artifact
+
+MODEL_PATH = 'purchase_model.npz'
+OUTPUT_PATH = 'purchase_model.optimized.npz'
+# Replayed when no feature files are given
+DEFAULT_FEATURES = ['logs/predictions.jsonl', 'storepurchasedata_large.csv']
+
+
+def read_features(paths):
+    """
+    Age and salary of every recorded request in the given files.
+
+    Parameters:
+    -----------
+    paths : list of str
+        .jsonl prediction logs or request bodies, or .csv files
+
+    Returns:
+    --------
+    X : np.ndarray, shape (n_rows, 2)
+    """
+    rows = []
+    for path in paths:
+        if path.endswith('.csv'):
+            import pandas as pd
+
+            df = pd.read_csv(path)
+            columns = {name.lower(): name for name in df.columns}
+            rows.extend(df[[columns['age'], columns['salary']]].values.tolist())
+            continue
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                for customer in record.get('customers', [record]):
+                    age, salary = customer.get('age'), customer.get('salary')
+                    if isinstance(age, (int, float)) and isinstance(salary, (int, float)):
+                        rows.append((age, salary))
+    return np.array(rows, dtype=np.float64).reshape(-1, 2)
+
+
+def visit_counts(model, X, chunk_rows=10000):
+    """Number of rows of X that pass through each node of the forest"""
+    counts = np.zeros(len(model.feature), dtype=np.int64)
+    for start in range(0, len(X), chunk_rows):
+        codes = model._encode(X[start:start + chunk_rows])
+        rows = np.arange(codes.shape[0])[:, np.newaxis]
+        node = np.broadcast_to(model.roots, (codes.shape[0], model.n_estimators))
+        counts += np.bincount(node.ravel(), minlength=len(counts))
+        # Same steps as CompactForest._traverse, counting each node once
+        # per row (leaves point back at themselves)
+        for _ in range(model.max_depth):
+            internal = ~model.is_leaf[node]
+            go_left = codes[rows, model.feature[node]] <= model.threshold_index[node]
+            node = np.where(go_left, model.left[node], model.right[node])
+            counts += np.bincount(node[internal], minlength=len(counts))
+    return counts
+
+
+def hot_path_order(model, counts):
+    """
+    New node order: each tree depth-first, the more visited child first.
+
+    Returns:
+    --------
+    order : np.ndarray
+        order[new_id] is the old (global) id of the node stored at new_id;
+        every tree keeps its position in the node arrays
+    """
+    order = []
+    for root in model.roots.tolist():
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            if model.is_leaf[node]:
+                continue
+            hot, cold = model.left[node], model.right[node]
+            if counts[cold] > counts[hot]:
+                hot, cold = cold, hot
+            stack.append(cold)
+            stack.append(hot)
+    return np.array(order, dtype=np.intp)
+
+
+def relayout(arrays, meta, order):
+    """
+    Artifact arrays with the nodes of every tree stored in the given order.
+
+    Parameters:
+    -----------
+    arrays, meta : artifact contents, as returned by read_artifact()
+    order : np.ndarray
+        From hot_path_order()
+
+    Returns:
+    --------
+    arrays : dict of str -> np.ndarray
+        New arrays; the input is not modified
+    """
+    model = CompactForest(arrays, meta)
+    new_id = np.empty(len(order), dtype=np.intp)
+    new_id[order] = np.arange(len(order))
+
+    tree_offsets = arrays['tree_offsets'].astype(np.intp)
+    node_tree = np.repeat(np.arange(model.n_estimators), np.diff(tree_offsets))
+    base = tree_offsets[node_tree]
+    is_leaf = model.is_leaf[order]
+
+    laid_out = dict(arrays)
+    laid_out['feature'] = arrays['feature'][order]
+    laid_out['threshold_index'] = arrays['threshold_index'][order]
+    laid_out['leaf_index'] = arrays['leaf_index'][order]
+    for side, children in (('left', model.left), ('right', model.right)):
+        local = np.where(is_leaf, 0, new_id[children[order]] - base)
+        laid_out[side] = local.astype(arrays[side].dtype)
+    if 'node_values' in arrays:
+        model._build_explanations()
+        laid_out['node_values'] = model.node_values[order][~is_leaf]
+    return laid_out
+
+
+def verify_identical(model, optimized, X):
+    """Check both layouts give the same probabilities, labels and explanations"""
+    if not np.array_equal(model.predict_proba(X), optimized.predict_proba(X)):
+        raise AssertionError("Probabilities differ")
+    if not np.array_equal(model.predict_labels(X), optimized.predict_labels(X)):
+        raise AssertionError("Early-exit labels differ")
+    if model.internal_node_values is not None and \
+            not np.array_equal(model.explain(X)[2], optimized.explain(X)[2]):
+        raise AssertionError("Explanations differ")
+
+
+def benchmark(models, X, single_rows=500, repeats=5):
+    """
+    Time predict_proba on single rows and on the whole of X.
+
+    The models are timed alternately and the best of `repeats` runs is
+    kept, so background noise affects every layout alike.
+
+    Returns:
+    --------
+    timings : dict of str -> dict
+        Per model name: single_us (per one-row call) and batch_ms
+    """
+    singles = X[np.linspace(0, len(X) - 1, min(single_rows, len(X))).astype(np.intp)]
+    timings = {name: {'single_us': np.inf, 'batch_ms': np.inf} for name in models}
+    for _ in range(repeats):
+        for name, model in models.items():
+            started = time.perf_counter()
+            for row in singles:
+                model.predict_proba(row[np.newaxis, :])
+            single = (time.perf_counter() - started) / len(singles) * 1e6
+            started = time.perf_counter()
+            model.predict_proba(X)
+            batch = (time.perf_counter() - started) * 1000
+            timings[name]['single_us'] = min(timings[name]['single_us'], single)
+            timings[name]['batch_ms'] = min(timings[name]['batch_ms'], batch)
+    return timings
+
+
+def optimize_layout(model_path, X, output_path):
+    """
+    Write a copy of the artifact at model_path with the hot-path layout.
+
+    Returns:
+    --------
+    model, optimized : CompactForest
+        The original and the relaid-out model (checked to be identical on X)
+    counts : np.ndarray
+        Visits per node of the original model
+    """
+    arrays, meta = read_artifact(model_path)
+    model = CompactForest(arrays, meta)
+    counts = visit_counts(model, X)
+    laid_out = relayout(arrays, meta, hot_path_order(model, counts))
+
+    meta = dict(meta, node_layout={'rows': int(len(X))})
+    optimized = CompactForest(laid_out, meta)
+    verify_identical(model, optimized, X)
+    write_artifact(output_path, laid_out, meta)
+    return model, optimized, counts
+
+
+def _adjacent_share(model, counts):
+    """Share of visited parent -> child steps that land on the next node"""
+    internal = np.flatnonzero(~model.is_leaf)
+    steps = 0
+    adjacent = 0
+    for children in (model.left[internal], model.right[internal]):
+        steps += counts[children].sum()
+        adjacent += counts[children][children == internal + 1].sum()
+    return adjacent / max(steps, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lay out tree nodes along the hot paths')
+    parser.add_argument('--features', nargs='+',
+                        help='Prediction logs, request .jsonl or .csv files to replay')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    paths = args.features or [path for path in DEFAULT_FEATURES if os.path.exists(path)][:1]
+    X = read_features(paths)
+    if len(X) == 0:
+        print(f"Error: no request features found in {', '.join(paths) or 'the default paths'}")
+        return 1
+
+    print("=" * 70)
+    print("HOT-PATH NODE LAYOUT")
+    print("=" * 70)
+    print(f"Replaying {len(X):,} rows from {', '.join(paths)}")
+
+    model, optimized, counts = optimize_layout(args.model, X, args.output)
+    print(f"✓ Identical predictions on all {len(X):,} rows")
+    print(f"Parent -> child steps to the next node: "
+          f"{_adjacent_share(model, counts):.1%} before, "
+          f"{_adjacent_share(optimized, visit_counts(optimized, X)):.1%} after")
+
+    timings = benchmark({'original': model, 'optimized': optimized}, X)
+    print("\n" + "-" * 70)
+    print(f"{'Layout':<12} {'Single row (us)':>18} {f'Batch of {len(X):,} (ms)':>24}")
+    print("-" * 70)
+    for name, row in timings.items():
+        print(f"{name:<12} {row['single_us']:>18.1f} {row['batch_ms']:>24.2f}")
+    print("-" * 70)
+    print(f"Single row: {timings['original']['single_us'] / timings['optimized']['single_us']:.2f}x"
+          f"   Batch: {timings['original']['batch_ms'] / timings['optimized']['batch_ms']:.2f}x")
+    print(f"\n✓ Optimized model saved as '{args.output}'")
+    print(f"  Publish it with: python model_store.py {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
-import joblib
 import numpy as np
 import sys
 
+from model_runtime import load_model
+
 def predict_purchase(age, salary):
     """
     Predict whether a customer will make a purchase based on age and salary.
@@ -21,31 +22,21 @@ def predict_purchase(age, salary):
         Probability of making a purchase (if model supports it)
     """
     try:
-        # Load the trained model and scaler
-        model = joblib.load('purchase_model.pkl')
-        scaler = joblib.load('scaler.pkl')
+        # Load the serving model (scaler is folded into it)
+        model = load_model('purchase_model.npz')
         
         # Prepare the input data
         input_data = np.array([[age, salary]])
         
-        # Scale the input data
-        input_scaled = scaler.transform(input_data)
-        
         # Make prediction
-        prediction = model.predict(input_scaled)[0]
-        
-        # Try to get prediction probability if model supports it
-        try:
-            probabilities = model.predict_proba(input_scaled)[0]
-            probability = probabilities[1]  # Probability of purchasing (class 1)
-        except AttributeError:
-            # Some models don't support predict_proba
-            probability = None
+        probabilities = model.predict_proba(input_data)[0]
+        prediction = model.classes_[np.argmax(probabilities)]
+        probability = probabilities[1]  # Probability of purchasing (class 1)
         
         return prediction, probability
     
     except FileNotFoundError:
-        print("Error: Model files not found. Please train the model first by running 'train_model.py'")
+        print("Error: Model file not found. Please train the model by running 'train_model.py' and export it with 'export_model.py'")
         sys.exit(1)
     except Exception as e:
         print(f"Error during prediction: {str(e)}")
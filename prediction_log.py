@@ -0,0 +1,212 @@
+"""
+Prediction Log
+
+Structured audit log of predictions that stays off the request path.
+Requests only drop a reference to their inputs and probabilities into a
+fixed-size in-memory ring buffer; a background thread drains the buffer in
+batches, formats one JSON line per prediction and appends them to a
+rotating local file. When the buffer is full new records are dropped and
+counted instead of making the request wait.
+
+Each line looks like:
+    {"ts": "2025-11-28T10:00:00.000000", "request_id": "3f2a-17", "endpoint": "/predict",
+     "model_version": "20251128-100000", "latency_ms": 0.81, "index": 0,
+     "age": 45.0, "salary": 75000.0, "purchase_probability": 0.88, "prediction": 1}
+
+Label-only requests log "purchase_probability": null.
+"""
+
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+class PredictionLog:
+    """
+    Parameters:
+    -----------
+    directory : str
+        Where log files are written
+    buffer_size : int
+        Requests held in memory before new records are dropped
+    sample_rate : float
+        Fraction of requests logged (1.0 logs everything)
+    flush_interval : float
+        Seconds between background flushes
+    max_bytes : int
+        Size at which the log file is rotated
+    backup_count : int
+        Rotated files kept (predictions.jsonl.1 ... .N)
+    """
+
+    FILENAME = 'predictions.jsonl'
+
+    def __init__(self, directory='logs', buffer_size=10000, sample_rate=1.0,
+                 flush_interval=1.0, max_bytes=10 * 1024 * 1024, backup_count=5):
+        self.directory = directory
+        self.path = os.path.join(directory, self.FILENAME)
+        self.capacity = buffer_size
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self._buffer = [None] * buffer_size
+        self._head = 0  # next record to flush
+        self._size = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._ids = itertools.count()
+        self._prefix = uuid.uuid4().hex[:8]
+
+        self.logged = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='prediction-log', daemon=True)
+        self._thread.start()
+
+    def record(self, endpoint, model_version, latency, features, probabilities, indices=None,
+               labels=None):
+        """
+        Queue a request's predictions for logging. Never blocks on I/O.
+
+        Parameters:
+        -----------
+        endpoint : str
+        model_version : str
+        latency : float
+            Seconds spent validating and scoring the request
+        features : np.ndarray, shape (n_rows, 2)
+        probabilities : np.ndarray, shape (n_rows, n_classes), or None
+            Not copied; callers must not modify either array afterwards.
+            None for label-only requests, which pass labels instead
+        indices : np.ndarray, optional
+            Position of each row in the request
+        labels : np.ndarray, shape (n_rows,), optional
+            Predicted labels when there are no probabilities
+
+        Returns:
+        --------
+        logged : bool
+            False if the request was sampled out or dropped
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        entry = (time.time(), next(self._ids), endpoint, model_version, latency,
+                 features, probabilities, indices, labels)
+        with self._lock:
+            if self._size == self.capacity:
+                self.dropped += 1
+                return False
+            self._buffer[(self._head + self._size) % self.capacity] = entry
+            self._size += 1
+            self.logged += 1
+            half_full = self._size * 2 >= self.capacity
+        if half_full:
+            self._wake.set()
+        return True
+
+    def _take(self):
+        """Remove and return everything currently buffered"""
+        with self._lock:
+            head, size = self._head, self._size
+            end = head + size
+            if end <= self.capacity:
+                entries = self._buffer[head:end]
+            else:
+                entries = self._buffer[head:] + self._buffer[:end - self.capacity]
+            for i in range(head, end):
+                self._buffer[i % self.capacity] = None
+            self._head = end % self.capacity
+            self._size = 0
+        return entries
+
+    def _format(self, entries):
+        lines = []
+        for ts, seq, endpoint, version, latency, features, probabilities, indices, labels in entries:
+            common = {
+                'ts': datetime.fromtimestamp(ts).isoformat(),
+                'request_id': f'{self._prefix}-{seq}',
+                'endpoint': endpoint,
+                'model_version': version,
+                'latency_ms': round(latency * 1000, 3),
+            }
+            rows = range(len(features)) if indices is None else indices.tolist()
+            if probabilities is None:
+                for row, (age, salary), label in zip(rows, features.tolist(), labels.tolist()):
+                    line = dict(common, index=row, age=age, salary=salary,
+                                purchase_probability=None, prediction=int(label))
+                    lines.append(json.dumps(line))
+                continue
+            for row, (age, salary), proba in zip(rows, features.tolist(), probabilities.tolist()):
+                line = dict(common, index=row, age=age, salary=salary,
+                            purchase_probability=proba[1],
+                            prediction=int(proba[1] > proba[0]))
+                lines.append(json.dumps(line))
+        return lines
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f'{self.path}.{i}'
+            if os.path.exists(src):
+                os.replace(src, f'{self.path}.{i + 1}')
+        if self.backup_count > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of lines written"""
+        with self._write_lock:
+            entries = self._take()
+            if not entries:
+                return 0
+            try:
+                lines = self._format(entries)
+                if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    self._rotate()
+                with open(self.path, 'a') as f:
+                    f.write('\n'.join(lines) + '\n')
+            except Exception as e:
+                print(f"✗ Prediction log flush failed: {e}")
+                self.failed += len(entries)
+                return 0
+            self.written += len(lines)
+            return len(lines)
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the background thread after a final flush"""
+        self._stopped = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                'path': self.path,
+                'sample_rate': self.sample_rate,
+                'buffer_size': self.capacity,
+                'buffered': self._size,
+                'requests_logged': self.logged,
+                'requests_dropped': self.dropped,
+                'requests_failed': self.failed,
+                'lines_written': self.written,
+            }
@@ -0,0 +1,439 @@
+"""
+Customer Score Index
+
+Precomputes the purchase prediction for a known customer table once per
+model version. GET /score/<customer_id> then serves them without rescoring.
+
+The index is an open-addressing hash table stored as one NumPy structured
+array (.npy) and opened memory-mapped, so a lookup touches only a few
+slots whatever the table size and the server does not read the file into
+memory. Customer IDs are hashed to 64-bit keys; each slot holds the key,
+the customer's age and salary, both class probabilities and the label.
+
+Every index records the model version it was scored with. A lookup whose
+index is older than the serving model is stale: the server rescores the
+stored features with the current model instead of returning the old score.
+
+Building streams the customer CSV in chunks into a table memory-mapped on
+disk. A table of any size is indexed without holding it in memory. The
+new index replaces the served one only once it is complete.
+
+Layout under SCORE_INDEX_DIR:
+    <version>/index.npy    hash table
+    <version>/meta.json    model version, row counts, build time
+    CURRENT                name of the index being served
+
+Usage:
+    python score_index.py build customers.csv [--id-column customer_id] [--row-ids]
+    python score_index.py lookup <customer_id>
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+
+from validation import validate_customers
+
+INDEX_DIR = 'score_index'
+MODEL_PATH = 'purchase_model.npz'
+ID_COLUMN = 'customer_id'
+CHUNK_ROWS = 100000
+# Slots per customer; half-empty tables keep probe sequences short
+SLOTS_PER_ROW = 2
+
+INDEX_DTYPE = np.dtype([
+    ('key', '<u8'),
+    ('age', '<f8'),
+    ('salary', '<f8'),
+    ('not_purchase', '<f8'),
+    ('purchase', '<f8'),
+    ('label', '<i8'),
+])
+
+
+def customer_key(customer_id):
+    """64-bit hash of a customer ID (0 marks an empty slot, so it is never used)"""
+    digest = hashlib.blake2b(str(customer_id).strip().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def count_rows(path):
+    """Data rows in a CSV (lines after the header), counted without parsing"""
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def read_customer_chunks(path, id_column=ID_COLUMN, row_ids=False, chunk_rows=CHUNK_ROWS):
+    """
+    Yield (customer_ids, customers) chunks from a CSV.
+
+    The CSV needs age and salary columns and, unless row_ids is set, an ID
+    column (all matched in any case). With row_ids the 1-based row number
+    is the customer ID.
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        if 'age' not in header or 'salary' not in header:
+            raise ValueError("CSV file must have 'age' and 'salary' columns")
+        if not row_ids and id_column.lower() not in header:
+            raise ValueError(f"CSV file has no '{id_column}' column (use --row-ids to number rows)")
+        age_col = header.index('age')
+        salary_col = header.index('salary')
+        id_col = None if row_ids else header.index(id_column.lower())
+
+        number = 0
+        rows = (row for row in reader if row)
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                break
+            if row_ids:
+                ids = [str(number + i + 1) for i in range(len(chunk))]
+            else:
+                ids = [row[id_col].strip() if id_col < len(row) else '' for row in chunk]
+            customers = [{
+                'age': (row[age_col].strip() or None) if age_col < len(row) else None,
+                'salary': (row[salary_col].strip() or None) if salary_col < len(row) else None,
+            } for row in chunk]
+            number += len(chunk)
+            yield ids, customers
+
+
+def _insert(table, records):
+    """
+    Insert records into the hash table with linear probing.
+
+    All records probe together; when several want the same empty slot the
+    first takes it and the others move on. A key already in the table is
+    overwritten, so the last row for a repeated customer ID wins. Keys
+    repeated within records are reduced to their last row first, since
+    copies probing together would otherwise take separate slots.
+
+    Returns:
+    --------
+    replaced : int
+        Records that overwrote an existing key or a later row of their own
+    """
+    _, last = np.unique(records['key'][::-1], return_index=True)
+    keep = np.sort(len(records) - 1 - last)
+    replaced = len(records) - len(keep)
+    records = records[keep]
+
+    mask = len(table) - 1
+    keys = records['key']
+    slots = (keys & np.uint64(mask)).astype(np.intp)
+    pending = np.arange(len(records))
+    while len(pending):
+        slot = slots[pending]
+        existing = table['key'][slot]
+
+        same = existing == keys[pending]
+        if same.any():
+            table[slot[same]] = records[pending[same]]
+            replaced += int(same.sum())
+
+        empty = np.flatnonzero(existing == 0)
+        taken, first = np.unique(slot[empty], return_index=True)
+        winners = pending[empty[first]]
+        table[taken] = records[winners]
+
+        done = same
+        done[empty[first]] = True
+        pending = pending[~done]
+        slots[pending] = (slots[pending] + 1) & mask
+    return replaced
+
+
+def _table_size(rows):
+    return 1 << max(4, int(np.ceil(np.log2(max(rows, 1) * SLOTS_PER_ROW))))
+
+
+def build_index(model, version, customers_path, directory=INDEX_DIR, id_column=ID_COLUMN,
+                row_ids=False, chunk_rows=CHUNK_ROWS, progress=None):
+    """
+    Score a customer table with one model version and serve the result.
+
+    Parameters:
+    -----------
+    model : CompactForest
+    version : str
+        Version of the model, recorded with the index
+    customers_path : str
+        CSV with customer IDs, age and salary
+    directory : str
+        Where indexes are stored
+    id_column : str
+    row_ids : bool
+        Use row numbers as customer IDs
+    chunk_rows : int
+        Rows read and scored per chunk
+    progress : callable, optional
+        Called with (rows_processed, total_rows) after each chunk
+
+    Returns:
+    --------
+    meta : dict
+    """
+    started = time.perf_counter()
+    total = count_rows(customers_path)
+    size = _table_size(total)
+    columns = [int(np.flatnonzero(model.classes_ == label)[0]) for label in (0, 1)]
+
+    tmp_dir = os.path.join(directory, f'.{version}.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    table = np.lib.format.open_memmap(os.path.join(tmp_dir, 'index.npy'), mode='w+',
+                                      dtype=INDEX_DTYPE, shape=(size,))
+
+    processed = indexed = invalid = replaced = 0
+    for ids, customers in read_customer_chunks(customers_path, id_column, row_ids, chunk_rows):
+        validated = validate_customers(customers)
+        has_id = np.array([bool(ids[i]) for i in validated.indices.tolist()], dtype=bool)
+        indices = validated.indices[has_id]
+        features = validated.features[has_id]
+        if processed + len(customers) > total:
+            raise ValueError(f"{customers_path} changed while it was being indexed")
+
+        records = np.zeros(len(indices), dtype=INDEX_DTYPE)
+        records['key'] = [customer_key(ids[i]) for i in indices.tolist()]
+        if len(indices):
+            # Customers share few distinct (age, salary) pairs; score each once
+            pairs, inverse = np.unique(features, axis=0, return_inverse=True)
+            probabilities = model.predict_proba(pairs)[inverse.ravel()]
+            records['age'] = features[:, 0]
+            records['salary'] = features[:, 1]
+            records['not_purchase'] = probabilities[:, columns[0]]
+            records['purchase'] = probabilities[:, columns[1]]
+            records['label'] = model.classes_[np.argmax(probabilities, axis=1)]
+        replaced += _insert(table, records)
+
+        processed += len(customers)
+        indexed += len(indices)
+        invalid += len(customers) - len(indices)
+        if progress:
+            progress(processed, total)
+        # Give request threads a chance to run between chunks
+        time.sleep(0)
+
+    table.flush()
+    del table
+    meta = {
+        'model_version': version,
+        'source': os.path.abspath(customers_path),
+        'created_at': datetime.now().isoformat(),
+        'rows_read': processed,
+        'customers': indexed - replaced,
+        'duplicate_ids': replaced,
+        'invalid_rows': invalid,
+        'slots': size,
+        'build_seconds': round(time.perf_counter() - started, 3),
+    }
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # Swap the finished index in; readers holding the old one keep their mapping
+    final_dir = os.path.join(directory, version)
+    previous = current_name(directory)
+    if os.path.exists(final_dir):
+        old_dir = os.path.join(directory, f'.{version}.old')
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(final_dir, old_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    os.replace(tmp_dir, final_dir)
+    tmp_current = os.path.join(directory, 'CURRENT.tmp')
+    with open(tmp_current, 'w') as f:
+        f.write(version)
+    os.replace(tmp_current, os.path.join(directory, 'CURRENT'))
+    if previous and previous != version:
+        shutil.rmtree(os.path.join(directory, previous), ignore_errors=True)
+    return meta
+
+
+def current_name(directory=INDEX_DIR):
+    """Name of the index being served, or None"""
+    try:
+        with open(os.path.join(directory, 'CURRENT')) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class ScoreIndex:
+    """
+    Read-only, memory-mapped view of one built index.
+
+    Parameters:
+    -----------
+    path : str
+        Index directory (holding index.npy and meta.json)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.version = self.meta['model_version']
+        self.table = np.load(os.path.join(path, 'index.npy'), mmap_mode='r')
+        self._mask = len(self.table) - 1
+
+    def lookup(self, customer_id):
+        """
+        Stored record for a customer ID.
+
+        Returns:
+        --------
+        record : dict or None
+            age, salary, not_purchase and purchase probabilities and label;
+            None if the customer is not in the index
+        """
+        key = customer_key(customer_id)
+        slot = key & self._mask
+        while True:
+            entry = self.table[slot]
+            stored = int(entry['key'])
+            if stored == key:
+                return {
+                    'age': float(entry['age']),
+                    'salary': float(entry['salary']),
+                    'not_purchase': float(entry['not_purchase']),
+                    'purchase': float(entry['purchase']),
+                    'label': int(entry['label']),
+                }
+            if stored == 0:
+                return None
+            slot = (slot + 1) & self._mask
+
+
+class ScoreIndexStore:
+    """
+    The index currently served from a directory.
+
+    current() notices a new CURRENT file (written by a rebuild in this
+    process or by the command line) and opens the new index; requests keep
+    the index object they were given.
+    """
+
+    def __init__(self, directory=INDEX_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._index = None
+        self.rebuild = {'status': 'idle'}
+
+    def current(self):
+        try:
+            stat = os.stat(os.path.join(self.directory, 'CURRENT'))
+            stamp = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        except FileNotFoundError:
+            return None
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    name = current_name(self.directory)
+                    self._index = ScoreIndex(os.path.join(self.directory, name)) if name else None
+                    self._stamp = stamp
+        return self._index
+
+    def start_rebuild(self, model, version, customers_path, **kwargs):
+        """
+        Rebuild in a background thread.
+
+        Returns:
+        --------
+        started : bool
+            False if a rebuild is already running
+        """
+        with self._lock:
+            if self.rebuild['status'] == 'running':
+                return False
+            self.rebuild = {'status': 'running', 'model_version': version,
+                            'started_at': datetime.now().isoformat(),
+                            'processed': 0, 'total': None}
+
+        def progress(processed, total):
+            self.rebuild['processed'] = processed
+            self.rebuild['total'] = total
+
+        def run():
+            try:
+                meta = build_index(model, version, customers_path, self.directory,
+                                   progress=progress, **kwargs)
+                status = {'status': 'completed', 'customers': meta['customers']}
+            except Exception as e:
+                print(f"✗ Score index rebuild failed: {e}")
+                status = {'status': 'failed', 'error': str(e)}
+            with self._lock:
+                self.rebuild = dict(self.rebuild, finished_at=datetime.now().isoformat(),
+                                    **status)
+
+        threading.Thread(target=run, name='score-index-rebuild', daemon=True).start()
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precomputed customer score index')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Score a customer CSV into a new index')
+    build.add_argument('customers', help='CSV with customer IDs, age and salary')
+    build.add_argument('--id-column', default=ID_COLUMN)
+    build.add_argument('--row-ids', action='store_true',
+                       help='Use row numbers as customer IDs (for tables without IDs)')
+    build.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    build.add_argument('--model', default=MODEL_PATH)
+    build.add_argument('--index-dir', default=INDEX_DIR)
+    lookup = subparsers.add_parser('lookup', help='Print the stored score of a customer')
+    lookup.add_argument('customer_id')
+    lookup.add_argument('--index-dir', default=INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        from model_runtime import load_model
+        from model_store import file_version
+
+        model = load_model(args.model)
+        version = file_version(args.model)
+
+        def progress(processed, total):
+            print(f"  {processed:,} / {total:,} rows")
+
+        print(f"Scoring {args.customers} with model version {version}...")
+        meta = build_index(model, version, args.customers, args.index_dir, args.id_column,
+                           args.row_ids, args.chunk_rows, progress)
+        print(f"✓ {meta['customers']:,} customers indexed in {meta['build_seconds']}s "
+              f"({meta['invalid_rows']} invalid rows skipped, "
+              f"{meta['duplicate_ids']} repeated IDs replaced)")
+        return 0
+
+    name = current_name(args.index_dir)
+    if name is None:
+        print(f"No score index in {args.index_dir}; run 'python score_index.py build' first")
+        return 1
+    index = ScoreIndex(os.path.join(args.index_dir, name))
+    record = index.lookup(args.customer_id)
+    if record is None:
+        print(f"Customer {args.customer_id} is not in the index")
+        return 1
+    print(json.dumps(dict(record, model_version=index.version), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Shadow Model Scoring
+
+Scores a candidate model on copies of live traffic without touching the
+request path. Requests hand their features and the primary model's
+probabilities to a bounded queue; a small pool of worker threads scores the
+candidate and aggregates agreement statistics in memory. When the queue is
+full the shadow work is dropped (and counted) instead of waiting.
+"""
+
+import queue
+import threading
+from datetime import datetime
+
+import numpy as np
+
+
+class ShadowScorer:
+    """
+    Compare a candidate model with the primary model on live traffic.
+
+    Parameters:
+    -----------
+    candidate : model with predict_proba
+        Model being evaluated
+    version : str
+        Label for the candidate, reported with the statistics
+    queue_size : int
+        Maximum number of pending requests before shadow work is dropped
+    workers : int
+        Number of background scoring threads
+    """
+
+    def __init__(self, candidate, version, queue_size=1000, workers=2):
+        self.candidate = candidate
+        self.version = version
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.reset()
+
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f'shadow-{i}', daemon=True)
+            thread.start()
+
+    def reset(self):
+        """Clear the aggregated statistics"""
+        with self._lock:
+            self.started_at = datetime.now().isoformat()
+            self.requests = 0
+            self.rows = 0
+            self.agreements = 0
+            self.delta_sum = 0.0
+            self.delta_max = 0.0
+            self.dropped = 0
+            self.failed = 0
+
+    def submit(self, features, primary_proba):
+        """
+        Queue a copy of a request for shadow scoring. Never blocks.
+
+        Parameters:
+        -----------
+        features : np.ndarray, shape (n_rows, n_features)
+        primary_proba : np.ndarray, shape (n_rows, n_classes)
+
+        Returns:
+        --------
+        accepted : bool
+            False if the queue was full and the work was dropped
+        """
+        try:
+            self._queue.put_nowait((np.array(features, copy=True),
+                                    np.array(primary_proba, copy=True)))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _work(self):
+        while True:
+            features, primary_proba = self._queue.get()
+            try:
+                shadow_proba = self.candidate.predict_proba(features)
+                agree = np.argmax(shadow_proba, axis=1) == np.argmax(primary_proba, axis=1)
+                delta = np.abs(shadow_proba[:, 1] - primary_proba[:, 1])
+                with self._lock:
+                    self.requests += 1
+                    self.rows += len(features)
+                    self.agreements += int(agree.sum())
+                    self.delta_sum += float(delta.sum())
+                    self.delta_max = max(self.delta_max, float(delta.max()))
+            except Exception as e:
+                print(f"✗ Shadow scoring failed: {e}")
+                with self._lock:
+                    self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def wait(self):
+        """Block until all queued shadow work has been scored"""
+        self._queue.join()
+
+    def stats(self):
+        """Snapshot of the aggregated comparison"""
+        with self._lock:
+            rows = self.rows
+            return {
+                'candidate_version': self.version,
+                'since': self.started_at,
+                'requests_scored': self.requests,
+                'rows_scored': rows,
+                'agreement_rate': self.agreements / rows if rows else None,
+                'mean_probability_delta': self.delta_sum / rows if rows else None,
+                'max_probability_delta': self.delta_max if rows else None,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'queue_depth': self._queue.qsize(),
+            }
@@ -0,0 +1,308 @@
+"""
+What-If Sensitivity Sweep
+
+Scores the purchase probability over a dense age × salary grid in one
+vectorized model call. It then finds, for every age, the salary at which
+the prediction flips to "will buy". The grid brackets each flip, and the
+salary is refined by bisection on the probability surface. All ages are
+bisected together, one model call per step.
+
+Every scored point is cached on disk under the model's content hash.
+Sweeps over overlapping ranges only score the points they have not seen,
+and a new model starts a new cache.
+
+Usage:
+    python sweep.py --age 18:70 --salary 15000:150000:1000 [--threshold 0.5] [--output sweep]
+
+Writes <output>_grid.csv, <output>_thresholds.csv and <output>.png.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from model_runtime import load_model
+from model_store import file_version
+
+MODEL_PATH = 'purchase_model.npz'
+CACHE_DIR = '.sweep_cache'
+
+
+class SweepCache:
+    """
+    Purchase probabilities already scored by one model version.
+
+    Points are stored as complex numbers (age + 1j * salary), which NumPy
+    sorts by age and then salary, so lookups are one searchsorted.
+
+    Parameters:
+    -----------
+    version : str
+        Model content hash; each version has its own cache file
+    directory : str, optional
+        Where the cache is persisted (None keeps it in memory only)
+    """
+
+    def __init__(self, version, directory=CACHE_DIR):
+        self.version = version
+        self.path = os.path.join(directory, f'{version}.npz') if directory else None
+        self.keys = np.empty(0, dtype=np.complex128)
+        self.values = np.empty(0, dtype=np.float64)
+        if self.path and os.path.exists(self.path):
+            with np.load(self.path) as data:
+                self.keys, self.values = data['keys'], data['values']
+
+    def lookup(self, keys):
+        """Cached probabilities for keys, and a mask of which were found"""
+        if not len(self.keys):
+            return np.zeros(len(keys)), np.zeros(len(keys), dtype=bool)
+        index = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = self.keys[index] == keys
+        return np.where(found, self.values[index], 0.0), found
+
+    def add(self, keys, values):
+        keys = np.concatenate([self.keys, keys])
+        values = np.concatenate([self.values, values])
+        self.keys, first = np.unique(keys, return_index=True)
+        self.values = values[first]
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.tmp.npz'
+        np.savez(tmp_path, keys=self.keys, values=self.values)
+        os.replace(tmp_path, self.path)
+
+
+class SweepScorer:
+    """
+    Purchase probability of (age, salary) points, through the cache.
+
+    Parameters:
+    -----------
+    model : CompactForest or compatible
+        Anything with predict_proba on raw age/salary
+    cache : SweepCache, optional
+    """
+
+    def __init__(self, model, cache=None):
+        self.model = model
+        self.cache = cache
+        self.purchase_column = int(np.flatnonzero(model.classes_ == 1)[0])
+        self.scored = 0
+        self.reused = 0
+
+    def __call__(self, ages, salaries):
+        ages = np.asarray(ages, dtype=np.float64).ravel()
+        salaries = np.asarray(salaries, dtype=np.float64).ravel()
+        if self.cache is None:
+            self.scored += len(ages)
+            return self._score(ages, salaries)
+
+        keys = ages + 1j * salaries
+        values, found = self.cache.lookup(keys)
+        missing = ~found
+        if missing.any():
+            # Score each new point once, even if it is repeated
+            new_keys, inverse = np.unique(keys[missing], return_inverse=True)
+            new_values = self._score(new_keys.real, new_keys.imag)
+            values[missing] = new_values[inverse.ravel()]
+            self.cache.add(new_keys, new_values)
+            self.scored += len(new_keys)
+        self.reused += int(found.sum())
+        return values
+
+    def _score(self, ages, salaries):
+        if not len(ages):
+            return np.empty(0)
+        return self.model.predict_proba(np.column_stack([ages, salaries]))[:, self.purchase_column]
+
+
+def parse_range(text):
+    """'start:stop[:step]' (stop included) as an array"""
+    parts = [float(p) for p in text.split(':')]
+    if len(parts) == 2:
+        parts.append(1.0)
+    if len(parts) != 3 or parts[2] <= 0 or parts[1] < parts[0]:
+        raise ValueError(f"Expected start:stop[:step] with stop >= start and step > 0, got '{text}'")
+    start, stop, step = parts
+    return np.arange(start, stop + step / 2, step)
+
+
+def sweep_grid(scorer, ages, salaries):
+    """
+    Purchase probability for every (age, salary) pair.
+
+    Returns:
+    --------
+    probabilities : np.ndarray, shape (len(ages), len(salaries))
+    """
+    age_grid, salary_grid = np.meshgrid(ages, salaries, indexing='ij')
+    return scorer(age_grid, salary_grid).reshape(len(ages), len(salaries))
+
+
+def decision_thresholds(scorer, ages, salaries, probabilities, threshold=0.5, tolerance=1.0):
+    """
+    Lowest salary at which each age is predicted to buy.
+
+    The first grid step where the probability reaches `threshold` brackets
+    the flip. Bisection then narrows every bracket to `tolerance`, one model
+    call per step for all ages together.
+
+    Returns:
+    --------
+    thresholds : dict of np.ndarray
+        'salary' (NaN when no salary in range flips the prediction),
+        'status' ('crosses', 'always' or 'never') and 'crossings' (how often
+        the prediction flips along the salary axis; more than 1 means the
+        surface is not monotone in salary)
+    """
+    buys = probabilities >= threshold
+    crossings = np.count_nonzero(np.diff(buys.astype(np.int8), axis=1), axis=1)
+    first = np.argmax(buys, axis=1)
+    always = buys[:, 0]
+    never = ~buys.any(axis=1)
+    crosses = ~always & ~never
+
+    salary = np.full(len(ages), np.nan)
+    salary[always] = salaries[0]
+
+    rows = np.flatnonzero(crosses)
+    low = salaries[first[rows] - 1].astype(np.float64)
+    high = salaries[first[rows]].astype(np.float64)
+    while len(rows) and np.max(high - low) > tolerance:
+        middle = (low + high) / 2
+        above = scorer(ages[rows], middle) >= threshold
+        high = np.where(above, middle, high)
+        low = np.where(above, low, middle)
+    salary[rows] = high
+
+    status = np.where(always, 'always', np.where(never, 'never', 'crosses'))
+    return {'salary': salary, 'status': status, 'crossings': crossings}
+
+
+def write_grid_csv(path, ages, salaries, probabilities):
+    age_grid, salary_grid = np.meshgrid(ages, salaries, indexing='ij')
+    table = np.column_stack([age_grid.ravel(), salary_grid.ravel(), probabilities.ravel()])
+    np.savetxt(path, table, delimiter=',', fmt=['%g', '%g', '%.6f'],
+               header='age,salary,purchase_probability', comments='')
+
+
+def write_thresholds_csv(path, ages, thresholds):
+    with open(path, 'w') as f:
+        f.write('age,threshold_salary,status,crossings\n')
+        for age, salary, status, count in zip(ages, thresholds['salary'],
+                                              thresholds['status'], thresholds['crossings']):
+            value = '' if np.isnan(salary) else f'{salary:.2f}'
+            f.write(f'{age:g},{value},{status},{count}\n')
+
+
+def plot_sweep(path, ages, salaries, probabilities, thresholds, threshold=0.5):
+    """Probability heatmap with the per-age decision threshold overlaid"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    mesh = ax.pcolormesh(ages, salaries, probabilities.T, cmap='RdYlGn', vmin=0, vmax=1,
+                         shading='nearest')
+    fig.colorbar(mesh, ax=ax, label='Purchase probability')
+    ax.plot(ages, thresholds['salary'], color='black', linewidth=2,
+            label=f'Salary where P(purchase) reaches {threshold:g}')
+    ax.set_xlabel('Age')
+    ax.set_ylabel('Salary')
+    ax.set_title('What-If Sweep: Purchase Probability by Age and Salary')
+    ax.legend(loc='upper right')
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+    plt.close(fig)
+
+
+def run_sweep(model, version, ages, salaries, threshold=0.5, tolerance=1.0, cache_dir=CACHE_DIR):
+    """
+    Grid and thresholds for one sweep, reusing and updating the cache.
+
+    Returns:
+    --------
+    probabilities : np.ndarray, shape (len(ages), len(salaries))
+    thresholds : dict
+    scorer : SweepScorer
+        Its scored/reused counters show how much the cache saved
+    """
+    cache = SweepCache(version, cache_dir)
+    scorer = SweepScorer(model, cache)
+    probabilities = sweep_grid(scorer, ages, salaries)
+    thresholds = decision_thresholds(scorer, ages, salaries, probabilities, threshold, tolerance)
+    cache.save()
+    return probabilities, thresholds, scorer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep purchase probability over age and salary')
+    parser.add_argument('--age', default='18:70', help='start:stop[:step], stop included')
+    parser.add_argument('--salary', default='15000:150000:1000', help='start:stop[:step]')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Probability at which a customer counts as "will buy"')
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help='Salary precision of the bisection')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default='sweep', help='Prefix of the files written')
+    parser.add_argument('--no-cache', action='store_true', help='Score every point again')
+    args = parser.parse_args()
+
+    ages = parse_range(args.age)
+    salaries = parse_range(args.salary)
+    if len(salaries) < 2:
+        parser.error('--salary needs at least two points to bracket thresholds')
+    model = load_model(args.model)
+    version = file_version(args.model)
+
+    print("=" * 70)
+    print("WHAT-IF SWEEP")
+    print("=" * 70)
+    print(f"Model version: {version}")
+    print(f"Grid: {len(ages)} ages × {len(salaries)} salaries = {len(ages) * len(salaries):,} points")
+
+    started = time.perf_counter()
+    probabilities, thresholds, scorer = run_sweep(
+        model, version, ages, salaries, args.threshold, args.tolerance,
+        cache_dir=None if args.no_cache else CACHE_DIR)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {scorer.scored:,} new points, reused {scorer.reused:,} from the cache "
+          f"in {elapsed * 1000:.1f} ms")
+
+    print("\n" + "-" * 70)
+    print(f"{'Age':<6} {'Buys from salary':<20} {'Status':<10} {'Flips'}")
+    print("-" * 70)
+    step = max(1, len(ages) // 15)
+    for i in range(0, len(ages), step):
+        salary = thresholds['salary'][i]
+        if np.isnan(salary):
+            text = '-'
+        elif thresholds['status'][i] == 'always':
+            text = f"≤ ${salary:,.0f}"
+        else:
+            text = f"${salary:,.0f}"
+        print(f"{ages[i]:<6g} {text:<20} {thresholds['status'][i]:<10} {thresholds['crossings'][i]}")
+    print("-" * 70)
+    non_monotone = int(np.sum(thresholds['crossings'] > 1))
+    if non_monotone:
+        print(f"Note: {non_monotone} age(s) flip more than once along salary; "
+              f"the threshold is the lowest flip")
+
+    grid_path = f'{args.output}_grid.csv'
+    thresholds_path = f'{args.output}_thresholds.csv'
+    plot_path = f'{args.output}.png'
+    write_grid_csv(grid_path, ages, salaries, probabilities)
+    write_thresholds_csv(thresholds_path, ages, thresholds)
+    plot_sweep(plot_path, ages, salaries, probabilities, thresholds, args.threshold)
+    print(f"\n✓ Saved {grid_path}, {thresholds_path} and {plot_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Admission Control Tests
+
+Checks the admission controller's limits, priorities, wait queue and
+counters, and the API's 503 and 413 responses. Latency under overload is
+measured by load_test.py, which is run by hand rather than in CI.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('JOBS_DIR', tempfile.mkdtemp(prefix='test-jobs-'))
+os.environ.setdefault('PREDICTION_LOG_DIR', tempfile.mkdtemp(prefix='test-logs-'))
+os.environ.setdefault('SCORE_INDEX_DIR', tempfile.mkdtemp(prefix='test-score-index-'))
+
+from admission import AdmissionController, Overloaded
+from app import admission, app, model_store
+
+client = app.test_client()
+
+# The model loads in the background; wait for it before sending requests
+model_store.wait_until_ready(60)
+
+
+def test_limits_and_priority():
+    """Test slot limits, the batch share and single-prediction priority"""
+    print("\n🔍 Test 1: Checking admission limits...")
+
+    controller = AdmissionController(max_in_flight=3, max_batch_in_flight=2, single_wait=0)
+    controller.acquire('batch')
+    controller.acquire('batch')
+    try:
+        controller.acquire('batch')
+        raise AssertionError("❌ Third batch admitted past max_batch_in_flight!")
+    except Overloaded as e:
+        assert e.retry_after == 1, "❌ Missing retry hint!"
+
+    controller.acquire('single')  # the slot kept free for singles
+    try:
+        controller.acquire('single')
+        raise AssertionError("❌ Admitted past max_in_flight!")
+    except Overloaded:
+        pass
+
+    stats = controller.stats()
+    assert stats['in_flight'] == {'single': 1, 'batch': 2}, "❌ Wrong in-flight counts!"
+    assert stats['shed'] == {'single': 1, 'batch': 1}, "❌ Wrong shed counts!"
+
+    # A waiting single gets the next free slot ahead of any batch
+    waiter = AdmissionController(max_in_flight=1, single_wait=2.0)
+    waiter.acquire('batch')
+    admitted = []
+    thread = threading.Thread(target=lambda: admitted.append(waiter.acquire('single') is None))
+    thread.start()
+    while waiter.stats()['queue_depth'] == 0:
+        time.sleep(0.001)
+    try:
+        waiter.acquire('batch')
+        raise AssertionError("❌ Batch jumped the single-prediction queue!")
+    except Overloaded:
+        pass
+    waiter.release('batch')
+    thread.join(5)
+    assert admitted == [True], "❌ Waiting single was not admitted!"
+
+    assert not controller.allow_rows(10001) and controller.allow_rows(10000), \
+        "❌ Wrong batch row limit!"
+
+    print("✅ Batches capped at their share, singles served first")
+
+
+def test_api_sheds_with_retry_after():
+    """Test the API answers 503 with Retry-After when full, and 413 for huge batches"""
+    print("\n🔍 Test 2: Shedding requests in the API...")
+
+    held = 0
+    try:
+        while True:
+            admission.acquire('single')
+            held += 1
+    except Overloaded:
+        pass
+
+    try:
+        started = time.perf_counter()
+        shed = client.post('/predict', json={'age': 45, 'salary': 75000})
+        elapsed = time.perf_counter() - started
+        batch = client.post('/predict/batch', json={'customers': [{'age': 45, 'salary': 75000}]})
+        health = client.get('/health')
+    finally:
+        for _ in range(held):
+            admission.release('single')
+
+    assert shed.status_code == 503 and shed.headers.get('Retry-After') == '1', \
+        f"❌ Expected 503 with Retry-After, got {shed.status_code}"
+    assert batch.status_code == 503, "❌ Batch admitted while full!"
+    assert health.status_code == 200, "❌ Health check was shed!"
+    assert elapsed < 0.5, f"❌ Shedding took {elapsed:.3f}s"
+
+    ok = client.post('/predict', json={'age': 45, 'salary': 75000})
+    assert ok.status_code == 200, "❌ Slots not released!"
+    customers = [{'age': 45, 'salary': 75000}] * (admission.max_batch_rows + 1)
+    too_large = client.post('/predict/batch', json={'customers': customers})
+    assert too_large.status_code == 413, f"❌ Expected 413, got {too_large.status_code}"
+
+    stats = client.get('/admin/admission').get_json()
+    assert stats['in_flight'] == {'single': 0, 'batch': 0}, "❌ Slots leaked!"
+    assert stats['shed']['single'] >= 1 and stats['oversized_batches'] >= 1, \
+        "❌ Shed requests not counted!"
+
+    print(f"✅ 503 in {elapsed * 1000:.1f} ms while full, 413 for "
+          f"{len(customers):,} customers, health checks unaffected")
+
+
+def test_queue_bound_and_counts():
+    """Test waiting singles never exceed the slots, and every request is counted once"""
+    print("\n🔍 Test 3: Checking the wait queue and admission counts...")
+
+    controller = AdmissionController(max_in_flight=2, max_batch_in_flight=1, single_wait=5.0)
+    controller.acquire('batch')
+    controller.acquire('single')
+    try:
+        controller.acquire('batch')
+        raise AssertionError("❌ Batch admitted while full!")
+    except Overloaded:
+        pass
+
+    peak = []
+    lock = threading.Lock()
+
+    def single():
+        controller.acquire('single')
+        with lock:
+            stats = controller.stats()
+            peak.append(sum(stats['in_flight'].values()))
+        controller.release('single')
+
+    threads = [threading.Thread(target=single) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while controller.stats()['queue_depth'] < 3:
+        time.sleep(0.001)
+    assert controller.stats()['in_flight'] == {'single': 1, 'batch': 1}, \
+        "❌ Waiting singles took slots!"
+    controller.release('single')
+    for thread in threads:
+        thread.join(5)
+
+    stats = controller.stats()
+    assert max(peak) <= 2, f"❌ {max(peak)} requests in flight with 2 slots!"
+    assert stats['queue_depth'] == 0, "❌ Waiters left in the queue!"
+    assert stats['admitted'] == {'single': 4, 'batch': 1}, f"❌ Wrong admitted counts: {stats}"
+    assert stats['shed'] == {'single': 0, 'batch': 1}, f"❌ Wrong shed counts: {stats}"
+
+    # Through the API: each answered request is admitted, each 503 is shed
+    before = client.get('/admin/admission').get_json()
+    for _ in range(5):
+        assert client.post('/predict', json={'age': 45, 'salary': 75000}).status_code == 200, \
+            "❌ Prediction failed with free slots!"
+    held = 0
+    try:
+        while True:
+            admission.acquire('single')
+            held += 1
+    except Overloaded:
+        pass
+    try:
+        shed = [client.post('/predict', json={'age': 45, 'salary': 75000}) for _ in range(3)]
+    finally:
+        for _ in range(held):
+            admission.release('single')
+    after = client.get('/admin/admission').get_json()
+
+    assert all(r.status_code == 503 and r.headers.get('Retry-After') == '1' for r in shed), \
+        "❌ Overflow not answered with 503 and Retry-After!"
+    assert after['admitted']['single'] - before['admitted']['single'] == 5 + held, \
+        "❌ Wrong admitted count!"
+    assert after['shed']['single'] - before['shed']['single'] == 4, "❌ Wrong shed count!"
+
+    print("✅ At most 2 of 2 slots used with 3 singles waiting; counts match the responses")
+
+
+def run_all_tests():
+    """Run all admission control tests"""
+    print("=" * 60)
+    print("🧪 STARTING ADMISSION CONTROL TESTS")
+    print("=" * 60)
+
+    try:
+        test_limits_and_priority()
+        test_api_sheds_with_retry_after()
+        test_queue_bound_and_counts()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
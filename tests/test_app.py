@@ -0,0 +1,768 @@
+"""
+API Server Tests
+
+Exercises app.py through the Flask test client, so no running server is
+needed.
+"""
+
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep batch job and prediction log files out of the working tree
+os.environ.setdefault('JOBS_DIR', tempfile.mkdtemp(prefix='test-jobs-'))
+os.environ.setdefault('PREDICTION_LOG_DIR', tempfile.mkdtemp(prefix='test-logs-'))
+os.environ.setdefault('SCORE_INDEX_DIR', tempfile.mkdtemp(prefix='test-score-index-'))
+
+import app as app_module
+from app import app, drift, jobs, model_store, prediction_log, score_indexes
+from batch_jobs import JobManager, JobQueueFull
+from memory_report import UNUSED_COMPONENTS
+from model_store import ModelStore, publish_model
+from score_index import build_index
+from shadow import ShadowScorer
+
+client = app.test_client()
+
+# The model loads in the background; wait for it before sending requests
+model_store.wait_until_ready(60)
+
+
+def test_health_reports_model_version():
+    """Test /health reports the active model version"""
+    print("\n🔍 Test 1: Checking /health...")
+
+    data = client.get('/health').get_json()
+    assert data['model_loaded'], "❌ Model not loaded!"
+    assert data['model_version'] == model_store.active.version, "❌ Wrong model version!"
+
+    print(f"✅ Serving model version {data['model_version']}")
+
+
+def test_predictions_report_model_version():
+    """Test prediction responses include the model version"""
+    print("\n🔍 Test 2: Checking model version in responses...")
+
+    single = client.post('/predict', json={'age': 45, 'salary': 75000}).get_json()
+    batch = client.post('/predict/batch', json={'customers': [{'age': 45, 'salary': 75000}]}).get_json()
+    assert single['model_version'] == model_store.active.version, "❌ /predict missing version!"
+    assert batch['model_version'] == model_store.active.version, "❌ /predict/batch missing version!"
+
+    print("✅ Responses include the model version")
+
+
+def test_hot_reload_swaps_version():
+    """Test publishing a new version and reloading swaps it in"""
+    print("\n🔍 Test 3: Hot reloading a new model version...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ModelStore(model_dir=tmp)
+        publish_model('purchase_model.npz', model_dir=tmp, version='20240101-000000')
+        first = store.load_latest()
+        assert first.version == '20240101-000000', "❌ Wrong initial version!"
+
+        publish_model('purchase_model.npz', model_dir=tmp, version='20240102-000000')
+        store.check_for_update()
+        while store.reloading:
+            time.sleep(0.01)
+        assert store.active.version == '20240102-000000', "❌ New version not swapped in!"
+
+        # The old version object is untouched for requests still using it
+        assert first.model.predict_proba([[45, 75000]]).shape == (1, 2), "❌ Old version unusable!"
+
+        # Explicit rollback is not undone by the watcher
+        store.reload('20240101-000000', wait=True)
+        store.check_for_update()
+        assert store.active.version == '20240101-000000', "❌ Rollback was undone!"
+
+    print("✅ New versions are swapped in and rollbacks stick")
+
+
+def test_admin_reload_unknown_version():
+    """Test /admin/reload rejects unknown versions"""
+    print("\n🔍 Test 4: Reloading an unknown version...")
+
+    response = client.post('/admin/reload', json={'version': 'does-not-exist'})
+    assert response.status_code == 404, f"❌ Expected 404, got {response.status_code}"
+
+    print("✅ Unknown versions are rejected")
+
+
+class _SlowModel:
+    """Candidate that blocks until released, to fill the shadow queue"""
+
+    def __init__(self, model):
+        self.model = model
+        self.release = threading.Event()
+
+    def predict_proba(self, X):
+        self.release.wait()
+        return self.model.predict_proba(X)
+
+
+def test_shadow_scoring_agreement():
+    """Test shadow scorer aggregates agreement off the request path"""
+    print("\n🔍 Test 5: Shadow scoring the serving model against itself...")
+
+    model = model_store.active.model
+    scorer = ShadowScorer(model, version='self', queue_size=10, workers=2)
+    X = np.array([[25, 30000], [45, 75000], [35, 50000]], dtype=float)
+    for _ in range(5):
+        scorer.submit(X, model.predict_proba(X))
+    scorer.wait()
+
+    stats = scorer.stats()
+    assert stats['rows_scored'] == 15, f"❌ Expected 15 rows, got {stats['rows_scored']}"
+    assert stats['agreement_rate'] == 1.0, "❌ Identical models should always agree!"
+    assert stats['max_probability_delta'] == 0.0, "❌ Identical models should have no delta!"
+
+    print("✅ Shadow statistics aggregated correctly")
+
+
+def test_shadow_drops_when_full():
+    """Test shadow work is dropped instead of blocking when the queue is full"""
+    print("\n🔍 Test 6: Filling the shadow queue...")
+
+    slow = _SlowModel(model_store.active.model)
+    scorer = ShadowScorer(slow, version='slow', queue_size=2, workers=1)
+    X = np.array([[45, 75000]], dtype=float)
+    proba = slow.model.predict_proba(X)
+
+    start = time.perf_counter()
+    accepted = [scorer.submit(X, proba) for _ in range(10)]
+    elapsed = time.perf_counter() - start
+    slow.release.set()
+    scorer.wait()
+
+    assert not all(accepted), "❌ Full queue should drop shadow work!"
+    assert scorer.stats()['dropped'] == accepted.count(False), "❌ Drops not counted!"
+    assert elapsed < 0.5, f"❌ submit() blocked for {elapsed:.2f}s"
+
+    print(f"✅ Dropped {accepted.count(False)} of 10 without blocking")
+
+
+def test_batch_validation_matches_single():
+    """Test /predict and /predict/batch reject the same inputs the same way"""
+    print("\n🔍 Test 7: Comparing single and batch validation...")
+
+    customers = [
+        {'age': 35, 'salary': 50000},
+        {'age': 25},
+        {'age': 'abc', 'salary': 50000},
+        {'age': -5, 'salary': 50000},
+        {'age': 35, 'salary': -1},
+        {'age': '45', 'salary': '75000'},
+        {'age': 'nan', 'salary': 50000},
+        'not-an-object',
+    ]
+    batch = client.post('/predict/batch', json={'customers': customers}).get_json()
+    batch_errors = {e['index']: e['error'] for e in batch['errors']}
+
+    for idx, customer in enumerate(customers):
+        response = client.post('/predict', json=customer)
+        single = response.get_json()
+        if idx in batch_errors:
+            assert response.status_code == 400, f"❌ Row {idx} accepted by /predict only!"
+            assert single['error'] == batch_errors[idx], \
+                f"❌ Row {idx}: '{single['error']}' vs '{batch_errors[idx]}'"
+        else:
+            assert response.status_code == 200, f"❌ Row {idx} rejected by /predict only!"
+
+    assert batch['successful'] == 2 and batch['failed'] == 6, "❌ Wrong batch counts!"
+    assert batch_errors[1] == 'Missing required fields', "❌ Missing salary must not default to 0!"
+
+    print("✅ Both endpoints apply the same validation")
+
+
+def test_batch_matches_single_predictions():
+    """Test vectorized batch scoring matches per-customer scoring"""
+    print("\n🔍 Test 8: Comparing batch and single predictions...")
+
+    rng = np.random.default_rng(0)
+    customers = [{'age': int(a), 'salary': int(s)}
+                 for a, s in zip(rng.integers(18, 70, 50), rng.integers(15000, 150000, 50))]
+    batch = client.post('/predict/batch', json={'customers': customers}).get_json()
+
+    for result in batch['results']:
+        single = client.post('/predict', json=customers[result['index']]).get_json()
+        assert single['prediction'] == result['prediction'], \
+            f"❌ Row {result['index']} differs between endpoints!"
+
+    print(f"✅ {len(customers)} batch predictions match /predict")
+
+
+def _batch_payload(n):
+    rng = np.random.default_rng(1)
+    return {'customers': [{'age': int(a), 'salary': int(s)}
+                          for a, s in zip(rng.integers(18, 70, n), rng.integers(15000, 150000, n))]}
+
+
+def test_gzip_request_body():
+    """Test gzip-compressed request bodies are accepted"""
+    print("\n🔍 Test 9: Sending a gzip request body...")
+
+    payload = _batch_payload(200)
+    body = gzip.compress(json.dumps(payload).encode())
+    response = client.post('/predict/batch', data=body, headers={
+        'Content-Type': 'application/json',
+        'Content-Encoding': 'gzip'
+    })
+    assert response.status_code == 200, f"❌ Expected 200, got {response.status_code}"
+    assert response.get_json()['successful'] == 200, "❌ Not all customers scored!"
+
+    bad = client.post('/predict/batch', data=b'not gzip', headers={
+        'Content-Type': 'application/json',
+        'Content-Encoding': 'gzip'
+    })
+    assert bad.status_code == 400, f"❌ Invalid gzip should be 400, got {bad.status_code}"
+
+    print("✅ gzip request bodies are decompressed; invalid ones rejected")
+
+
+def test_gzip_response_negotiation():
+    """Test large responses are gzipped only when the client accepts it"""
+    print("\n🔍 Test 10: Negotiating compressed responses...")
+
+    payload = _batch_payload(500)
+    plain = client.post('/predict/batch', json=payload)
+    assert 'Content-Encoding' not in plain.headers, "❌ Compressed without Accept-Encoding!"
+
+    compressed = client.post('/predict/batch', json=payload, headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers.get('Content-Encoding') == 'gzip', "❌ Large response not compressed!"
+    assert 'Content-Length' not in compressed.headers, "❌ Streamed response has a Content-Length!"
+    assert 'Accept-Encoding' in compressed.headers.get('Vary', ''), "❌ Missing Vary header!"
+    unpacked = json.loads(gzip.decompress(compressed.data))
+    expected = plain.get_json()
+    unpacked.pop('timestamp')
+    expected.pop('timestamp')
+    assert unpacked == expected, "❌ Compressed body differs!"
+    print(f"  {len(plain.data):,} bytes -> {len(compressed.data):,} bytes")
+
+    refused = client.post('/predict/batch', json=payload, headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in refused.headers, "❌ Ignored gzip;q=0!"
+
+    print("✅ Responses are compressed only when accepted")
+
+
+def test_small_response_not_compressed():
+    """Test responses below the size threshold keep an exact Content-Length"""
+    print("\n🔍 Test 11: Checking small responses skip compression...")
+
+    response = client.post('/predict', json={'age': 45, 'salary': 75000},
+                           headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers, "❌ Small response was compressed!"
+    assert int(response.headers['Content-Length']) == len(response.data), \
+        "❌ Content-Length does not match the body!"
+
+    print(f"✅ {len(response.data)}-byte response sent uncompressed")
+
+
+def _wait_for_job(job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f'/jobs/{job_id}').get_json()
+        if status['status'] in ('completed', 'failed'):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"❌ Job {job_id} did not finish in {timeout}s")
+
+
+def test_batch_job_matches_batch_endpoint():
+    """Test a background job returns the same results as /predict/batch"""
+    print("\n🔍 Test 12: Running a background batch job...")
+
+    payload = _batch_payload(250)
+    payload['customers'][7] = {'age': 40}
+    payload['customers'][123] = {'age': 200, 'salary': 50000}
+
+    # Small chunks so the job is scored in several model calls
+    chunk_size = jobs.chunk_size
+    jobs.chunk_size = 100
+    try:
+        response = client.post('/jobs', json=payload)
+        assert response.status_code == 202, f"❌ Expected 202, got {response.status_code}"
+        job_id = response.get_json()['job_id']
+        status = _wait_for_job(job_id)
+    finally:
+        jobs.chunk_size = chunk_size
+
+    assert status['status'] == 'completed', f"❌ Job failed: {status['error']}"
+    assert status['progress'] == 1.0 and status['processed'] == 250, "❌ Wrong progress!"
+    assert status['model_version'] == model_store.active.version, "❌ Model version not recorded!"
+
+    result = client.get(f'/jobs/{job_id}/result')
+    assert result.mimetype == 'application/x-ndjson', "❌ Wrong result type!"
+    rows = [json.loads(line) for line in result.data.decode().splitlines()]
+    assert [row['index'] for row in rows] == list(range(250)), "❌ Rows missing or out of order!"
+
+    batch = client.post('/predict/batch', json=payload).get_json()
+    assert [r for r in rows if 'error' not in r] == batch['results'], "❌ Results differ!"
+    assert [r for r in rows if 'error' in r] == batch['errors'], "❌ Errors differ!"
+    assert status['failed'] == 2 and status['successful'] == 248, "❌ Wrong counts!"
+
+    print(f"✅ Job {job_id[:8]} scored {status['processed']} customers like /predict/batch")
+
+
+def test_batch_job_csv_upload():
+    """Test a CSV file can be submitted as a job"""
+    print("\n🔍 Test 13: Uploading a CSV file as a job...")
+
+    csv_data = b"Age,Salary\n45,75000\n25,30000\nabc,40000\n"
+    response = client.post('/jobs', data={'file': (io.BytesIO(csv_data), 'customers.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202, f"❌ Expected 202, got {response.status_code}"
+    job_id = response.get_json()['job_id']
+    assert response.get_json()['total'] == 3, "❌ Rows not counted!"
+
+    early = client.get('/jobs/unknown/result')
+    assert early.status_code == 404, "❌ Unknown job should be 404!"
+
+    status = _wait_for_job(job_id)
+    assert status['successful'] == 2 and status['failed'] == 1, "❌ Wrong counts!"
+    rows = [json.loads(line) for line in client.get(f'/jobs/{job_id}/result').data.splitlines()]
+    expected = client.post('/predict', json={'age': 45, 'salary': 75000}).get_json()
+    assert rows[0]['prediction'] == expected['prediction'], "❌ CSV row scored differently!"
+    assert rows[2]['error'] == 'Invalid data type', "❌ Bad CSV value not reported!"
+
+    print("✅ CSV uploads are scored like JSON customers")
+
+
+def test_batch_job_queue_limit():
+    """Test submissions are refused once the job queue is full"""
+    print("\n🔍 Test 14: Filling the job queue...")
+
+    release = threading.Event()
+
+    def slow_chunk(pinned, customers, offset):
+        release.wait(10)
+        return [{'index': offset + i} for i in range(len(customers))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = JobManager(slow_chunk, lambda: (None, 'test'), jobs_dir=tmp, max_pending=2)
+        first = manager.submit_customers([{'age': 45, 'salary': 75000}])
+        manager.submit_customers([{'age': 45, 'salary': 75000}])
+        try:
+            manager.submit_customers([{'age': 45, 'salary': 75000}])
+            raise AssertionError("❌ Third job was accepted!")
+        except JobQueueFull:
+            pass
+        assert manager.result_path(first['job_id']) is None, "❌ Unfinished job has results!"
+
+        # Finished jobs free their slot
+        release.set()
+        while manager.status(first['job_id'])['status'] != 'completed':
+            time.sleep(0.01)
+        manager.submit_customers([{'age': 45, 'salary': 75000}])
+        manager._executor.shutdown(wait=True)
+
+    print("✅ Submissions beyond max_pending are refused")
+
+
+def test_finished_jobs_expire_without_submissions():
+    """Test expired jobs are deleted by the background sweep alone"""
+    print("\n🔍 Test 24: Expiring finished jobs without new submissions...")
+
+    def score(pinned, customers, offset):
+        return [{'index': offset + i} for i in range(len(customers))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = JobManager(score, lambda: (None, 'test'), jobs_dir=tmp,
+                             retention_seconds=0.2, cleanup_interval=0.05)
+        job_id = manager.submit_customers([{'age': 45, 'salary': 75000}])['job_id']
+        job_dir = os.path.join(tmp, job_id)
+        deadline = time.time() + 10
+        while (manager.status(job_id) is not None or os.path.exists(job_dir)) \
+                and time.time() < deadline:
+            time.sleep(0.05)
+        assert manager.status(job_id) is None, "❌ Expired job was not cleaned up!"
+        assert not os.path.exists(job_dir), "❌ Job directory left behind!"
+        manager.close()
+
+    print("✅ Finished jobs are deleted after the retention period")
+
+
+def test_reload_serialized_with_initial_load():
+    """Test a reload during the first background load cannot race it"""
+    print("\n🔍 Test 25: Reloading while the first model is loading...")
+
+    def gated_store(tmp, thread_name, gate):
+        store = ModelStore(model_dir=tmp)
+        warm_up = store.warm_up
+
+        def slow_warm_up(model):
+            if threading.current_thread().name == thread_name:
+                gate.wait(10)
+            return warm_up(model)
+
+        store.warm_up = slow_warm_up
+        return store
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old = publish_model('purchase_model.npz', model_dir=tmp, version='20240101-000000')
+        new = publish_model('purchase_model.npz', model_dir=tmp, version='20240102-000000')
+
+        # The initial load holds the reload slot until it finishes
+        gate = threading.Event()
+        store = gated_store(tmp, 'model-loader', gate)
+        store.start_loading(retry_interval=0.05)
+        deadline = time.time() + 1
+        while not store.reloading and time.time() < deadline:
+            time.sleep(0.001)
+        result = store.reload(old)
+        gate.set()
+        assert result is None, "❌ Reload ran alongside the initial load!"
+        assert store.wait_until_ready(10), "❌ Model never became ready!"
+        assert store.active.version == new, "❌ Wrong version after the initial load!"
+
+        # A reload that starts first wins; the initial load keeps its version
+        gate = threading.Event()
+        store = gated_store(tmp, 'model-reload', gate)
+        assert store.reload(old) == old, "❌ Reload refused!"
+        store.start_loading(retry_interval=0.05)
+        gate.set()
+        deadline = time.time() + 10
+        while store.loading and time.time() < deadline:
+            time.sleep(0.01)
+        assert not store.loading, "❌ Initial load never finished!"
+        assert store.active.version == old, "❌ Initial load replaced the reloaded version!"
+        store.check_for_update()
+        assert not store.reloading and store.active.version == old, \
+            "❌ Watcher undid the reload!"
+
+    print("✅ Reloads and the initial load never overwrite each other")
+
+
+def test_admin_memory_report():
+    """Test /admin/memory reports model memory and request allocations"""
+    print("\n🔍 Test 15: Requesting the memory report...")
+
+    report = client.get('/admin/memory?batch_size=500&top=5').get_json()
+    model = model_store.active.model
+    assert report['structure']['total_nodes'] == len(model.feature), "❌ Wrong node count!"
+    assert report['structure']['depth']['max'] == model.max_depth, "❌ Wrong max depth!"
+    sizes = {c['component']: c['bytes'] for c in report['memory']['components']}
+    assert sizes['left'] == model.left.nbytes, "❌ Wrong component size!"
+    unused = sum(getattr(model, name).nbytes for name in UNUSED_COMPONENTS
+                 if getattr(model, name) is not None)
+    assert report['memory']['unused_bytes'] == unused, "❌ Unused arrays not flagged!"
+
+    batch = report['requests']['batch']
+    assert batch['batch_size'] == 500 and len(batch['sites']) == 5, "❌ Wrong trace shape!"
+    assert batch['peak_bytes'] > report['requests']['single']['peak_bytes'], \
+        "❌ Batch should allocate more than a single request!"
+    assert all(site['peak_bytes'] <= batch['peak_bytes'] for site in batch['sites']), \
+        "❌ A site exceeds the request peak!"
+
+    bad = client.get('/admin/memory?batch_size=0')
+    assert bad.status_code == 400, f"❌ Expected 400, got {bad.status_code}"
+
+    top = batch['sites'][0]
+    print(f"✅ Batch peak {batch['peak_bytes']:,} bytes, largest site {top['site']}")
+
+
+def test_predictions_are_logged():
+    """Test predictions reach the prediction log with version and latency"""
+    print("\n🔍 Test 16: Checking the prediction log...")
+
+    prediction_log.flush()
+    before = 0
+    if os.path.exists(prediction_log.path):
+        with open(prediction_log.path) as f:
+            before = sum(1 for _ in f)
+
+    client.post('/predict', json={'age': 45, 'salary': 75000})
+    client.post('/predict/batch', json={'customers': [{'age': 25, 'salary': 30000}, {'age': 40},
+                                                      {'age': 50, 'salary': 90000}]})
+    prediction_log.flush()
+
+    with open(prediction_log.path) as f:
+        lines = [json.loads(line) for line in f][before:]
+    assert [line['endpoint'] for line in lines] == ['/predict'] + ['/predict/batch'] * 2, \
+        f"❌ Unexpected log lines: {lines}"
+    assert [line['index'] for line in lines[1:]] == [0, 2], "❌ Invalid row was logged!"
+    assert all(line['model_version'] == model_store.active.version for line in lines), \
+        "❌ Wrong model version!"
+    assert all(line['latency_ms'] > 0 for line in lines), "❌ Missing latency!"
+
+    stats = client.get('/admin/prediction-log').get_json()
+    assert stats['requests_dropped'] == 0, "❌ Records were dropped!"
+
+    print(f"✅ {len(lines)} predictions logged, {stats['lines_written']} lines written so far")
+
+
+def test_drift_sketches_follow_traffic():
+    """Test scored rows update the drift sketches and shifted traffic is flagged"""
+    print("\n🔍 Test 17: Checking feature drift monitoring...")
+
+    assert client.post('/admin/drift/reset').status_code == 200, "❌ Reset failed!"
+    report = client.get('/admin/drift').get_json()
+    assert report['rows'] == 0 and report['status'] == 'insufficient_data', \
+        "❌ Reset did not clear the sketches!"
+
+    # Traffic drawn from the training data
+    rng = np.random.default_rng(8)
+    with open(os.path.join(ROOT, 'storepurchasedata_large.csv')) as f:
+        rows = [line.split(',') for line in f.read().split()[1:]]
+    sample = rng.choice(len(rows), 300, replace=False)
+    customers = [{'age': float(rows[i][0]), 'salary': float(rows[i][1])} for i in sample]
+    client.post('/predict/batch', json={'customers': customers + [{'age': 40}]})
+    client.post('/predict', json={'age': 45, 'salary': 75000})
+
+    report = client.get('/admin/drift').get_json()
+    assert report['rows'] == 301, f"❌ Expected 301 rows, got {report['rows']}"
+    assert report['features']['Age']['above_training_range'] == 0, "❌ Wrong out-of-range count!"
+    merged = sum(report['sketch']['sketches'][0]['counts'])
+    assert merged == 301, "❌ Snapshot does not match the report!"
+    baseline = report['max_psi']
+    assert report['status'] == 'stable', f"❌ Training-like traffic flagged: {baseline}"
+
+    # Much older, richer customers
+    shifted = [{'age': 75, 'salary': 200000 + i} for i in range(300)]
+    client.post('/predict/batch', json={'customers': shifted})
+    report = client.get('/admin/drift').get_json()
+    assert report['status'] == 'significant', f"❌ Shift not detected: {report['max_psi']}"
+    assert report['features']['Salary']['above_training_range'] == 300, \
+        "❌ Out-of-range salaries not counted!"
+
+    print(f"✅ PSI {baseline} for training-like traffic, {report['max_psi']} after the shift")
+
+
+def test_labels_only_predictions():
+    """Test label-only requests return the same labels without probabilities"""
+    print("\n🔍 Test 18: Checking label-only predictions...")
+
+    customers = [{'age': 20 + i % 50, 'salary': 15000 + 997 * i} for i in range(200)]
+    full = client.post('/predict/batch', json={'customers': customers}).get_json()
+    labels = client.post('/predict/batch', json={'customers': customers + [{'age': 40}],
+                                                 'labels_only': True}).get_json()
+    assert labels['successful'] == 200 and labels['failed'] == 1, "❌ Wrong counts!"
+    assert [r['prediction'] for r in labels['results']] == [
+        {'will_purchase': r['prediction']['will_purchase'], 'label': r['prediction']['label']}
+        for r in full['results']], "❌ Label-only results differ!"
+
+    single = client.post('/predict', json={'age': 45, 'salary': 75000, 'labels_only': True})
+    expected = client.post('/predict', json={'age': 45, 'salary': 75000}).get_json()
+    assert single.status_code == 200, "❌ Label-only single prediction failed!"
+    assert single.get_json()['prediction']['label'] == expected['prediction']['label'], \
+        "❌ Label-only single prediction differs!"
+    assert 'probabilities' not in single.get_json()['prediction'], "❌ Probabilities returned!"
+
+    prediction_log.flush()
+    with open(prediction_log.path) as f:
+        logged = [json.loads(line) for line in f][-2:]
+    assert logged[0]['purchase_probability'] is None, "❌ Label-only row logged a probability!"
+    assert logged[0]['prediction'] == int(single.get_json()['prediction']['will_purchase']), \
+        "❌ Wrong label logged!"
+
+    print("✅ Label-only predictions match the full predictions")
+
+
+def test_customer_score_index():
+    """Test precomputed customer scores match /predict and stale ones are rescored"""
+    print("\n🔍 Test 19: Checking the customer score index...")
+
+    assert client.get('/score/C1').status_code == 404, "❌ Score served without an index!"
+    customers = [(f'C{i}', 18 + i % 50, 15000 + 1000 * (i % 130)) for i in range(500)]
+    customers_csv = os.path.join(tempfile.mkdtemp(prefix='test-customers-'), 'customers.csv')
+    app_module.SCORE_INDEX_CUSTOMERS = customers_csv
+    with open(customers_csv, 'w') as f:
+        f.write('customer_id,age,salary\n')
+        f.writelines(f'{cid},{age},{salary}\n' for cid, age, salary in customers)
+
+    response = client.post('/admin/score-index/rebuild')
+    assert response.status_code == 202, f"❌ Rebuild not started: {response.status_code}"
+    for _ in range(500):
+        status = client.get('/admin/score-index').get_json()
+        if status['rebuild']['status'] != 'running':
+            break
+        time.sleep(0.01)
+    assert status['rebuild']['status'] == 'completed', f"❌ Rebuild failed: {status['rebuild']}"
+    assert not status['stale'] and status['index']['customers'] == 500, "❌ Wrong index status!"
+
+    for cid, age, salary in customers[::37]:
+        scored = client.get(f'/score/{cid}').get_json()
+        expected = client.post('/predict', json={'age': age, 'salary': salary}).get_json()
+        assert scored['source'] == 'index', "❌ Lookup was rescored!"
+        assert scored['prediction'] == expected['prediction'], f"❌ Wrong score for {cid}"
+    assert client.get('/score/nobody').status_code == 404, "❌ Unknown customer found!"
+
+    # An index built by an older model is rescored with the serving one
+    build_index(model_store.active.model, 'old-version', customers_csv, score_indexes.directory)
+    stale = client.get('/score/C3').get_json()
+    assert stale['source'] == 'rescored' and stale['index_version'] == 'old-version', \
+        "❌ Stale index entry not rescored!"
+    assert stale['model_version'] == model_store.active.version, "❌ Wrong model version!"
+    assert client.get('/admin/score-index').get_json()['stale'], "❌ Stale index not reported!"
+
+    print("✅ Indexed scores match /predict; stale entries are rescored")
+
+
+def test_explanations():
+    """Test /explain and /explain/batch add up to the /predict probabilities"""
+    print("\n🔍 Test 20: Checking prediction explanations...")
+
+    single = client.post('/explain', json={'age': 45, 'salary': 75000})
+    expected = client.post('/predict', json={'age': 45, 'salary': 75000}).get_json()
+    assert single.status_code == 200, f"❌ Explain failed: {single.status_code}"
+    single = single.get_json()
+    assert single['prediction'] == expected['prediction'], "❌ Explained prediction differs!"
+    explanation = single['explanation']
+    total = explanation['base_value'] + sum(explanation['contributions'].values())
+    assert abs(total - single['prediction']['probabilities']['purchase']) < 1e-9, \
+        "❌ Contributions do not add up to P(purchase)!"
+    assert client.post('/explain', json={'age': 45}).status_code == 400, \
+        "❌ Invalid customer explained!"
+
+    customers = [{'age': 20 + i % 50, 'salary': 15000 + 997 * i} for i in range(200)]
+    batch = client.post('/explain/batch', json={'customers': customers + [{'age': -1, 'salary': 1}]})
+    assert batch.status_code == 200, "❌ Batch explain failed!"
+    batch = batch.get_json()
+    predicted = client.post('/predict/batch', json={'customers': customers}).get_json()
+    assert batch['successful'] == 200 and batch['failed'] == 1, "❌ Wrong counts!"
+    assert [r['prediction'] for r in batch['results']] == \
+        [r['prediction'] for r in predicted['results']], "❌ Batch explanations differ!"
+    empty = client.post('/explain/batch', json={'customers': [{'age': 40}]}).get_json()
+    assert empty['successful'] == 0 and empty['results'] == [], "❌ Invalid batch explained!"
+
+    print(f"✅ Explanations add up (base value {explanation['base_value']:.3f})")
+
+
+def test_readiness_gated_on_warmup():
+    """Test readiness waits for a warmed-up model while liveness does not"""
+    print("\n🔍 Test 21: Checking liveness and readiness probes...")
+
+    ready = client.get('/health/ready')
+    assert ready.status_code == 200, "❌ Loaded server not ready!"
+    warmup = ready.get_json()['warmup']
+    assert warmup['within_budget'] and warmup['rounds'] >= 1, f"❌ Wrong warm-up report: {warmup}"
+
+    # A store that has not loaded anything yet: alive, not ready, requests shed
+    with tempfile.TemporaryDirectory() as tmp:
+        serving = app_module.model_store
+        app_module.model_store = ModelStore(model_dir=tmp, default_path=os.path.join(tmp, 'none.npz'))
+        try:
+            assert client.get('/health/live').status_code == 200, "❌ Liveness failed!"
+            assert client.get('/health/ready').status_code == 503, "❌ Cold server ready!"
+            response = client.post('/predict', json={'age': 45, 'salary': 75000})
+            assert response.status_code == 503 and response.headers.get('Retry-After'), \
+                "❌ Request to a cold server not rejected with 503!"
+
+            # Loading retries until a model appears, then flips readiness
+            app_module.model_store.start_loading(retry_interval=0.05)
+            time.sleep(0.1)
+            assert not app_module.model_store.ready, "❌ Ready without a model!"
+            publish_model('purchase_model.npz', model_dir=tmp, version='20240101-000000')
+            assert app_module.model_store.wait_until_ready(10), "❌ Model never became ready!"
+            assert client.get('/health/ready').status_code == 200, "❌ Readiness did not flip!"
+        finally:
+            app_module.model_store = serving
+
+        # A model that cannot warm up within budget is never served
+        store = ModelStore(model_dir=tmp, warmup_budget_ms=1e-6, warmup_max_rounds=2)
+        try:
+            store.load_latest()
+            assert False, "❌ Cold model loaded over budget!"
+        except RuntimeError as e:
+            assert 'budget' in str(e), f"❌ Wrong error: {e}"
+        assert not store.ready and store.active is None, "❌ Over-budget model served!"
+
+    print(f"✅ Ready after {warmup['rounds']} warm-up rounds ({warmup['single_ms']} ms per row)")
+
+
+def test_list_valued_fields_rejected():
+    """Test list-valued age or salary gets a 400, not a 500"""
+    print("\n🔍 Test 22: Rejecting list-valued fields...")
+
+    response = client.post('/predict', json={'age': [35], 'salary': 50000})
+    assert response.status_code == 400, f"❌ /predict returned {response.status_code}!"
+    assert response.get_json()['error'] == 'Invalid data type', "❌ Wrong error!"
+
+    customers = [{'age': [35], 'salary': 50000}, {'age': [40], 'salary': [60000]}]
+    response = client.post('/predict/batch', json={'customers': customers})
+    assert response.status_code == 200, f"❌ /predict/batch returned {response.status_code}!"
+    batch = response.get_json()
+    assert batch['successful'] == 0 and batch['failed'] == 2, "❌ Wrong batch counts!"
+    assert {e['error'] for e in batch['errors']} == {'Invalid data type'}, "❌ Wrong errors!"
+
+    print("✅ List-valued fields are reported as invalid data types")
+
+
+def test_huge_integer_rejected():
+    """Test an integer beyond the float range fails only its own row"""
+    print("\n🔍 Test 23: Rejecting integers too large for a float...")
+
+    response = client.post('/predict', json={'age': 35, 'salary': 10**400})
+    assert response.status_code == 400, f"❌ /predict returned {response.status_code}!"
+    assert response.get_json()['error'] == 'Invalid data type', "❌ Wrong error!"
+
+    customers = [{'age': 35, 'salary': 50000}, {'age': 40, 'salary': 10**400}]
+    response = client.post('/predict/batch', json={'customers': customers})
+    assert response.status_code == 200, f"❌ /predict/batch returned {response.status_code}!"
+    batch = response.get_json()
+    assert batch['successful'] == 1 and batch['failed'] == 1, "❌ Wrong batch counts!"
+    assert batch['errors'][0]['index'] == 1, "❌ Wrong row reported!"
+    assert batch['errors'][0]['error'] == 'Invalid data type', "❌ Wrong error!"
+
+    print("✅ Huge integers are reported as invalid data types for their row only")
+
+
+def run_all_tests():
+    """Run all API server tests"""
+    print("=" * 60)
+    print("🧪 STARTING API SERVER TESTS")
+    print("=" * 60)
+
+    try:
+        test_health_reports_model_version()
+        test_predictions_report_model_version()
+        test_hot_reload_swaps_version()
+        test_admin_reload_unknown_version()
+        test_shadow_scoring_agreement()
+        test_shadow_drops_when_full()
+        test_batch_validation_matches_single()
+        test_batch_matches_single_predictions()
+        test_gzip_request_body()
+        test_gzip_response_negotiation()
+        test_small_response_not_compressed()
+        test_batch_job_matches_batch_endpoint()
+        test_batch_job_csv_upload()
+        test_batch_job_queue_limit()
+        test_admin_memory_report()
+        test_predictions_are_logged()
+        test_drift_sketches_follow_traffic()
+        test_labels_only_predictions()
+        test_customer_score_index()
+        test_explanations()
+        test_readiness_gated_on_warmup()
+        test_list_valued_fields_rejected()
+        test_huge_integer_rejected()
+        test_finished_jobs_expire_without_submissions()
+        test_reload_serialized_with_initial_load()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
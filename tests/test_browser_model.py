@@ -0,0 +1,117 @@
+"""
+Browser Model Tests
+
+Checks that the lookup table written by convert_to_tfjs.py reproduces the
+serving model within its reported error, on every cell of the split grid.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from convert_to_tfjs import build_browser_model, serialize, table_predict_proba
+from model_runtime import load_model
+from model_store import file_version
+
+
+def _probe_inputs(model, n=50000):
+    """Random inputs plus every split point and the values just around it"""
+    rng = np.random.default_rng(3)
+    random = np.column_stack([rng.uniform(-10, 140, n), rng.uniform(-1e4, 2e5, n)])
+    columns = []
+    for t in model.thresholds:
+        t = np.asarray(t, dtype=np.float64)
+        columns.append(np.concatenate([t, np.nextafter(t, -np.inf), np.nextafter(t, np.inf)]))
+    edges = np.array(np.meshgrid(*columns, indexing='ij')).reshape(2, -1).T
+    return np.vstack([random, edges])
+
+
+def test_exact_table_matches_server():
+    """Test the default export reproduces the serving model exactly"""
+    print("\n🔍 Test 1: Comparing the exact table with the serving model...")
+
+    model = load_model('purchase_model.npz')
+    browser_model = build_browser_model(model)
+    X = _probe_inputs(model)
+
+    server = model.predict_proba(X)
+    browser = table_predict_proba(browser_model, X)
+    assert browser_model['max_error'] == 0, "❌ Default export is not exact!"
+    assert np.allclose(browser, server, rtol=0, atol=1e-12), "❌ Probabilities differ!"
+    assert np.array_equal(np.argmax(browser, axis=1), np.argmax(server, axis=1)), \
+        "❌ Labels differ!"
+
+    print(f"✅ Identical on {len(X):,} inputs ({len(serialize(browser_model)):,} bytes)")
+
+
+def test_error_bound_holds():
+    """Test a coarser table stays within its error bound and is smaller"""
+    print("\n🔍 Test 2: Checking the error bound of a coarser table...")
+
+    model = load_model('purchase_model.npz')
+    exact = build_browser_model(model)
+    coarse = build_browser_model(model, max_error=0.05)
+    X = _probe_inputs(model)
+
+    delta = np.abs(table_predict_proba(coarse, X)[:, 1] - model.predict_proba(X)[:, 1])
+    assert coarse['max_error'] <= 0.05, f"❌ Reported error {coarse['max_error']} over budget!"
+    assert delta.max() <= coarse['max_error'] + 1e-9, \
+        f"❌ Observed error {delta.max()} exceeds the reported {coarse['max_error']}"
+    assert len(serialize(coarse)) < len(serialize(exact)), "❌ Coarser table is not smaller!"
+
+    print(f"✅ Max error {delta.max():.3f} <= {coarse['max_error']} "
+          f"in {len(serialize(coarse)):,} bytes")
+
+
+def test_browser_model_up_to_date():
+    """Test browser_model.json was built from the current serving model"""
+    print("\n🔍 Test 3: Checking browser_model.json is up to date...")
+
+    assert os.path.exists('browser_model.json'), \
+        "❌ browser_model.json not found! Run convert_to_tfjs.py"
+
+    with open('browser_model.json') as f:
+        committed = json.load(f)
+    assert committed['model_version'] == file_version('purchase_model.npz'), \
+        "❌ browser_model.json is stale! Re-run convert_to_tfjs.py"
+
+    model = load_model('purchase_model.npz')
+    X = _probe_inputs(model, n=5000)
+    delta = np.abs(table_predict_proba(committed, X)[:, 1] - model.predict_proba(X)[:, 1])
+    assert delta.max() <= committed['max_error'] + 1e-9, "❌ Committed table exceeds its bound!"
+
+    print("✅ Browser model matches the serving model")
+
+
+def run_all_tests():
+    """Run all browser model tests"""
+    print("=" * 60)
+    print("🧪 STARTING BROWSER MODEL TESTS")
+    print("=" * 60)
+
+    try:
+        test_exact_table_matches_server()
+        test_error_bound_holds()
+        test_browser_model_up_to_date()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
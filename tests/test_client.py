@@ -0,0 +1,186 @@
+"""
+Prediction Client Tests
+
+Runs client.py against the Flask test client, so no running server is
+needed.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep batch job and prediction log files out of the working tree
+os.environ.setdefault('JOBS_DIR', tempfile.mkdtemp(prefix='test-jobs-'))
+os.environ.setdefault('PREDICTION_LOG_DIR', tempfile.mkdtemp(prefix='test-logs-'))
+os.environ.setdefault('SCORE_INDEX_DIR', tempfile.mkdtemp(prefix='test-score-index-'))
+
+from app import app, model_store
+from client import AsyncPredictionClient, FlaskSession, PredictionClient, PredictionError
+
+
+class _HtmlErrorSession:
+    """Session whose every response is a proxy's non-JSON 502 page"""
+
+    class _Response:
+        status_code = 502
+
+        def json(self):
+            raise ValueError('Expecting value: line 1 column 1 (char 0)')
+
+    def post(self, url, json=None, timeout=None):
+        return self._Response()
+
+    def close(self):
+        pass
+
+test_client = app.test_client()
+
+# The model loads in the background; wait for it before sending requests
+model_store.wait_until_ready(60)
+
+
+def _customers(n):
+    rng = np.random.default_rng(2)
+    return [{'age': int(a), 'salary': int(s)}
+            for a, s in zip(rng.integers(18, 70, n), rng.integers(15000, 150000, n))]
+
+
+def test_predict_many_matches_batch():
+    """Test predict_many splits the input and keeps results in order"""
+    print("\n🔍 Test 1: Scoring with predict_many...")
+
+    customers = _customers(1050)
+    customers[500] = {'age': 40}
+    with PredictionClient(session=FlaskSession(test_client), batch_size=300,
+                          min_batch_size=10) as api:
+        rows = api.predict_many(customers)
+        sent = api.requests_sent
+
+    assert sent == 4, f"❌ Expected 4 batch calls, got {sent}"
+    assert [row['index'] for row in rows] == list(range(1050)), "❌ Rows out of order!"
+    assert rows[500]['error'] == 'Missing required fields', "❌ Invalid customer not reported!"
+
+    expected = test_client.post('/predict/batch', json={'customers': customers[:300]}).get_json()
+    got = [{k: v for k, v in row.items() if k != 'model_version'} for row in rows[:300]]
+    assert got == expected['results'], "❌ Results differ from /predict/batch!"
+
+    print(f"✅ {len(rows)} customers scored in {sent} concurrent calls")
+
+
+def test_predict_calls_are_coalesced():
+    """Test concurrent predict() calls share /predict/batch requests"""
+    print("\n🔍 Test 2: Coalescing concurrent predict() calls...")
+
+    customers = _customers(40)
+    with PredictionClient(session=FlaskSession(test_client), coalesce_window=0.05) as api:
+        with ThreadPoolExecutor(max_workers=40) as callers:
+            results = list(callers.map(lambda c: api.predict(c['age'], c['salary']), customers))
+        sent = api.requests_sent
+
+    assert sent < len(customers), f"❌ {sent} requests for {len(customers)} calls!"
+    for customer, result in zip(customers, results):
+        single = test_client.post('/predict', json=customer).get_json()
+        assert result['prediction'] == single['prediction'], "❌ Coalesced result differs!"
+
+    print(f"✅ {len(customers)} predict() calls sent as {sent} requests")
+
+
+def test_invalid_customer_raises():
+    """Test predict() raises PredictionError for invalid input"""
+    print("\n🔍 Test 3: Rejecting an invalid customer...")
+
+    with PredictionClient(session=FlaskSession(test_client), coalesce_window=0) as api:
+        try:
+            api.predict(200, 50000)
+            raise AssertionError("❌ Invalid age was accepted!")
+        except PredictionError as e:
+            assert e.error == 'Invalid age', f"❌ Wrong error: {e.error}"
+
+    print("✅ Invalid customers raise PredictionError")
+
+
+def test_async_client():
+    """Test the asyncio client returns the same results"""
+    print("\n🔍 Test 4: Using the async client...")
+
+    customers = _customers(20)
+
+    async def run():
+        async with AsyncPredictionClient(session=FlaskSession(test_client)) as api:
+            singles = await asyncio.gather(*(api.predict(c['age'], c['salary'])
+                                             for c in customers))
+            many = await api.predict_many(customers)
+            return singles, many, api.client.requests_sent
+
+    singles, many, sent = asyncio.run(run())
+    assert [s['prediction'] for s in singles] == [m['prediction'] for m in many], \
+        "❌ Async results differ!"
+    assert sent < len(customers), "❌ Async predict() calls were not coalesced!"
+
+    print(f"✅ Async client scored {len(customers)} customers in {sent} requests")
+
+
+def test_close_and_error_pages():
+    """Test close() sends waiting calls and non-JSON errors raise PredictionError"""
+    print("\n🔍 Test 5: Closing with calls waiting and handling error pages...")
+
+    customer = _customers(1)[0]
+    api = PredictionClient(session=FlaskSession(test_client), coalesce_window=0.2)
+    waiting = api.predict_async(customer['age'], customer['salary'])
+    api.close()
+    single = test_client.post('/predict', json=customer).get_json()
+    assert waiting.result(timeout=5)['prediction'] == single['prediction'], \
+        "❌ Waiting call not sent!"
+    late = api.predict_async(customer['age'], customer['salary'])
+    try:
+        late.result(timeout=5)
+        raise AssertionError("❌ predict() after close() was accepted!")
+    except PredictionError as e:
+        assert e.error == 'Client closed', f"❌ Wrong error: {e.error}"
+
+    with PredictionClient(session=_HtmlErrorSession(), coalesce_window=0) as api:
+        try:
+            api.predict_many([customer])
+            raise AssertionError("❌ A 502 page was accepted!")
+        except PredictionError as e:
+            assert e.status_code == 502, f"❌ Wrong status: {e.status_code}"
+
+    print("✅ close() resolves waiting calls; error pages raise PredictionError")
+
+
+def run_all_tests():
+    """Run all client tests"""
+    print("=" * 60)
+    print("🧪 STARTING CLIENT TESTS")
+    print("=" * 60)
+
+    try:
+        test_predict_many_matches_batch()
+        test_predict_calls_are_coalesced()
+        test_invalid_customer_raises()
+        test_async_client()
+        test_close_and_error_pages()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -0,0 +1,90 @@
+"""
+Duplicate Row Collapsing Tests
+
+Checks dedupe.py: collapsed rows and counts reproduce the training data,
+and weighted fits on them give the same models as fits on every row.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dedupe import collapse_duplicates, compare_training, default_models, scale_gamma
+
+df = pd.read_csv(os.path.join(ROOT, 'storepurchasedata_large.csv'))
+X = df[['Age', 'Salary']].values.astype(np.float64)
+y = df['Purchased'].values
+
+
+def test_collapse_preserves_rows():
+    """Test unique rows with counts expand back to the original multiset"""
+    print("\n🔍 Test 1: Collapsing duplicate rows...")
+
+    X_unique, y_unique, counts = collapse_duplicates(X, y)
+    assert counts.sum() == len(X), "❌ Counts do not add up to the row count!"
+    assert len(np.unique(np.column_stack([X_unique, y_unique]), axis=0)) == len(X_unique), \
+        "❌ Collapsed rows are not unique!"
+
+    expanded = np.column_stack([np.repeat(X_unique, counts, axis=0), np.repeat(y_unique, counts)])
+    original = np.column_stack([X, y])
+    assert np.array_equal(np.unique(expanded, axis=0, return_counts=True)[1],
+                          np.unique(original, axis=0, return_counts=True)[1]), \
+        "❌ Expanded rows differ from the original!"
+
+    print(f"✅ {len(X)} rows collapsed to {len(X_unique)} ({len(X) / len(X_unique):.1f}x)")
+
+
+def test_weighted_fits_match_full_fits():
+    """Test every estimator trained on collapsed rows predicts like the full fit"""
+    print("\n🔍 Test 2: Comparing weighted and full fits...")
+
+    scaled = (X - X.mean(axis=0)) / X.std(axis=0)
+    X_unique, _, counts = collapse_duplicates(scaled, y)
+    gamma = scale_gamma(X_unique, counts)
+    assert np.isclose(gamma, 1.0 / (2 * scaled.var())), "❌ Weighted gamma differs from full data!"
+
+    # Agreement on a grid covering the feature space, not only on training rows
+    grid = np.mgrid[-3:3:0.05, -3:3:0.05].reshape(2, -1).T
+    report = compare_training(default_models(gamma=gamma), scaled, y, grid)
+    for name, row in report['models'].items():
+        print(f"  {name}: {row['full_seconds'] * 1000:.1f} ms -> "
+              f"{row['collapsed_seconds'] * 1000:.1f} ms, agreement {row['test_agreement']:.2%}")
+        # The forest's bootstrap samples differ, like a change of seed
+        minimum = 0.99 if name == 'Random Forest' else 1.0
+        assert row['test_agreement'] >= minimum, f"❌ {name} predicts differently!"
+
+    print(f"✅ Weighted fits agree with full fits ({report['compression']:.1f}x fewer rows)")
+
+
+def run_all_tests():
+    """Run all duplicate collapsing tests"""
+    print("=" * 60)
+    print("🧪 STARTING DUPLICATE COLLAPSING TESTS")
+    print("=" * 60)
+
+    try:
+        test_collapse_preserves_rows()
+        test_weighted_fits_match_full_fits()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -0,0 +1,164 @@
+"""
+Drift Sketch Tests
+
+Checks the streaming feature histograms: batched updates match a full
+histogram, sketches merge across threads and workers, and PSI separates
+training-like traffic from shifted traffic.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from drift import (DRIFT_SHARDS, DriftMonitor, FEATURES, FeatureSketch, build_reference,
+                   drift_report, load_reference, merge_snapshots, read_snapshots)
+
+X = pd.read_csv(os.path.join(ROOT, 'storepurchasedata_large.csv'))[FEATURES].values
+REFERENCE = build_reference(X)
+
+
+def test_batched_updates_match_histogram():
+    """Test batch updates and merges give the same counts as one pass"""
+    print("\n🔍 Test 1: Comparing batched sketches with a full histogram...")
+
+    edges = REFERENCE['sketches'][0]['edges']
+    values = np.random.default_rng(1).uniform(0, 100, 5000)
+
+    whole = FeatureSketch(edges)
+    whole.update(values)
+    first, second = FeatureSketch(edges), FeatureSketch(edges)
+    for batch in np.array_split(values[:2000], 7):
+        first.update(batch)
+    second.update(values[2000:])
+    first.merge(second)
+
+    assert np.array_equal(first.counts, whole.counts), "❌ Merged counts differ!"
+    assert first.n == 5000 and np.isclose(first.mean(), values.mean()), "❌ Wrong moments!"
+    assert whole.counts[0] == np.sum(values < edges[0]), "❌ Wrong below-range count!"
+    assert whole.counts[-1] == np.sum(values > edges[-1]), "❌ Wrong above-range count!"
+    inner = np.histogram(values[(values >= edges[0]) & (values <= edges[-1])], edges)[0]
+    assert np.array_equal(whole.counts[1:-1], inner), "❌ Inner bins differ from np.histogram!"
+
+    print(f"✅ {len(whole.counts)} bins match np.histogram after batching and merging")
+
+
+def test_psi_separates_shifted_traffic():
+    """Test training data scores as stable and shifted data as drifted"""
+    print("\n🔍 Test 2: Scoring training and shifted traffic...")
+
+    monitor = DriftMonitor(REFERENCE)
+    monitor.update(X)
+    stable = monitor.report()
+    assert stable['status'] == 'stable' and stable['max_psi'] < 0.01, \
+        f"❌ Training data reported as drifted: {stable['max_psi']}"
+
+    monitor.reset()
+    monitor.update(X * [1.0, 1.3])
+    shifted = monitor.report()
+    assert shifted['features']['Age']['status'] == 'stable', "❌ Age did not change!"
+    assert shifted['features']['Salary']['status'] == 'significant', \
+        f"❌ Salary shift missed: {shifted['features']['Salary']['psi']}"
+
+    print(f"✅ PSI {stable['max_psi']} on training data, "
+          f"{shifted['features']['Salary']['psi']} with salaries up 30%")
+
+
+def test_threads_and_workers_merge():
+    """Test per-thread sketches and worker snapshots add up"""
+    print("\n🔍 Test 3: Merging sketches from threads and workers...")
+
+    monitor = DriftMonitor(REFERENCE)
+
+    def work(seed):
+        rows = np.random.default_rng(seed).permutation(X)
+        for batch in np.array_split(rows, 50):
+            monitor.update(batch)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = monitor.snapshot()
+    assert snapshot['sketches'][0]['n'] == 8 * len(X), "❌ Rows lost between threads!"
+
+    # Short-lived threads (one per request) share the fixed shards
+    monitor.reset()
+    for start in range(0, 2000, 200):
+        threads = [threading.Thread(target=monitor.update, args=(X[:1],)) for _ in range(200)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert len(monitor._shards) == DRIFT_SHARDS, "❌ Sketch memory grew with threads!"
+    assert monitor.merged()[0].n == 2000, "❌ Rows lost from short-lived threads!"
+
+    # Two workers: an /admin/drift response and Lambda log lines
+    with tempfile.TemporaryDirectory() as tmp:
+        api_path = os.path.join(tmp, 'api.json')
+        with open(api_path, 'w') as f:
+            json.dump({'sketch': snapshot}, f)
+        lambda_path = os.path.join(tmp, 'lambda.log')
+        with open(lambda_path, 'w') as f:
+            f.write(json.dumps({'drift_sketch': snapshot}) + '\n')
+            f.write(json.dumps({'drift_sketch': snapshot}) + '\n')
+        snapshots = read_snapshots(api_path) + read_snapshots(lambda_path)
+
+    merged = merge_snapshots(snapshots)
+    report = drift_report(REFERENCE, merged)
+    assert report['rows'] == 3 * 8 * len(X), "❌ Wrong merged row count!"
+    assert report['max_psi'] < 0.01, "❌ Merging changed the distribution!"
+
+    print(f"✅ {report['rows']:,} rows merged from 8 threads and 3 snapshots")
+
+
+def test_reference_is_current():
+    """Test the committed reference matches the training data"""
+    print("\n🔍 Test 4: Checking drift_reference.json...")
+
+    committed = load_reference(os.path.join(ROOT, 'drift_reference.json'))
+    assert committed['features'] == FEATURES, "❌ Wrong features!"
+    assert committed['sketches'] == REFERENCE['sketches'], \
+        "❌ drift_reference.json is stale; run python drift.py reference"
+
+    print("✅ drift_reference.json matches storepurchasedata_large.csv")
+
+
+def run_all_tests():
+    """Run all drift sketch tests"""
+    print("=" * 60)
+    print("🧪 STARTING DRIFT SKETCH TESTS")
+    print("=" * 60)
+
+    try:
+        test_batched_updates_match_histogram()
+        test_psi_separates_shifted_traffic()
+        test_threads_and_workers_merge()
+        test_reference_is_current()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -0,0 +1,139 @@
+"""
+Streaming Profile Tests
+
+Checks explore_data.py's streaming mode against pandas on the full
+DataFrame: chunked, parallel profiling must give the same statistics,
+lose no rows at chunk boundaries and count missing values.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from explore_data import FEATURES, LABEL, chunk_ranges, profile_csv
+
+DATA_PATH = os.path.join(ROOT, 'storepurchasedata_large.csv')
+
+
+def test_stream_matches_pandas():
+    """Test a chunked, multi-process profile matches pandas on the whole file"""
+    print("\n🔍 Test 1: Comparing the streamed profile with pandas...")
+
+    df = pd.read_csv(DATA_PATH)
+    summary = profile_csv(DATA_PATH, chunk_bytes=2048, workers=3)
+    assert summary['chunks'] > 5, "❌ File was not split into chunks!"
+    assert summary['rows'] == len(df), "❌ Wrong row count!"
+
+    describe = df.describe()
+    for name in FEATURES:
+        stats = summary['columns'][name]
+        for key in ('count', 'mean', 'std', 'min', 'max'):
+            assert np.isclose(stats[key], describe[name][key]), f"❌ {name} {key} differs!"
+        for q in ('25%', '50%', '75%'):
+            assert stats['percentiles'][q] == describe[name][q], f"❌ {name} {q} differs!"
+
+        histogram = summary['histograms'][name]
+        for label in ('0', '1'):
+            expected = np.histogram(df[df[LABEL] == int(label)][name], bins=histogram['edges'])[0]
+            assert histogram['counts'][label] == expected.tolist(), f"❌ {name} histogram differs!"
+
+    counts = df[LABEL].value_counts()
+    assert {k: v['count'] for k, v in summary['class_balance'].items()} == \
+        {str(k): int(v) for k, v in counts.items()}, "❌ Class balance differs!"
+    grid = np.array(summary['purchase_rate_grid']['counts'])
+    assert grid.sum() == len(df), "❌ Purchase-rate grid lost rows!"
+
+    print(f"✅ {summary['chunks']} chunks on 3 workers match pandas exactly")
+
+
+def test_chunk_boundaries_and_missing_values():
+    """Test no row is lost or split at chunk edges and bad values count as missing"""
+    print("\n🔍 Test 2: Profiling a file with missing and invalid values...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'extract.csv')
+        with open(path, 'w') as f:
+            f.write('Age,Salary,Purchased\n')
+            for i in range(500):
+                age = '' if i % 50 == 0 else str(20 + i % 40)
+                salary = 'n/a' if i % 70 == 0 else str(30000 + 1000 * (i % 50))
+                label = '' if i % 125 == 0 else str(int(i % 3 == 0))
+                f.write(f'{age},{salary},{label}\n')
+
+        for chunk_bytes in (7, 100, 1 << 20):
+            header, ranges = chunk_ranges(path, chunk_bytes)
+            with open(path, 'rb') as f:
+                f.readline()
+                body = f.read()
+            pieces = b''.join(body[start - len(header):end - len(header)] for start, end in ranges)
+            assert pieces == body, f"❌ Chunks of {chunk_bytes} bytes do not tile the file!"
+            assert all(body[end - len(header) - 1:end - len(header)] == b'\n'
+                       for _, end in ranges), "❌ A chunk ends mid-line!"
+
+            summary = profile_csv(path, chunk_bytes=chunk_bytes, workers=1)
+            assert summary['rows'] == 500, f"❌ {summary['rows']} rows at {chunk_bytes} bytes"
+            assert summary['missing'] == {LABEL: 4, 'Age': 10, 'Salary': 8}, \
+                f"❌ Wrong missing counts: {summary['missing']}"
+
+        expected = pd.to_numeric(pd.read_csv(path)['Salary'], errors='coerce')
+        assert np.isclose(summary['columns']['Salary']['mean'], expected.mean()), \
+            "❌ Invalid values changed the mean!"
+
+    print("✅ Chunks tile the file on line boundaries; missing values are counted")
+
+
+def test_cli_writes_json_and_png():
+    """Test --stream writes the profile and the plot without a display"""
+    print("\n🔍 Test 3: Running explore_data.py --stream...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {k: v for k, v in os.environ.items() if k != 'DISPLAY'}
+        subprocess.run([sys.executable, os.path.join(ROOT, 'explore_data.py'), '--stream',
+                        '--data', DATA_PATH, '--chunk-mb', '0.01', '--workers', '2'],
+                       cwd=tmp, env=env, check=True, capture_output=True, timeout=120)
+        with open(os.path.join(tmp, 'data_profile.json')) as f:
+            summary = json.load(f)
+        png_size = os.path.getsize(os.path.join(tmp, 'data_exploration.png'))
+
+    assert summary['rows'] == 1554 and summary['workers'] == 2, "❌ Wrong profile written!"
+    assert png_size > 0, "❌ Empty plot!"
+
+    print(f"✅ data_profile.json and a {png_size / 1024:.0f} KB plot written")
+
+
+def run_all_tests():
+    """Run all streaming profile tests"""
+    print("=" * 60)
+    print("🧪 STARTING STREAMING PROFILE TESTS")
+    print("=" * 60)
+
+    try:
+        test_stream_matches_pandas()
+        test_chunk_boundaries_and_missing_values()
+        test_cli_writes_json_and_png()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
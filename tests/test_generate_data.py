@@ -0,0 +1,134 @@
+"""
+Synthetic Data Generator Tests
+
+Checks generate_data.py: output is deterministic per seed whatever the
+chunk size, follows the source data and streams to a CSV that the
+profiling and batch job readers accept.
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import generate_data
+from generate_data import SyntheticData, fidelity, parse_rows, write_csv
+from model_runtime import load_model
+
+SOURCE = np.loadtxt(os.path.join(ROOT, 'storepurchasedata_large.csv'),
+                    delimiter=',', skiprows=1)
+DATA = SyntheticData(SOURCE[:, :2], SOURCE[:, 2])
+
+
+def test_deterministic_across_chunk_sizes():
+    """Test a seed gives the same rows for any chunk size"""
+    print("\n🔍 Test 1: Generating the same seed with different chunk sizes...")
+
+    original = generate_data.BLOCK_ROWS
+    generate_data.BLOCK_ROWS = 1000  # several blocks without a large sample
+    try:
+        X, y = DATA.generate(3500, seed=7)
+        for chunk_rows in (1, 333, 1000, 2500, 10000):
+            chunks = list(DATA.chunks(3500, seed=7, chunk_rows=chunk_rows))
+            assert all(len(cx) == chunk_rows for cx, _ in chunks[:-1]), \
+                "❌ Chunk of the wrong size!"
+            assert np.array_equal(np.concatenate([cx for cx, _ in chunks]), X), \
+                f"❌ Rows differ with chunk_rows={chunk_rows}"
+            assert np.array_equal(np.concatenate([cy for _, cy in chunks]), y), \
+                f"❌ Labels differ with chunk_rows={chunk_rows}"
+        other, _ = DATA.generate(3500, seed=8)
+        assert not np.array_equal(X, other), "❌ Seed has no effect!"
+    finally:
+        generate_data.BLOCK_ROWS = original
+
+    print("✅ Same rows for chunk sizes 1 to 10000; different seeds differ")
+
+
+def test_matches_source_distribution():
+    """Test synthetic data follows the source's distributions and labels"""
+    print("\n🔍 Test 2: Comparing synthetic data with the source...")
+
+    report = fidelity(DATA, SOURCE[:, :2], SOURCE[:, 2], rows=200000)
+    assert abs(report['purchase_rate'] - report['source_purchase_rate']) < 0.02, \
+        "❌ Purchase rate differs!"
+    assert abs(report['Age']['mean'] - report['Age']['source_mean']) < 1.5, "❌ Age mean differs!"
+    assert abs(report['Salary']['mean'] - report['Salary']['source_mean']) < 1500, \
+        "❌ Salary mean differs!"
+
+    X, y = DATA.generate(200000, seed=1)
+    assert X[:, 0].min() >= 18 and X[:, 0].max() <= 69, "❌ Age outside the source range!"
+    assert np.all(X[:, 1] % 1000 == 0), "❌ Salaries not in whole thousands!"
+    model = load_model(os.path.join(ROOT, 'purchase_model.npz'))
+    accuracy = np.mean(model.classes_[np.argmax(model.predict_proba(X.astype(float)), 1)] == y)
+    assert accuracy > 0.85, f"❌ Labels unrelated to the features: accuracy {accuracy:.3f}"
+
+    exact = SyntheticData(SOURCE[:, :2], SOURCE[:, 2], smoothing=0)
+    resampled = fidelity(exact, SOURCE[:, :2], SOURCE[:, 2], rows=200000)
+    assert max(resampled['Age']['psi'], resampled['Salary']['psi']) < 0.01, \
+        "❌ smoothing=0 should resample the source!"
+
+    print(f"✅ Purchase rate {report['purchase_rate']:.1%}, model accuracy {accuracy:.1%} "
+          f"on synthetic rows")
+
+
+def test_write_csv_streams_rows():
+    """Test the CSV has the source columns and every row"""
+    print("\n🔍 Test 3: Writing a synthetic CSV...")
+
+    from batch_jobs import _read_csv
+    from explore_data import profile_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.csv')
+        written = write_csv(path, 25000, seed=3, chunk_rows=4000, data=DATA)
+        with open(path) as f:
+            header = f.readline().strip()
+        X, y = DATA.generate(25000, seed=3)
+        on_disk = np.loadtxt(path, delimiter=',', skiprows=1, dtype=np.int64)
+        customers = sum(1 for _ in _read_csv(path))
+        profile = profile_csv(path, chunk_bytes=64 * 1024, workers=1)
+
+    assert written == 25000 and header == 'Age,Salary,Purchased', "❌ Wrong file layout!"
+    assert np.array_equal(on_disk[:, :2], X) and np.array_equal(on_disk[:, 2], y), \
+        "❌ File differs from the in-memory rows!"
+    assert customers == 25000, "❌ Batch job reader rejected the file!"
+    assert profile['rows'] == 25000 and sum(profile['missing'].values()) == 0, \
+        "❌ Streaming profile disagrees!"
+    assert [parse_rows(t) for t in ('5000', '250k', '10M', '1.5B')] == \
+        [5000, 250000, 10 ** 7, 1.5e9], "❌ Row count parsing!"
+
+    print("✅ 25,000 rows streamed in 4,000-row chunks and read back unchanged")
+
+
+def run_all_tests():
+    """Run all synthetic data generator tests"""
+    print("=" * 60)
+    print("🧪 STARTING SYNTHETIC DATA GENERATOR TESTS")
+    print("=" * 60)
+
+    try:
+        test_deterministic_across_chunk_sizes()
+        test_matches_source_distribution()
+        test_write_csv_streams_rows()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -0,0 +1,102 @@
+"""
+Approximate RBF SVM Tests
+
+Checks kernel_approx.py: the Nyström SVM predicts like the exact RBF SVC,
+its size does not grow with the training data, and it accepts the sample
+weights of collapsed training rows.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dedupe import collapse_duplicates
+from generate_data import SyntheticData
+from kernel_approx import ApproximateRBFSVC, compare
+
+df = pd.read_csv(os.path.join(ROOT, 'storepurchasedata_large.csv'))
+X = StandardScaler().fit_transform(df[['Age', 'Salary']].values.astype(np.float64))
+y = df['Purchased'].values
+
+
+def test_matches_exact_svc():
+    """Test the approximation agrees with the exact SVC on held-out rows"""
+    print("\n🔍 Test 1: Comparing the approximate and the exact RBF SVM...")
+
+    report = compare(X[::2], y[::2], X[1::2], y[1::2])
+    exact, approximate = report['exact'], report['approximate']
+    print(f"  Exact accuracy {exact['accuracy']:.4f}, approximate {approximate['accuracy']:.4f}, "
+          f"agreement {report['agreement']:.2%}")
+    assert report['agreement'] >= 0.98, "❌ Predictions differ from the exact SVC!"
+    assert abs(exact['accuracy'] - approximate['accuracy']) <= 0.01, "❌ Accuracy dropped!"
+
+    skipped = compare(X[::2], y[::2], X[1::2], y[1::2], exact_max_rows=100)
+    assert skipped['exact'] is None, "❌ Exact SVC fitted above the row limit!"
+
+    print("✅ Approximate SVM predicts like the exact SVC")
+
+
+def test_size_independent_of_rows():
+    """Test the fitted model keeps n_components landmarks however many rows it sees"""
+    print("\n🔍 Test 2: Checking the model size does not grow with the data...")
+
+    sampler = SyntheticData(df[['Age', 'Salary']].values, y)
+    sizes = []
+    for rows in (2000, 20000):
+        X_synthetic, y_synthetic = sampler.generate(rows)
+        scaled = StandardScaler().fit_transform(X_synthetic.astype(np.float64))
+        model = ApproximateRBFSVC(random_state=0).fit(scaled, y_synthetic)
+        sizes.append(model.feature_map_.components_.shape[0])
+    assert sizes == [100, 100], f"❌ Landmarks grew with the data: {sizes}"
+
+    print(f"✅ {sizes[0]} landmarks for 2,000 and 20,000 rows")
+
+
+def test_sample_weights_match_duplicates():
+    """Test fitting collapsed rows with counts matches fitting every row"""
+    print("\n🔍 Test 3: Fitting collapsed rows with sample weights...")
+
+    X_unique, y_unique, counts = collapse_duplicates(X, y)
+    full = ApproximateRBFSVC(random_state=0).fit(X, y)
+    weighted = ApproximateRBFSVC(random_state=0).fit(X_unique, y_unique, sample_weight=counts)
+    assert np.isclose(weighted.gamma_, full.gamma_), "❌ Kernel width taken from the unique rows!"
+    agreement = np.mean(full.predict(X) == weighted.predict(X))
+    assert agreement >= 0.98, f"❌ Weighted fit agrees on only {agreement:.2%} of rows!"
+
+    print(f"✅ Weighted fit on {len(X_unique)} rows agrees on {agreement:.2%} of predictions")
+
+
+def run_all_tests():
+    """Run all approximate SVM tests"""
+    print("=" * 60)
+    print("🧪 STARTING APPROXIMATE SVM TESTS")
+    print("=" * 60)
+
+    try:
+        test_matches_exact_svc()
+        test_size_independent_of_rows()
+        test_sample_weights_match_duplicates()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
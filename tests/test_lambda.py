@@ -0,0 +1,158 @@
+"""
+Lambda Handler Tests
+
+Runs docker-lambda/lambda_function.py in a Python process where
+scikit-learn and joblib cannot be imported, as in the slim Lambda image,
+and compares its answers with sklearn's predict_proba.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import joblib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, 'docker-lambda')
+
+# Child process: block sklearn and joblib, then call the handler
+HANDLER_SCRIPT = """
+import json, sys
+sys.modules['sklearn'] = None
+sys.modules['joblib'] = None
+sys.path[:0] = [%r, %r]
+import lambda_function
+events = json.loads(sys.stdin.read())
+print(json.dumps([lambda_function.lambda_handler(event, None) for event in events]))
+""" % (LAMBDA_DIR, ROOT)
+
+
+def _run_handler(events, env=None, output_lines=False):
+    output = subprocess.run([sys.executable, '-c', HANDLER_SCRIPT], input=json.dumps(events),
+                            capture_output=True, text=True, cwd=ROOT, check=True,
+                            env=dict(os.environ, **(env or {}))).stdout
+    lines = output.strip().splitlines()
+    return lines if output_lines else json.loads(lines[-1])
+
+
+def _customers(n=200):
+    rng = np.random.default_rng(4)
+    return [{'age': int(a), 'salary': int(s)}
+            for a, s in zip(rng.integers(18, 70, n), rng.integers(15000, 150000, n))]
+
+
+def test_handler_runs_without_sklearn():
+    """Test the handler loads and scores with NumPy only"""
+    print("\n🔍 Test 1: Running the Lambda handler without scikit-learn...")
+
+    response = _run_handler([{'body': json.dumps({'age': 45, 'salary': 75000})}])[0]
+    assert response['statusCode'] == 200, f"❌ Handler failed: {response['body']}"
+    assert 'will_purchase' in json.loads(response['body']), "❌ No prediction returned!"
+
+    print("✅ Handler works without scikit-learn or joblib")
+
+
+def test_handler_matches_sklearn():
+    """Test single and batch handler results match sklearn's predict_proba"""
+    print("\n🔍 Test 2: Comparing handler results with scikit-learn...")
+
+    customers = _customers()
+    events = [{'body': json.dumps(c)} for c in customers]
+    events.append({'body': json.dumps({'customers': customers})})
+    responses = _run_handler(events)
+
+    model = joblib.load(os.path.join(ROOT, 'purchase_model.pkl'))
+    scaler = joblib.load(os.path.join(ROOT, 'scaler.pkl'))
+    X = np.array([[c['age'], c['salary']] for c in customers], dtype=np.float64)
+    proba = model.predict_proba(scaler.transform(X))
+    labels = model.predict(scaler.transform(X))
+
+    singles = [json.loads(r['body']) for r in responses[:-1]]
+    batch = json.loads(responses[-1]['body'])['predictions']
+    for results in (singles, batch):
+        for result, p, label in zip(results, proba, labels):
+            assert result['confidence'] == round(float(p[1]) * 100, 2), "❌ Probability differs!"
+            assert result['will_purchase'] == bool(label), "❌ Label differs!"
+
+    print(f"✅ {len(customers)} single and batch predictions match scikit-learn")
+
+
+def test_handler_emits_drift_sketches():
+    """Test the handler prints mergeable drift sketches of the scored rows"""
+    print("\n🔍 Test 3: Collecting drift sketches from the handler logs...")
+
+    customers = _customers(50)
+    events = [{'body': json.dumps({'customers': customers + [{'age': 30}]})},
+              {'body': json.dumps(customers[0])}]
+    lines = _run_handler(events, env={'DRIFT_EMIT_SECONDS': '0'}, output_lines=True)
+    sketches = [json.loads(line)['drift_sketch'] for line in lines if 'drift_sketch' in line]
+
+    assert len(sketches) == 2, f"❌ Expected 2 sketches, got {len(sketches)}"
+    assert [s['sketches'][0]['n'] for s in sketches] == [50, 1], \
+        "❌ Sketch rows do not match the scored customers!"
+
+    print("✅ One sketch per emit interval, covering only the scored rows")
+
+
+def test_handler_scores_sqs_batches():
+    """Test Records batches are scored together and failures are reported per message"""
+    print("\n🔍 Test 4: Scoring an SQS Records batch...")
+
+    with open(os.path.join(LAMBDA_DIR, 'events', 'sqs_batch.json')) as f:
+        fixture = json.load(f)
+    customers = _customers(30)
+    records = [{'messageId': f'm{i}', 'body': json.dumps(c)} for i, c in enumerate(customers[:10])]
+    records.append({'messageId': 'batch', 'body': json.dumps({'customers': customers[10:]})})
+    events = [fixture, {'Records': records}] + [{'body': json.dumps(c)} for c in customers]
+    responses = _run_handler(events)
+
+    failures = [f['itemIdentifier'] for f in responses[0]['batchItemFailures']]
+    assert failures == ['msg-3', 'msg-4'], f"❌ Wrong failed messages: {failures}"
+    results = responses[0]['results']
+    assert 'will_purchase' in results[2]['predictions'][0] and \
+        'error' in results[2]['predictions'][1], "❌ Invalid customer not reported!"
+    assert 'error' in results[3], "❌ Malformed body not reported!"
+
+    batched = responses[1]
+    assert batched['batchItemFailures'] == [], "❌ Valid messages reported as failed!"
+    predictions = [p for result in batched['results'] for p in result['predictions']]
+    singles = [json.loads(r['body']) for r in responses[2:]]
+    assert [r['messageId'] for r in batched['results']][-1] == 'batch', "❌ Wrong message order!"
+    assert [(p['will_purchase'], p['confidence']) for p in predictions] == \
+        [(p['will_purchase'], p['confidence']) for p in singles], \
+        "❌ Batched predictions differ from single invocations!"
+
+    print(f"✅ {len(records)} messages scored in one call; 2 of 4 fixture messages failed")
+
+
+def run_all_tests():
+    """Run all Lambda handler tests"""
+    print("=" * 60)
+    print("🧪 STARTING LAMBDA HANDLER TESTS")
+    print("=" * 60)
+
+    try:
+        test_handler_runs_without_sklearn()
+        test_handler_matches_sklearn()
+        test_handler_emits_drift_sketches()
+        test_handler_scores_sqs_batches()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -0,0 +1,104 @@
+"""
+Hot-Path Node Layout Tests
+
+Checks node_layout.py: the relaid-out artifact gives identical
+predictions, stores the more visited child right after its parent, and
+request features are read from prediction logs, request bodies and CSVs.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_runtime import load_model
+from node_layout import optimize_layout, read_features, visit_counts
+
+MODEL_PATH = os.path.join(ROOT, 'purchase_model.npz')
+
+
+def test_layout_keeps_predictions():
+    """Test the hot-path layout is identical and puts likely children next"""
+    print("\n🔍 Test 1: Relaying out the serving forest...")
+
+    rng = np.random.default_rng(3)
+    replay = np.column_stack([rng.integers(18, 70, 5000), rng.integers(15, 150, 5000) * 1000])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'optimized.npz')
+        model, _, counts = optimize_layout(MODEL_PATH, replay.astype(np.float64), path)
+        optimized = load_model(path)
+
+    X = np.vstack([
+        np.column_stack([rng.uniform(0, 120, 20000), rng.uniform(0, 200000, 20000)]),
+        np.column_stack([np.resize(t, 200) for t in model.thresholds]),
+    ])
+    assert np.array_equal(model.predict_proba(X), optimized.predict_proba(X)), \
+        "❌ Probabilities differ after the relayout!"
+    assert np.array_equal(model.explain(X)[2], optimized.explain(X)[2]), \
+        "❌ Explanations differ after the relayout!"
+    assert np.array_equal(model.tree_order, optimized.tree_order), "❌ Tree order changed!"
+
+    new_counts = visit_counts(optimized, replay.astype(np.float64))
+    assert sorted(new_counts) == sorted(counts), "❌ Visit counts changed!"
+    internal = np.flatnonzero(~optimized.is_leaf)
+    left, right = optimized.left[internal], optimized.right[internal]
+    hot = np.where(new_counts[left] >= new_counts[right], left, right)
+    assert np.array_equal(hot, internal + 1), "❌ Likely child does not follow its parent!"
+
+    print(f"✅ Identical predictions on {len(X)} inputs with the hot-path layout")
+
+
+def test_read_features():
+    """Test features are read from prediction logs, request bodies and CSVs"""
+    print("\n🔍 Test 2: Reading recorded request features...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, 'predictions.jsonl')
+        with open(log_path, 'w') as f:
+            f.write(json.dumps({'endpoint': '/predict', 'age': 45.0, 'salary': 75000.0}) + '\n')
+            f.write(json.dumps({'customers': [{'age': 25, 'salary': 30000},
+                                              {'age': 'x', 'salary': 1}]}) + '\n')
+            f.write('\n')
+        csv_path = os.path.join(tmp, 'customers.csv')
+        with open(csv_path, 'w') as f:
+            f.write('Customer_ID,Age,Salary\nC1,60,90000\n')
+        X = read_features([log_path, csv_path])
+
+    expected = [[45, 75000], [25, 30000], [60, 90000]]
+    assert X.tolist() == expected, f"❌ Wrong features: {X.tolist()}"
+
+    print("✅ Log lines, request bodies and CSV rows read; invalid rows skipped")
+
+
+def run_all_tests():
+    """Run all node layout tests"""
+    print("=" * 60)
+    print("🧪 STARTING NODE LAYOUT TESTS")
+    print("=" * 60)
+
+    try:
+        test_layout_keeps_predictions()
+        test_read_features()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
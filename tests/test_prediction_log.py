@@ -0,0 +1,151 @@
+"""
+Prediction Log Tests
+
+Checks the ring-buffered prediction log: records reach disk from the
+background thread, a full buffer drops instead of blocking, sampling and
+file rotation work.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prediction_log import PredictionLog
+
+
+def _read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _request(n=1):
+    features = np.array([[45.0, 75000.0]] * n)
+    probabilities = np.array([[0.12, 0.88]] * n)
+    return features, probabilities
+
+
+def test_records_written_in_background():
+    """Test records are flushed to disk by the background thread"""
+    print("\n🔍 Test 1: Writing records from the background thread...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = PredictionLog(tmp, flush_interval=0.05)
+        features, probabilities = _request(3)
+        log.record('/predict/batch', 'v1', 0.002, features, probabilities, np.array([0, 2, 5]))
+
+        deadline = time.time() + 5
+        while log.stats()['lines_written'] < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        log.close()
+
+        lines = _read_lines(log.path)
+        assert len(lines) == 3, f"❌ Expected 3 lines, got {len(lines)}"
+        assert [line['index'] for line in lines] == [0, 2, 5], "❌ Wrong row indices!"
+        first = lines[0]
+        assert first['model_version'] == 'v1' and first['latency_ms'] == 2.0, "❌ Wrong metadata!"
+        assert first['purchase_probability'] == 0.88 and first['prediction'] == 1, \
+            "❌ Wrong prediction!"
+        assert len({line['request_id'] for line in lines}) == 1, "❌ Rows of one request split!"
+
+    print("✅ Records are written as one JSON line per prediction")
+
+
+def test_full_buffer_drops_without_blocking():
+    """Test a full buffer counts dropped records and never waits"""
+    print("\n🔍 Test 2: Overfilling the ring buffer...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = PredictionLog(tmp, buffer_size=100, flush_interval=3600)
+        features, probabilities = _request()
+
+        # Hold the writer, as if the disk were stalled
+        with log._write_lock:
+            t0 = time.perf_counter()
+            accepted = sum(log.record('/predict', 'v1', 0.001, features, probabilities)
+                           for _ in range(1000))
+            per_record = (time.perf_counter() - t0) / 1000
+
+        stats = log.stats()
+        assert accepted == 100 and stats['requests_dropped'] == 900, "❌ Wrong drop count!"
+        assert per_record < 0.001, f"❌ record() took {per_record * 1e6:.0f} µs"
+
+        # Draining frees the buffer again
+        log.flush()
+        assert log.stats()['lines_written'] == 100, "❌ Buffered records not flushed!"
+        assert log.record('/predict', 'v1', 0.001, features, probabilities), \
+            "❌ Buffer not reusable after a flush!"
+        log.close()
+        assert len(_read_lines(log.path)) == 101, "❌ Wrong number of lines on disk!"
+
+    print(f"✅ 900 records dropped, {per_record * 1e6:.1f} µs per record() call")
+
+
+def test_sampling():
+    """Test only the configured fraction of requests is logged"""
+    print("\n🔍 Test 3: Sampling requests...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = PredictionLog(tmp, sample_rate=0.1, flush_interval=3600)
+        features, probabilities = _request()
+        logged = sum(log.record('/predict', 'v1', 0.001, features, probabilities)
+                     for _ in range(5000))
+        log.close()
+
+    assert 350 < logged < 650, f"❌ {logged} of 5000 logged at a 10% sample rate"
+    print(f"✅ {logged} of 5000 requests logged at a 10% sample rate")
+
+
+def test_rotation():
+    """Test the log file rotates at max_bytes and keeps backup_count files"""
+    print("\n🔍 Test 4: Rotating log files...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = PredictionLog(tmp, max_bytes=1000, backup_count=2, flush_interval=3600)
+        features, probabilities = _request(10)
+        for _ in range(6):
+            log.record('/predict/batch', 'v1', 0.001, features, probabilities)
+            log.flush()
+        log.close()
+
+        files = sorted(os.listdir(tmp))
+        assert files == ['predictions.jsonl', 'predictions.jsonl.1', 'predictions.jsonl.2'], \
+            f"❌ Unexpected files: {files}"
+
+    print(f"✅ Rotated into {files}")
+
+
+def run_all_tests():
+    """Run all prediction log tests"""
+    print("=" * 60)
+    print("🧪 STARTING PREDICTION LOG TESTS")
+    print("=" * 60)
+
+    try:
+        test_records_written_in_background()
+        test_full_buffer_drops_without_blocking()
+        test_sampling()
+        test_rotation()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -0,0 +1,156 @@
+"""
+Customer Score Index Tests
+
+Checks score_index.py: a streamed build stores every customer's score,
+lookups find them (and only them), repeated IDs and invalid rows are
+handled, and a rebuild replaces the served index.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_runtime import load_model
+from score_index import ScoreIndexStore, build_index, count_rows
+
+model = load_model(os.path.join(ROOT, 'purchase_model.npz'))
+
+
+def _write_customers(path, n, seed=0, extra=''):
+    rng = np.random.default_rng(seed)
+    ages = rng.integers(18, 70, n)
+    salaries = rng.integers(15, 150, n) * 1000
+    with open(path, 'w') as f:
+        f.write('Customer_ID,Age,Salary\n')
+        for i, (age, salary) in enumerate(zip(ages, salaries)):
+            f.write(f'C{i},{age},{salary}\n')
+        f.write(extra)
+    return np.column_stack([ages, salaries]).astype(np.float64)
+
+
+def test_lookups_match_model():
+    """Test a chunked build stores the model's score for every customer"""
+    print("\n🔍 Test 1: Building and querying a score index...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'customers.csv')
+        X = _write_customers(csv_path, 5000)
+        meta = build_index(model, 'v1', csv_path, os.path.join(tmp, 'index'), chunk_rows=700)
+        assert meta['customers'] == 5000 and meta['rows_read'] == 5000, f"❌ Wrong counts: {meta}"
+
+        index = ScoreIndexStore(os.path.join(tmp, 'index')).current()
+        assert index.version == 'v1', "❌ Wrong index version!"
+        expected = model.predict_proba(X)[:, 1]
+        for i in range(0, 5000, 97):
+            record = index.lookup(f'C{i}')
+            assert record is not None, f"❌ Customer C{i} missing!"
+            assert record['purchase'] == expected[i], f"❌ Wrong score for C{i}"
+            assert record['label'] == int(expected[i] > 0.5), f"❌ Wrong label for C{i}"
+            assert (record['age'], record['salary']) == tuple(X[i]), "❌ Wrong features!"
+        assert index.lookup('C5000') is None and index.lookup('nobody') is None, \
+            "❌ Unknown customer found!"
+
+    print(f"✅ {meta['customers']} customers indexed in {meta['slots']} slots")
+
+
+def test_duplicates_and_invalid_rows():
+    """Test repeated IDs keep the last row and invalid rows are skipped"""
+    print("\n🔍 Test 2: Checking repeated IDs and invalid rows...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'customers.csv')
+        _write_customers(csv_path, 300, extra='C7,30,40000\n,35,50000\nC900,200,50000\nC901,x,1\n')
+        assert count_rows(csv_path) == 304, "❌ Wrong row count!"
+        meta = build_index(model, 'v1', csv_path, os.path.join(tmp, 'index'), chunk_rows=64)
+        assert meta['duplicate_ids'] == 1 and meta['invalid_rows'] == 3, f"❌ Wrong counts: {meta}"
+
+        index = ScoreIndexStore(os.path.join(tmp, 'index')).current()
+        record = index.lookup('C7')
+        assert (record['age'], record['salary']) == (30.0, 40000.0), "❌ Last row did not win!"
+        assert index.lookup('C900') is None, "❌ Invalid row was indexed!"
+
+    print("✅ Repeated IDs replaced, invalid rows skipped")
+
+
+def test_rebuild_replaces_index():
+    """Test a background rebuild swaps the served index for the new version"""
+    print("\n🔍 Test 3: Rebuilding the index for a new model version...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'customers.csv')
+        _write_customers(csv_path, 1000)
+        index_dir = os.path.join(tmp, 'index')
+        store = ScoreIndexStore(index_dir)
+        assert store.current() is None, "❌ Empty directory served an index!"
+
+        build_index(model, 'v1', csv_path, index_dir)
+        old = store.current()
+        assert store.start_rebuild(model, 'v2', csv_path), "❌ Rebuild did not start!"
+        for _ in range(500):
+            if store.rebuild['status'] != 'running':
+                break
+            time.sleep(0.01)
+        assert store.rebuild['status'] == 'completed', f"❌ Rebuild failed: {store.rebuild}"
+
+        new = store.current()
+        assert new.version == 'v2', "❌ New index not served!"
+        assert old.lookup('C1') == new.lookup('C1'), "❌ Old index unreadable after the swap!"
+        assert sorted(os.listdir(index_dir)) == ['CURRENT', 'v2'], "❌ Old index not removed!"
+
+    print("✅ Rebuilt index served; requests holding the old one still read it")
+
+
+def test_duplicates_within_one_chunk():
+    """Test an ID repeated inside one chunk keeps one slot with the last row"""
+    print("\n🔍 Test 4: Checking repeated IDs inside one chunk...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'customers.csv')
+        _write_customers(csv_path, 50, extra='C3,30,40000\nC3,31,41000\nC9,60,90000\n')
+        meta = build_index(model, 'v1', csv_path, os.path.join(tmp, 'index'), chunk_rows=1000)
+        assert meta['customers'] == 50 and meta['duplicate_ids'] == 3, f"❌ Wrong counts: {meta}"
+
+        index = ScoreIndexStore(os.path.join(tmp, 'index')).current()
+        record = index.lookup('C3')
+        assert (record['age'], record['salary']) == (31.0, 41000.0), "❌ Last row did not win!"
+        table = np.load(os.path.join(tmp, 'index', 'v1', 'index.npy'))
+        assert int(np.count_nonzero(table['key'])) == 50, "❌ Repeated ID took several slots!"
+
+    print("✅ One slot per customer; the last row in the chunk wins")
+
+
+def run_all_tests():
+    """Run all score index tests"""
+    print("=" * 60)
+    print("🧪 STARTING SCORE INDEX TESTS")
+    print("=" * 60)
+
+    try:
+        test_lookups_match_model()
+        test_duplicates_and_invalid_rows()
+        test_rebuild_replaces_index()
+        test_duplicates_within_one_chunk()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -0,0 +1,259 @@
+"""
+Compact Serving Model Tests
+
+Checks that the compact artifact written by export_model.py loads without
+scikit-learn and reproduces the Random Forest's predictions exactly.
+"""
+
+import os
+import sys
+import tempfile
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export_model import export_compact_model
+from model_runtime import load_model
+
+
+def _export_to_temp(model, scaler=None):
+    """Export model to a temporary file and load it back"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.npz')
+        export_compact_model(model, path, scaler=scaler)
+        return load_model(path), os.path.getsize(path)
+
+
+def test_compact_model_identical_on_training_data():
+    """Test compact model matches predict_proba on the training set"""
+    print("\n🔍 Test 1: Comparing compact model on training data...")
+
+    model = joblib.load('purchase_model.pkl')
+    scaler = joblib.load('scaler.pkl')
+    compact, _ = _export_to_temp(model)
+
+    df = pd.read_csv('storepurchasedata_large.csv')
+    X_scaled = scaler.transform(df[['Age', 'Salary']].values)
+
+    assert np.array_equal(model.predict_proba(X_scaled), compact.predict_proba(X_scaled)), \
+        "❌ Probabilities differ from the Random Forest!"
+    assert np.array_equal(model.predict(X_scaled), compact.predict(X_scaled)), \
+        "❌ Labels differ from the Random Forest!"
+
+    print(f"✅ Identical predictions on {len(X_scaled)} rows")
+
+
+def test_compact_model_identical_at_split_points():
+    """Test inputs sitting exactly on and next to split points"""
+    print("\n🔍 Test 2: Comparing compact model at split points...")
+
+    model = joblib.load('purchase_model.pkl')
+    compact, _ = _export_to_temp(model)
+
+    edges = np.concatenate(compact.thresholds)
+    edges = np.concatenate([edges, np.nextafter(edges, np.inf), np.nextafter(edges, -np.inf)])
+    X = np.column_stack([edges, edges[::-1]])
+
+    assert np.array_equal(model.predict_proba(X), compact.predict_proba(X)), \
+        "❌ Probabilities differ at split points!"
+
+    print(f"✅ Identical predictions on {len(X)} boundary inputs")
+
+
+def test_compact_model_is_smaller():
+    """Test compact artifact is smaller than the pickle"""
+    print("\n🔍 Test 3: Checking compact artifact size...")
+
+    model = joblib.load('purchase_model.pkl')
+    _, compact_size = _export_to_temp(model)
+    pickle_size = os.path.getsize('purchase_model.pkl')
+
+    print(f"  Pickle: {pickle_size:,} bytes, compact: {compact_size:,} bytes")
+    assert compact_size < pickle_size, "❌ Compact artifact is not smaller than the pickle!"
+
+    print("✅ Compact artifact is smaller than the pickle")
+
+
+def test_folded_scaler_identical_to_pair():
+    """Test folded model on raw input matches scaler + model"""
+    print("\n🔍 Test 4: Comparing folded model with scaler + model...")
+
+    model = joblib.load('purchase_model.pkl')
+    scaler = joblib.load('scaler.pkl')
+    folded, _ = _export_to_temp(model, scaler=scaler)
+
+    df = pd.read_csv('storepurchasedata_large.csv')
+    rng = np.random.default_rng(42)
+    X = np.vstack([
+        df[['Age', 'Salary']].values,
+        np.column_stack([rng.uniform(0, 120, 20000), rng.uniform(0, 200000, 20000)]),
+    ])
+
+    # Raw values on and next to every folded split point
+    edges = [np.concatenate([t, np.nextafter(t, np.inf), np.nextafter(t, -np.inf)])
+             for t in folded.thresholds]
+    n = max(len(e) for e in edges)
+    X = np.vstack([X, np.column_stack([np.resize(e, n) for e in edges])])
+
+    expected = model.predict_proba(scaler.transform(X))
+    assert np.array_equal(expected, folded.predict_proba(X)), \
+        "❌ Folded model differs from scaler + model!"
+
+    print(f"✅ Identical predictions on {len(X)} raw inputs")
+
+
+def test_serving_artifact_up_to_date():
+    """Test purchase_model.npz matches purchase_model.pkl and scaler.pkl"""
+    print("\n🔍 Test 5: Checking purchase_model.npz is up to date...")
+
+    assert os.path.exists('purchase_model.npz'), \
+        "❌ purchase_model.npz not found! Run export_model.py"
+
+    model = joblib.load('purchase_model.pkl')
+    scaler = joblib.load('scaler.pkl')
+    serving = load_model('purchase_model.npz')
+
+    df = pd.read_csv('storepurchasedata_large.csv')
+    X = df[['Age', 'Salary']].values
+    assert serving.meta['input'] == 'raw', "❌ Serving model should take raw input!"
+    assert np.array_equal(model.predict_proba(scaler.transform(X)), serving.predict_proba(X)), \
+        "❌ purchase_model.npz is stale! Re-run export_model.py"
+
+    print("✅ Serving artifact matches the trained model")
+
+
+def test_single_tree_export():
+    """Test a DecisionTreeClassifier exports as a forest of one tree"""
+    print("\n🔍 Test 6: Exporting a single decision tree...")
+
+    from sklearn.tree import DecisionTreeClassifier
+
+    scaler = joblib.load('scaler.pkl')
+    df = pd.read_csv('storepurchasedata_large.csv')
+    X = df[['Age', 'Salary']].values
+    tree = DecisionTreeClassifier(max_depth=6, random_state=0)
+    tree.fit(scaler.transform(X), df['Purchased'].values)
+
+    compact, _ = _export_to_temp(tree, scaler=scaler)
+    assert compact.n_estimators == 1, "❌ Expected a single tree!"
+    assert np.array_equal(tree.predict_proba(scaler.transform(X)), compact.predict_proba(X)), \
+        "❌ Single tree probabilities differ!"
+
+    print("✅ Decision trees export with identical predictions")
+
+
+def test_early_exit_labels_identical():
+    """Test early-exit label prediction matches the full forest with fewer trees"""
+    print("\n🔍 Test 7: Comparing early-exit labels with the full forest...")
+
+    serving = load_model('purchase_model.npz')
+    df = pd.read_csv('storepurchasedata_large.csv')
+    rng = np.random.default_rng(7)
+    X = np.vstack([
+        df[['Age', 'Salary']].values,
+        np.column_stack([rng.uniform(0, 120, 20000), rng.uniform(0, 200000, 20000)]),
+        np.column_stack([np.resize(t, 200) for t in serving.thresholds]),
+    ])
+
+    labels, trees = serving.predict_labels(X, return_trees=True)
+    assert np.array_equal(labels, serving.predict(X)), "❌ Early-exit labels differ!"
+    assert 'early_exit' in serving.meta, "❌ Artifact has no early-exit tree order!"
+
+    _, trees = serving.predict_labels(df[['Age', 'Salary']].values, return_trees=True)
+    print(f"  Average trees per row: {trees.mean():.1f} of {serving.n_estimators}")
+    assert trees.mean() < serving.n_estimators * 0.75, "❌ Early exit saved too little!"
+
+    print(f"✅ Identical labels on {len(X)} inputs")
+
+
+def test_early_exit_unanimous_forest():
+    """Test early-exit labels for a forest whose every leaf favors one class"""
+    print("\n🔍 Test 9: Early-exit labels from a unanimous forest...")
+
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(9)
+    X = rng.uniform(0, 1, (2000, 2))
+    y = (rng.uniform(0, 1, 2000) < 0.9).astype(int)
+    forest = RandomForestClassifier(n_estimators=10, max_depth=2, min_samples_leaf=200,
+                                    random_state=0).fit(X, y)
+
+    compact, _ = _export_to_temp(forest)
+    assert (compact.tree_margin_min > 0).all(), "❌ Forest is not unanimous!"
+    labels, trees = compact.predict_labels(X, return_trees=True)
+    assert np.array_equal(labels, forest.predict(X)), "❌ Early-exit labels differ!"
+    assert (trees == 0).all(), "❌ Trees evaluated although every tree agrees!"
+
+    print("✅ Every row decided without evaluating a tree")
+
+
+def test_explanations_follow_tree_paths():
+    """Test tree-path contributions match a walk over the sklearn trees"""
+    print("\n🔍 Test 8: Checking tree-path explanations...")
+
+    model = joblib.load('purchase_model.pkl')
+    scaler = joblib.load('scaler.pkl')
+    serving = load_model('purchase_model.npz')
+    X = pd.read_csv('storepurchasedata_large.csv')[['Age', 'Salary']].values
+
+    serving.predict_proba(X)
+    assert serving.node_contributions is None, "❌ Explanation tables built before explain()!"
+    probabilities, bias, contributions = serving.explain(X)
+    assert np.array_equal(probabilities, serving.predict_proba(X)), "❌ Probabilities differ!"
+    assert np.allclose(bias + contributions.sum(axis=1), probabilities, rtol=0, atol=1e-12), \
+        "❌ Bias plus contributions do not add up to the probabilities!"
+
+    # Reference: walk each sklearn tree and credit every step to its split feature
+    X_scaled = scaler.transform(X[:25])
+    expected = np.zeros((25, 2, 2))
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        values = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+        paths = estimator.decision_path(X_scaled.astype(np.float32))
+        for row in range(25):
+            nodes = paths.indices[paths.indptr[row]:paths.indptr[row + 1]]
+            for parent, child in zip(nodes[:-1], nodes[1:]):
+                expected[row, tree.feature[parent]] += values[child] - values[parent]
+    expected /= len(model.estimators_)
+    assert np.allclose(contributions[:25], expected, rtol=0, atol=1e-12), \
+        "❌ Contributions differ from the sklearn tree paths!"
+
+    print(f"✅ Contributions add up to the probabilities (base value {bias[1]:.3f})")
+
+
+def run_all_tests():
+    """Run all serving model tests"""
+    print("=" * 60)
+    print("🧪 STARTING SERVING MODEL TESTS")
+    print("=" * 60)
+
+    try:
+        test_compact_model_identical_on_training_data()
+        test_compact_model_identical_at_split_points()
+        test_compact_model_is_smaller()
+        test_folded_scaler_identical_to_pair()
+        test_serving_artifact_up_to_date()
+        test_single_tree_export()
+        test_early_exit_labels_identical()
+        test_explanations_follow_tree_paths()
+        test_early_exit_unanimous_forest()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -0,0 +1,160 @@
+"""
+What-If Sweep Tests
+
+Checks sweep.py: the vectorized grid matches scoring points one by one,
+bisected thresholds sit on the decision boundary, and overlapping sweeps
+reuse cached scores.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_runtime import load_model
+from sweep import SweepScorer, decision_thresholds, parse_range, run_sweep, sweep_grid
+
+MODEL_PATH = os.path.join(ROOT, 'purchase_model.npz')
+model = load_model(MODEL_PATH)
+
+
+class CountingModel:
+    """Wraps the model and counts the rows it scores"""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.rows = 0
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.rows += len(X)
+        self.calls += 1
+        return self.model.predict_proba(X)
+
+
+def test_grid_matches_pointwise():
+    """Test one vectorized grid call equals scoring each point alone"""
+    print("\n🔍 Test 1: Comparing the sweep grid with single predictions...")
+
+    ages = parse_range('18:70:4')
+    salaries = parse_range('15000:150000:9000')
+    counting = CountingModel(model)
+    grid = sweep_grid(SweepScorer(counting), ages, salaries)
+
+    assert counting.calls == 1, f"❌ Grid took {counting.calls} model calls"
+    for i, age in enumerate(ages):
+        for j, salary in enumerate(salaries):
+            expected = model.predict_proba(np.array([[age, salary]]))[0, 1]
+            assert grid[i, j] == expected, f"❌ Grid differs at ({age}, {salary})"
+
+    print(f"✅ {grid.size} points scored in one call, identical to single predictions")
+
+
+def test_thresholds_on_decision_boundary():
+    """Test each bisected threshold is where the prediction flips"""
+    print("\n🔍 Test 2: Checking bisected decision thresholds...")
+
+    ages = parse_range('18:70')
+    salaries = parse_range('15000:150000:1000')
+    scorer = SweepScorer(model)
+    grid = sweep_grid(scorer, ages, salaries)
+    thresholds = decision_thresholds(scorer, ages, salaries, grid, threshold=0.5, tolerance=1.0)
+
+    crossing = thresholds['status'] == 'crosses'
+    assert crossing.any(), "❌ No age crosses the threshold!"
+    for age, salary in zip(ages[crossing], thresholds['salary'][crossing]):
+        at, below = model.predict_proba(np.array([[age, salary], [age, salary - 1.0]]))[:, 1]
+        assert at >= 0.5 > below, f"❌ Age {age}: threshold {salary} is not the flip"
+
+    never = thresholds['status'] == 'never'
+    assert np.all(np.isnan(thresholds['salary'][never])), "❌ 'never' ages have a threshold!"
+    assert np.all(grid[thresholds['status'] == 'always', 0] >= 0.5), "❌ Wrong 'always' ages!"
+
+    print(f"✅ {crossing.sum()} thresholds within $1 of the decision boundary")
+
+
+def test_overlapping_sweeps_reuse_cache():
+    """Test a second, overlapping sweep only scores the new points"""
+    print("\n🔍 Test 3: Reusing cached scores across sweeps...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        salaries = parse_range('15000:150000:1000')
+        first_model = CountingModel(model)
+        first, _, first_scorer = run_sweep(first_model, 'v1', parse_range('18:50'), salaries,
+                                           cache_dir=tmp)
+
+        second_model = CountingModel(model)
+        second, _, second_scorer = run_sweep(second_model, 'v1', parse_range('40:70'), salaries,
+                                             cache_dir=tmp)
+        assert second_scorer.reused >= len(parse_range('40:50')) * len(salaries), \
+            "❌ Overlap was scored again!"
+        assert second_model.rows == second_scorer.scored, "❌ Cached points reached the model!"
+        assert np.array_equal(second[:11], first[-11:]), "❌ Cached scores differ!"
+
+        other_model = CountingModel(model)
+        run_sweep(other_model, 'v2', parse_range('40:70'), salaries, cache_dir=tmp)
+        assert other_model.rows >= len(second.ravel()), "❌ Cache shared across model versions!"
+
+    print(f"✅ Second sweep reused {second_scorer.reused:,} points, "
+          f"scored {second_scorer.scored:,}")
+
+
+def test_cli_exports():
+    """Test the command line writes the CSV and PNG files"""
+    print("\n🔍 Test 4: Running sweep.py...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run([sys.executable, os.path.join(ROOT, 'sweep.py'), '--model', MODEL_PATH,
+                        '--age', '20:60:5', '--salary', '20000:100000:5000',
+                        '--output', os.path.join(tmp, 'run')],
+                       cwd=tmp, check=True, capture_output=True, timeout=120)
+        with open(os.path.join(tmp, 'run_grid.csv')) as f:
+            grid_lines = f.read().splitlines()
+        with open(os.path.join(tmp, 'run_thresholds.csv')) as f:
+            threshold_lines = f.read().splitlines()
+        png_size = os.path.getsize(os.path.join(tmp, 'run.png'))
+        cached = os.listdir(os.path.join(tmp, '.sweep_cache'))
+
+    assert grid_lines[0] == 'age,salary,purchase_probability' and len(grid_lines) == 1 + 9 * 17, \
+        "❌ Wrong grid CSV!"
+    assert len(threshold_lines) == 1 + 9, "❌ Wrong thresholds CSV!"
+    assert png_size > 0 and len(cached) == 1, "❌ Plot or cache missing!"
+
+    print("✅ Grid CSV, thresholds CSV, plot and cache written")
+
+
+def run_all_tests():
+    """Run all what-if sweep tests"""
+    print("=" * 60)
+    print("🧪 STARTING WHAT-IF SWEEP TESTS")
+    print("=" * 60)
+
+    try:
+        test_grid_matches_pointwise()
+        test_thresholds_on_decision_boundary()
+        test_overlapping_sweeps_reuse_cache()
+        test_cli_exports()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return 1
+
+    except Exception as e:
+        print(f"\n❌ UNEXPECTED ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit_code = run_all_tests()
+    sys.exit(exit_code)
@@ -10,10 +10,24 @@ from sklearn.metrics import accuracy_score, classification_report, confusion_mat
 import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
-
-# Load the dataset
-print("Loading dataset...")
-df = pd.read_csv('storepurchasedata_large.csv')
+import os
+
+from dedupe import collapse_duplicates, scale_gamma, timed_fit
+from drift import save_reference
+from kernel_approx import EXACT_MAX_ROWS, ApproximateRBFSVC
+from export_model import export_compact_model, verify_identical
+from model_runtime import load_model
+
+# Load the dataset (TRAINING_DATA can point at a larger extract, e.g. one
+# written by generate_data.py)
+DATA_PATH = os.environ.get('TRAINING_DATA', 'storepurchasedata_large.csv')
+# Collapse duplicate training rows into sample weights (see dedupe.py)
+DEDUPE = os.environ.get('TRAINING_DEDUPE', '0') == '1'
+# Above this many (unique) training rows the exact RBF SVC is replaced by
+# its linear-time Nyström approximation (see kernel_approx.py)
+SVC_EXACT_MAX_ROWS = int(os.environ.get('SVC_EXACT_MAX_ROWS', str(EXACT_MAX_ROWS)))
+print(f"Loading dataset from {DATA_PATH}...")
+df = pd.read_csv(DATA_PATH)
 
 # Prepare features and target
 X = df[['Age', 'Salary']].values
@@ -33,6 +47,13 @@ scaler = StandardScaler()
 X_train_scaled = scaler.fit_transform(X_train)
 X_test_scaled = scaler.transform(X_test)
 
+# Fit on unique rows weighted by their counts; same objective, fewer rows
+X_fit, y_fit, sample_weight = X_train_scaled, y_train, None
+if DEDUPE:
+    X_fit, y_fit, sample_weight = collapse_duplicates(X_train_scaled, y_train)
+    print(f"Collapsed duplicates: {len(X_fit)} unique training rows "
+          f"({len(X_train_scaled) / len(X_fit):.1f}x fewer)")
+
 print("\n" + "=" * 70)
 print("TRAINING MULTIPLE MODELS")
 print("=" * 70)
@@ -42,8 +63,15 @@ models = {
     'Logistic Regression': LogisticRegression(random_state=42, max_iter=1000),
     'Decision Tree': DecisionTreeClassifier(random_state=42),
     'Random Forest': RandomForestClassifier(n_estimators=100, random_state=42),
-    'SVM (RBF Kernel)': SVC(kernel='rbf', random_state=42)
 }
+if len(X_fit) <= SVC_EXACT_MAX_ROWS:
+    # gamma='scale' from the full training rows, also when fitting collapsed ones
+    models['SVM (RBF Kernel)'] = SVC(kernel='rbf', gamma=scale_gamma(X_fit, sample_weight),
+                                     random_state=42)
+else:
+    print(f"{len(X_fit):,} training rows > SVC_EXACT_MAX_ROWS={SVC_EXACT_MAX_ROWS:,}: "
+          f"using the approximate RBF SVM only")
+models['SVM (Approximate RBF)'] = ApproximateRBFSVC(random_state=42)
 
 results = {}
 
@@ -53,7 +81,8 @@ for model_name, model in models.items():
     print(f"Training {model_name}...")
     
     # Train the model
-    model.fit(X_train_scaled, y_train)
+    fit_seconds = timed_fit(model, X_fit, y_fit, sample_weight)
+    print(f"Fit time: {fit_seconds * 1000:.1f} ms")
     
     # Make predictions
     y_pred_train = model.predict(X_train_scaled)
@@ -73,14 +102,34 @@ for model_name, model in models.items():
     print(f"Training Accuracy: {train_accuracy:.4f} ({train_accuracy*100:.2f}%)")
     print(f"Testing Accuracy: {test_accuracy:.4f} ({test_accuracy*100:.2f}%)")
 
-# Find the best model
-best_model_name = max(results, key=lambda x: results[x]['test_accuracy'])
+# How closely the approximation follows the exact SVM, when both were fitted
+if 'SVM (RBF Kernel)' in results:
+    exact = results['SVM (RBF Kernel)']
+    approximate = results['SVM (Approximate RBF)']
+    agreement = np.mean(exact['predictions'] == approximate['predictions'])
+    print(f"\nApproximate vs exact RBF SVM: test accuracy {approximate['test_accuracy']:.4f} "
+          f"vs {exact['test_accuracy']:.4f}, same prediction on {agreement:.2%} of test rows")
+
+# Find the best model. Only tree models export to purchase_model.npz,
+# the artifact the API and the Lambda image serve, so the best of those
+# is saved; a higher-scoring non-tree model is reported but not saved,
+# which keeps purchase_model.pkl and purchase_model.npz the same model.
+def is_tree_model(model):
+    return hasattr(model, 'tree_') or hasattr(model, 'estimators_')
+
+top_model_name = max(results, key=lambda x: results[x]['test_accuracy'])
+best_model_name = max((name for name in results if is_tree_model(results[name]['model'])),
+                      key=lambda x: results[x]['test_accuracy'])
 best_model = results[best_model_name]['model']
 best_accuracy = results[best_model_name]['test_accuracy']
 
 print("\n" + "=" * 70)
 print(f"BEST MODEL: {best_model_name}")
 print(f"Test Accuracy: {best_accuracy:.4f} ({best_accuracy*100:.2f}%)")
+if top_model_name != best_model_name:
+    print(f"Note: {top_model_name} scored higher "
+          f"({results[top_model_name]['test_accuracy']:.4f}) but cannot be exported "
+          f"for serving; the best tree model is saved instead")
 print("=" * 70)
 
 # Detailed evaluation of the best model
@@ -104,6 +153,18 @@ print("\n" + "=" * 70)
 print(f"Best model saved as 'purchase_model.pkl'")
 print(f"Scaler saved as 'scaler.pkl'")
 print(f"Model Type: {best_model_name}")
+
+# Export the NumPy-only serving model (scaler folded in), which is what
+# the API and the Lambda image load
+export_compact_model(best_model, 'purchase_model.npz', scaler=scaler,
+                     extra_meta={'feature_names': ['Age', 'Salary']}, order_data=X)
+verify_identical(best_model, load_model('purchase_model.npz'), scaler.transform(X), X)
+print("Serving model exported as 'purchase_model.npz' (matches predict_proba)")
+
+# Histograms of the training features, which live traffic is compared
+# against to detect drift
+save_reference(X, 'drift_reference.json')
+print("Drift reference saved as 'drift_reference.json'")
 print("=" * 70)
 
 # Create visualizations
@@ -0,0 +1,132 @@
+"""
+Request Validation
+
+Validates customer records for the prediction endpoints in bulk. The age
+and salary columns are pulled out of the payload in one pass, converted to
+NumPy arrays, and checked with vectorized masks, so validating a large
+batch costs a few array operations instead of a Python loop with a
+try/except per row. /predict and /predict/batch share these rules.
+"""
+
+import numpy as np
+
+MIN_AGE = 0
+MAX_AGE = 120
+
+# Error codes in the order they are reported when a record has several
+ERRORS = {
+    'not_object': ('Invalid data type', 'Each customer must be a JSON object'),
+    'missing': ('Missing required fields', 'Both age and salary are required'),
+    'type': ('Invalid data type', 'Age and salary must be numeric values'),
+    'age': ('Invalid age', f'Age must be between {MIN_AGE} and {MAX_AGE}'),
+    'salary': ('Invalid salary', 'Salary must be a positive value'),
+}
+
+_NOT_OBJECT = object()
+
+
+class ValidationResult:
+    """
+    Outcome of validating a list of customer records.
+
+    Attributes:
+    -----------
+    features : np.ndarray, shape (n_valid, 2)
+        Age and salary of the valid records, ready for the model
+    indices : np.ndarray, shape (n_valid,)
+        Position of each valid record in the original list
+    errors : list of dict
+        One error object per invalid record, in index order
+    """
+
+    def __init__(self, features, indices, errors):
+        self.features = features
+        self.indices = indices
+        self.errors = errors
+
+
+def _to_float(values):
+    """
+    Convert a column to float64, marking values that are not numeric.
+
+    Takes the fast path of a single NumPy conversion; only when that fails
+    does it fall back to converting element by element to find the bad ones.
+    """
+    try:
+        column = np.array(values, dtype=np.float64)
+        bad = np.zeros(len(values), dtype=bool)
+        # Equal-length lists convert to a 2-D array instead of failing
+        if column.ndim != 1:
+            raise ValueError('not a flat column')
+    except (TypeError, ValueError, OverflowError):
+        column = np.empty(len(values), dtype=np.float64)
+        bad = np.zeros(len(values), dtype=bool)
+        for i, value in enumerate(values):
+            try:
+                column[i] = float(value)
+            # Integers beyond the float range raise OverflowError
+            except (TypeError, ValueError, OverflowError):
+                column[i] = np.nan
+                bad[i] = True
+    # NaN and infinity parse as floats but are not usable inputs
+    bad |= ~np.isfinite(column)
+    return column, bad
+
+
+def validate_customers(customers):
+    """
+    Validate customer records and extract model features.
+
+    Parameters:
+    -----------
+    customers : list
+        Records of the form {"age": ..., "salary": ...}
+
+    Returns:
+    --------
+    result : ValidationResult
+    """
+    n = len(customers)
+    ages = [c.get('age') if isinstance(c, dict) else _NOT_OBJECT for c in customers]
+    salaries = [c.get('salary') if isinstance(c, dict) else _NOT_OBJECT for c in customers]
+
+    not_object = np.fromiter((a is _NOT_OBJECT for a in ages), dtype=bool, count=n)
+    missing = np.fromiter((a is None or s is None for a, s in zip(ages, salaries)),
+                          dtype=bool, count=n) & ~not_object
+
+    # Placeholders for absent values keep the conversion on the fast path
+    present = ~(not_object | missing)
+    if not present.all():
+        ages = [a if ok else 0.0 for a, ok in zip(ages, present)]
+        salaries = [s if ok else 0.0 for s, ok in zip(salaries, present)]
+
+    age, age_bad = _to_float(ages)
+    salary, salary_bad = _to_float(salaries)
+
+    bad_type = present & (age_bad | salary_bad)
+    checked = present & ~bad_type
+    bad_age = checked & ((age < MIN_AGE) | (age > MAX_AGE))
+    bad_salary = checked & ~bad_age & (salary < 0)
+
+    valid = checked & ~bad_age & ~bad_salary
+    indices = np.flatnonzero(valid)
+    features = np.column_stack([age[indices], salary[indices]])
+
+    errors = []
+    if len(indices) < n:
+        code = np.full(n, '', dtype=object)
+        code[bad_salary] = 'salary'
+        code[bad_age] = 'age'
+        code[bad_type] = 'type'
+        code[missing] = 'missing'
+        code[not_object] = 'not_object'
+        for idx in np.flatnonzero(~valid):
+            error, message = ERRORS[code[idx]]
+            errors.append({
+                'index': int(idx),
+                'error': error,
+                'message': message,
+                'data': customers[idx]
+            })
+
+    return ValidationResult(features, indices, errors)